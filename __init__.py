@@ -1,11 +1,32 @@
 """arXiv Server initialization."""
-import uvicorn
-from .server import app
+import time
+
+# Start of this process's cold start, reported by the arxiv_startup_seconds metric.
+IMPORT_STARTED = time.perf_counter()
+
+# Worker processes import the app themselves, so uvicorn needs its import string.
+APP_IMPORT_STRING = f"{__name__}.server:app"
 
 
 def main():
     """Start the FastAPI server."""
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import uvicorn
+    from .config import get_settings
+
+    settings = get_settings()
+    if settings.WORKERS > 1:
+        uvicorn.run(APP_IMPORT_STRING, host=settings.HOST, port=settings.PORT, workers=settings.WORKERS)
+    else:
+        from .server import app
+        uvicorn.run(app, host=settings.HOST, port=settings.PORT)
+
+
+def __getattr__(name):
+    """Import the app on first access, so importing the package stays cheap."""
+    if name == "app":
+        from .server import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 __all__ = ["main", "app"]
@@ -0,0 +1,125 @@
+"""Measure find_in_papers query latency on a large full-text index.
+
+Builds a full-text index of ``--papers`` synthetic papers, each a few
+sections of words drawn from a Zipf-distributed vocabulary so that some
+terms occur in nearly every paper and others in a handful, the way real
+text does. It then times ``FullTextIndex.search`` with the tool's default
+limits for several kinds of query and reports p50/p95 latency per kind and
+overall. The run fails if the overall p95 exceeds ``--max-p95-ms``, the
+tool's target of 50 ms on a 10k-paper library.
+
+Usage::
+
+    python -m arxiv_mcp_server.benchmarks.bench_find_in_papers [--papers 10000] [--queries 100]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from arxiv_mcp_server.services.fulltext import FULLTEXT_FILE_NAME, FullTextIndex
+from arxiv_mcp_server.services.sections import build_section_index
+from arxiv_mcp_server.tools.find_in_papers import DEFAULT_LIMIT, DEFAULT_PER_PAPER
+
+VOCABULARY_SIZE = 30000
+SECTIONS = ("Abstract", "Introduction", "Related Work", "Method", "Experiments", "Conclusion")
+WORDS_PER_LINE = 15
+DEFAULT_MAX_P95_MS = 50.0
+
+
+def _vocabulary(rng: random.Random) -> list:
+    """Distinct pronounceable pseudo-words, most frequent first."""
+    consonants, vowels = "bcdfghklmnprstvz", "aeiou"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        length = rng.randint(2, 4)
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    return sorted(words)
+
+
+def _paper(rng: random.Random, words: list, weights: list, length: int) -> str:
+    """A markdown paper with one heading per section and Zipf-distributed words."""
+    parts = []
+    per_section = length // len(SECTIONS)
+    for title in SECTIONS:
+        body = rng.choices(words, cum_weights=weights, k=per_section)
+        lines = (" ".join(body[i:i + WORDS_PER_LINE]) for i in range(0, per_section, WORDS_PER_LINE))
+        parts.append(f"## {title}\n\n" + ".\n".join(lines) + ".\n\n")
+    return "".join(parts)
+
+
+def _queries(rng: random.Random, words: list, sample_text: str, count: int) -> dict:
+    """Queries per kind: frequent, mid-frequency and rare words, word pairs and phrases."""
+    mid = words[1000:5000]
+    sample = sample_text.split()
+    return {
+        "frequent": [rng.choice(words[:50]) for _ in range(count)],
+        "mid": [rng.choice(mid) for _ in range(count)],
+        "rare": [rng.choice(words[20000:]) for _ in range(count)],
+        "two words": [f"{rng.choice(mid)} {rng.choice(words[:500])}" for _ in range(count)],
+        "phrase": [
+            '"' + " ".join(word.strip(".") for word in sample[i:i + 2]) + '"'
+            for i in (rng.randrange(len(sample) - 2) for _ in range(count))
+        ],
+    }
+
+
+def _percentile_ms(samples: list, percentile: int) -> float:
+    return statistics.quantiles(samples, n=100)[percentile - 1] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=3000, help="words per paper")
+    parser.add_argument("--queries", type=int, default=100, help="queries per kind")
+    parser.add_argument("--max-p95-ms", type=float, default=DEFAULT_MAX_P95_MS)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    words = _vocabulary(rng)
+    rng.shuffle(words)
+    weights, total = [], 0.0
+    for rank in range(1, len(words) + 1):
+        total += 1 / rank
+        weights.append(total)
+
+    with tempfile.TemporaryDirectory() as root:
+        db_path = Path(root) / FULLTEXT_FILE_NAME
+        fulltext = FullTextIndex(db_path)
+        started = time.perf_counter()
+        for number in range(args.papers):
+            markdown = _paper(rng, words, weights, args.words)
+            fulltext.index_paper(f"bench.{number:05d}", markdown, build_section_index([markdown]))
+        print(f"indexed {args.papers} papers in {time.perf_counter() - started:.1f}s "
+              f"({db_path.stat().st_size / 1024 / 1024:.0f} MB)")
+
+        queries = _queries(rng, words, markdown, args.queries)
+        fulltext.search(queries["frequent"][0], DEFAULT_LIMIT, DEFAULT_PER_PAPER)  # warm the page cache
+
+        print(f"{'query':>10} {'hits':>6} {'p50 ms':>8} {'p95 ms':>8}")
+        all_times = []
+        for kind, texts in queries.items():
+            times, hits = [], 0
+            for text in texts:
+                started = time.perf_counter()
+                hits += len(fulltext.search(text, DEFAULT_LIMIT, DEFAULT_PER_PAPER))
+                times.append(time.perf_counter() - started)
+            all_times.extend(times)
+            print(f"{kind:>10} {hits / len(texts):6.1f} {_percentile_ms(times, 50):8.2f} "
+                  f"{_percentile_ms(times, 95):8.2f}")
+
+    p50, p95 = _percentile_ms(all_times, 50), _percentile_ms(all_times, 95)
+    print(f"{'all':>10} {'':>6} {p50:8.2f} {p95:8.2f}")
+    if p95 > args.max_p95_ms:
+        print(f"FAIL: p95 {p95:.1f} ms exceeds the {args.max_p95_ms:.0f} ms target")
+        sys.exit(1)
+    print(f"OK: p95 {p95:.1f} ms is within the {args.max_p95_ms:.0f} ms target")
+
+
+if __name__ == "__main__":
+    main()
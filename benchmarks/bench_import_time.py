@@ -0,0 +1,89 @@
+"""Measure the cold-start import time of the server against a budget.
+
+Imports ``arxiv_mcp_server.server``, which is what each worker does before
+it can serve, ``--runs`` times in fresh interpreters and reports the median,
+then lists the modules with the most import time of their own from one more
+run under ``python -X importtime``. Fails (exit status 1) when the median
+exceeds ``--budget-ms``, or when a dependency meant to load on first use
+(PDF conversion, the arXiv client, uvicorn, the profiler) was imported at
+startup, so an eager import sneaking back in is caught here.
+
+Usage::
+
+    python -m arxiv_mcp_server.benchmarks.bench_import_time [--runs 7] [--budget-ms 1000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+DEFERRED_MODULES = ("pymupdf4llm", "pymupdf", "arxiv", "aiofiles", "uvicorn", "pyinstrument")
+DEFAULT_BUDGET_MS = 1000.0
+TOP_MODULES = 15
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import arxiv_mcp_server.server
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in sys.argv[1:] if name in sys.modules]}))
+"""
+
+
+def _import_once(env: dict, cwd: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", CHILD, *DEFERRED_MODULES]
+    result = subprocess.run(command, env=env, cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import failed:\n{result.stderr}")
+    return result
+
+
+def _slowest_modules(importtime_output: str, count: int) -> list:
+    """(self ms, cumulative ms, module) of the modules with the most self time."""
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us) / 1000, int(cumulative_us) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as storage_path:
+        env = dict(os.environ, STORAGE_PATH=storage_path, LIBRARY_WATCHER="off")
+        # Run from the scratch directory so the package's own modules never shadow the stdlib.
+        runs = [json.loads(_import_once(env, storage_path).stdout) for _ in range(args.runs)]
+        profile = _import_once(env, storage_path, importtime=True)
+
+    print(f"{'self ms':>9} {'cumul. ms':>10}  module")
+    for self_ms, cumulative_ms, name in _slowest_modules(profile.stderr, TOP_MODULES):
+        print(f"{self_ms:9.1f} {cumulative_ms:10.1f}  {name}")
+
+    median_ms = statistics.median(run["seconds"] for run in runs) * 1000
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    print(f"\nimport arxiv_mcp_server.server: median {median_ms:.0f} ms over {args.runs} runs "
+          f"(min {min(run['seconds'] for run in runs) * 1000:.0f} ms), budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    if median_ms > args.budget_ms:
+        print(f"FAIL: import time is over budget by {median_ms - args.budget_ms:.0f} ms")
+        failed = True
+    if loaded:
+        print(f"FAIL: imported at startup instead of on first use: {', '.join(loaded)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
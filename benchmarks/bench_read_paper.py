@@ -0,0 +1,97 @@
+"""Benchmark read_paper against the raw paper endpoint for 1-10 MB papers.
+
+Runs the FastAPI app in-process through httpx's ASGI transport against a
+temporary library of synthetic markdown papers and reports requests/s and
+MB/s for:
+
+* ``POST /tools/read_paper`` (JSON-wrapped TextContent)
+* ``GET /papers/{id}/raw`` (file response)
+* ``GET /papers/{id}/raw`` with ``If-None-Match`` (304, file not opened)
+* ``GET /papers/{id}/raw`` with a 64 KB ``Range``
+
+Usage::
+
+    python -m arxiv_mcp_server.benchmarks.bench_read_paper [--iterations 50]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+PAPER_SIZES_MB = (1, 2, 5, 10)
+RANGE_BYTES = 64 * 1024
+LINE = "The quick brown fox jumps over the lazy dog while measuring throughput. \n"
+
+
+def _write_papers(storage_path: Path) -> dict:
+    """Write one synthetic markdown paper per size; return {paper_id: size}."""
+    papers = {}
+    for size_mb in PAPER_SIZES_MB:
+        paper_id = f"9999.{size_mb:05d}"
+        target = size_mb * 1024 * 1024
+        content = ("## Section\n" + LINE * 200) * (target // (len(LINE) * 200 + 11) + 1)
+        (storage_path / f"{paper_id}.md").write_text(content[:target], encoding="utf-8")
+        papers[paper_id] = target
+    return papers
+
+
+async def _measure(label: str, request, iterations: int) -> None:
+    started = time.perf_counter()
+    transferred = 0
+    for _ in range(iterations):
+        response = await request()
+        transferred += len(response.content)
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {label:<22} {iterations / elapsed:8.1f} req/s "
+        f"{transferred / elapsed / 1e6:9.1f} MB/s "
+        f"{elapsed / iterations * 1000:8.2f} ms/req"
+    )
+
+
+async def _run(papers: dict, iterations: int) -> None:
+    import httpx
+    from arxiv_mcp_server.server import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for paper_id, size in papers.items():
+            print(f"{paper_id} ({size / 1e6:.0f} MB)")
+            raw_url = f"/papers/{paper_id}/raw"
+            etag = (await client.get(raw_url)).headers["etag"]
+            await _measure(
+                "read_paper (JSON)",
+                lambda: client.post("/tools/read_paper", json={"paper_id": paper_id}),
+                iterations,
+            )
+            await _measure("raw", lambda: client.get(raw_url), iterations)
+            await _measure(
+                "raw If-None-Match",
+                lambda: client.get(raw_url, headers={"If-None-Match": etag}),
+                iterations,
+            )
+            await _measure(
+                "raw Range 64KB",
+                lambda: client.get(raw_url, headers={"Range": f"bytes=0-{RANGE_BYTES - 1}"}),
+                iterations,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as storage:
+        # Settings are read at import time, so point storage at the temp dir first.
+        os.environ["STORAGE_PATH"] = storage
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["LIBRARY_WATCHER"] = "off"
+        papers = _write_papers(Path(storage))
+        asyncio.run(_run(papers, args.iterations))
+
+if __name__ == "__main__":
+    main()
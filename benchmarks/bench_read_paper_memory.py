@@ -0,0 +1,138 @@
+"""Measure peak memory of read_paper, JSON versus streaming, for 1-32 MB papers.
+
+Drives the FastAPI app directly over ASGI with a ``send`` that discards the
+body (an HTTP client would buffer it and skew the numbers) and reports the
+tracemalloc peak of each request. The paper cache is disabled so every read
+allocates afresh. Streaming peaks should stay flat as papers grow; the run
+fails if any streaming peak exceeds ``--max-stream-peak-mb``.
+
+Usage::
+
+    python -m arxiv_mcp_server.benchmarks.bench_read_paper_memory [--max-stream-peak-mb 2]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+PAPER_SIZES_MB = (1, 4, 16, 32)
+LINE = "The quick brown fox jumps over the lazy dog while measuring memory. \n"
+
+
+def _write_papers(storage_path: Path) -> dict:
+    """Write one synthetic markdown paper per size; return {paper_id: size}."""
+    papers = {}
+    for size_mb in PAPER_SIZES_MB:
+        paper_id = f"9999.{size_mb:05d}"
+        target = size_mb * 1024 * 1024
+        content = ("## Section\n" + LINE * 200) * (target // (len(LINE) * 200 + 11) + 1)
+        (storage_path / f"{paper_id}.md").write_text(content[:target], encoding="utf-8")
+        papers[paper_id] = target
+    return papers
+
+
+async def _post(app, path: str, payload: dict) -> int:
+    """POST a JSON body to the ASGI app and return the response size in bytes."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("bench", 0),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+    received = 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Never disconnect; the app cancels this wait once the response is done.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return received
+
+
+async def _peak(app, payload: dict) -> tuple:
+    """Return (response bytes, peak bytes allocated while serving it)."""
+    gc.collect()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    received = await _post(app, "/tools/read_paper", payload)
+    return received, tracemalloc.get_traced_memory()[1] - baseline
+
+
+async def _run(papers: dict, max_stream_peak: int) -> bool:
+    from arxiv_mcp_server.server import app
+
+    tracemalloc.start()
+    # Warm up imports and lazily built state outside the measurements.
+    first = next(iter(papers))
+    await _post(app, "/tools/read_paper", {"paper_id": first, "stream": True})
+
+    # All streaming reads run first: a JSON body released late would otherwise
+    # be freed during the next measurement and hide that request's peak.
+    stream_peaks = {}
+    ok = True
+    for paper_id, size in papers.items():
+        received, stream_peaks[paper_id] = await _peak(app, {"paper_id": paper_id, "stream": True})
+        if received != size:
+            print(f"{paper_id}: streamed {received} of {size} bytes")
+            ok = False
+        ok = ok and stream_peaks[paper_id] <= max_stream_peak
+
+    print(f"{'paper':<12} {'size MB':>8} {'JSON peak MB':>13} {'stream peak MB':>15}")
+    for paper_id, size in papers.items():
+        _, json_peak = await _peak(app, {"paper_id": paper_id})
+        stream_peak = stream_peaks[paper_id]
+        print(f"{paper_id:<12} {size / 2**20:8.0f} {json_peak / 2**20:13.1f} {stream_peak / 2**20:15.2f}")
+    tracemalloc.stop()
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-stream-peak-mb", type=float, default=2.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as storage:
+        # Settings are read at import time, so configure them first.
+        os.environ["STORAGE_PATH"] = storage
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["LIBRARY_WATCHER"] = "off"
+        os.environ["PAPER_CACHE_BYTES"] = "0"
+        papers = _write_papers(Path(storage))
+        ok = asyncio.run(_run(papers, int(args.max_stream_peak_mb * 2**20)))
+
+    if not ok:
+        print(f"FAIL: streaming peak exceeded {args.max_stream_peak_mb} MB")
+        sys.exit(1)
+    print("OK: streaming peak memory does not grow with paper size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Measure recall and latency of semantic_search's ANN index against exact search.
+
+Fills an embedding store with synthetic clustered unit vectors (papers on a
+shared topic sit close together, as real embeddings do), trains the IVF
+index, then compares its top-k for held-out queries with the exact top-k
+from a full scan, for several ``nprobe`` values. Also reports how long the
+persisted index takes to load. The run fails if recall at the default
+``nprobe`` falls below ``--min-recall`` or its p95 latency exceeds
+``--max-p95-ms``.
+
+Usage::
+
+    python -m arxiv_mcp_server.benchmarks.bench_semantic_search [--papers 100000] [--k 10]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from arxiv_mcp_server.services.ann import DEFAULT_NPROBE, IVFIndex
+from arxiv_mcp_server.services.embeddings import EmbeddingStore, HashingEmbedder
+
+DIMENSION = 384
+TOPICS = 2000
+NOISE = 0.05
+QUERIES = 200
+NPROBES = (4, 8, DEFAULT_NPROBE, 32, 64)
+ADD_BATCH_SIZE = 10000
+
+
+def _clustered_vectors(rng, topics: np.ndarray, count: int) -> np.ndarray:
+    """Unit vectors scattered around randomly chosen topic directions."""
+    vectors = topics[rng.integers(len(topics), size=count)]
+    vectors = vectors + rng.normal(scale=NOISE, size=vectors.shape)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _fill_store(store: EmbeddingStore, rng, topics: np.ndarray, papers: int) -> None:
+    for start in range(0, papers, ADD_BATCH_SIZE):
+        count = min(ADD_BATCH_SIZE, papers - start)
+        ids = [f"bench.{start + offset:07d}" for offset in range(count)]
+        store.add(ids, _clustered_vectors(rng, topics, count))
+
+
+def _percentile_ms(samples: list, percentile: float) -> float:
+    return float(np.percentile(samples, percentile)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--papers", type=int, default=100000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    parser.add_argument("--max-p95-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    topics = rng.normal(size=(TOPICS, DIMENSION))
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+    queries = _clustered_vectors(rng, topics, QUERIES)
+    embedder = HashingEmbedder(DIMENSION)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = EmbeddingStore(Path(root), embedder)
+        _fill_store(store, rng, topics, args.papers)
+
+        started = time.perf_counter()
+        IVFIndex(store)
+        print(f"trained on {args.papers} papers in {time.perf_counter() - started:.2f}s")
+
+        # Reopen both from disk, as a restarted server would.
+        started = time.perf_counter()
+        store = EmbeddingStore(Path(root), embedder)
+        index = IVFIndex(store)
+        print(f"loaded store and index in {(time.perf_counter() - started) * 1000:.1f} ms "
+              f"({index.cell_count} cells)")
+
+        exact, exact_times = [], []
+        for query in queries:
+            started = time.perf_counter()
+            exact.append({paper_id for paper_id, _ in index.search_vector(query, args.k, index.cell_count)})
+            exact_times.append(time.perf_counter() - started)
+        print(f"{'exact':>8} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        print(f"{'scan':>8} {1.0:8.3f} {_percentile_ms(exact_times, 50):8.2f} "
+              f"{_percentile_ms(exact_times, 95):8.2f}")
+
+        ok = True
+        for nprobe in NPROBES:
+            hits, times = 0, []
+            for query, truth in zip(queries, exact):
+                started = time.perf_counter()
+                found = index.search_vector(query, args.k, nprobe)
+                times.append(time.perf_counter() - started)
+                hits += len(truth & {paper_id for paper_id, _ in found})
+            recall = hits / (len(queries) * args.k)
+            p95 = _percentile_ms(times, 95)
+            print(f"{nprobe:>8} {recall:8.3f} {_percentile_ms(times, 50):8.2f} {p95:8.2f}")
+            if nprobe == DEFAULT_NPROBE:
+                ok = recall >= args.min_recall and p95 <= args.max_p95_ms
+
+    if not ok:
+        print(f"FAIL: nprobe={DEFAULT_NPROBE} needs recall >= {args.min_recall} "
+              f"and p95 <= {args.max_p95_ms} ms")
+        sys.exit(1)
+    print(f"OK: nprobe={DEFAULT_NPROBE} meets the recall and latency budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Measure the per-request overhead of the tool endpoint with a no-op tool.
+
+Registers two no-op tools on the real app, one returning a single
+TextContent and one returning ``--results`` TextContents with search-style
+metadata, and calls them through ``POST /tools/{name}`` in-process (httpx's
+ASGI transport, no network). The same calls then go to a reference route
+built the way tools used to be served: an untyped ``Dict[str, Any]`` body,
+a tool dict rebuilt per call, and FastAPI's generic response encoding.
+Whatever differs between the two is framework overhead.
+
+Usage::
+
+    python -m arxiv_mcp_server.benchmarks.bench_tool_overhead [--iterations 5000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+os.environ.setdefault("STORAGE_PATH", tempfile.mkdtemp())
+
+import httpx
+
+from arxiv_mcp_server import types
+from arxiv_mcp_server.server import TOOL_ENDPOINTS, ToolEndpoint, app
+from arxiv_mcp_server.tools.models import ToolRequest
+
+RESULTS_METADATA = {
+    "title": "Attention Is All You Need",
+    "authors": ["Ashish Vaswani", "Noam Shazeer", "Niki Parmar", "Jakob Uszkoreit"],
+    "abstract": "The dominant sequence transduction models are based on complex recurrent networks. " * 4,
+    "categories": ["cs.CL", "cs.LG"],
+    "published": "2017-06-12T17:57:34",
+    "url": "http://arxiv.org/pdf/1706.03762v7",
+    "relevance_score": 0.8731,
+}
+
+
+class NoopRequest(ToolRequest):
+    query: str = ""
+
+
+def _make_tools(results: int):
+    async def noop(arguments: Dict[str, Any]):
+        return [types.TextContent(text=json.dumps({"status": "success"}))]
+
+    async def noop_results(arguments: Dict[str, Any]):
+        return [
+            types.TextContent(text=f"Paper {index}", metadata=dict(RESULTS_METADATA, id=f"1706.{index:05d}"))
+            for index in range(results)
+        ]
+
+    return {"noop": noop, "noop_results": noop_results}
+
+
+def _add_reference_route(handlers: Dict[str, Any]) -> None:
+    """Serve the no-op tools the way handle_tool used to."""
+    @app.post("/reference/{tool_name}")
+    async def reference_tool(tool_name: str, arguments: Dict[str, Any]):
+        tools = dict(handlers)
+        return await tools[tool_name](arguments)
+
+
+async def _measure(client: httpx.AsyncClient, path: str, iterations: int) -> float:
+    """Mean microseconds per sequential call."""
+    body = {"query": "transformers"}
+    for _ in range(min(iterations, 100)):
+        (await client.post(path, json=body)).raise_for_status()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        (await client.post(path, json=body)).raise_for_status()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+async def _run(args) -> None:
+    handlers = _make_tools(args.results)
+    for name, handler in handlers.items():
+        TOOL_ENDPOINTS[name] = ToolEndpoint(NoopRequest, handler)
+    _add_reference_route(handlers)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'tool':>14} {'reference us':>13} {'typed us':>9} {'speedup':>8}")
+        for name in handlers:
+            reference = await _measure(client, f"/reference/{name}", args.iterations)
+            typed = await _measure(client, f"/tools/{name}", args.iterations)
+            print(f"{name:>14} {reference:13.1f} {typed:9.1f} {reference / typed:7.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--results", type=int, default=50)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Load-test the HTTP server with one and with several worker processes.
+
+For each ``--workers`` value, starts ``python -m arxiv_mcp_server`` with that
+``WORKERS`` setting on a scratch storage path, waits for ``/health``, then
+sends ``--requests`` ``POST /tools/calculate_relevance_batch`` calls (BM25
+over ``--papers`` synthetic papers, no reranking) from ``--concurrency``
+concurrent clients. Scoring is CPU-bound Python, which a single process
+runs one request at a time, so throughput should grow with the worker count
+up to the number of cores. Before the load, a download status is written to
+the shared state and read back through ``download_paper`` with
+``check_status`` on every connection, so a worker that kept status in its
+own memory would be caught answering ``not_found``.
+
+Usage::
+
+    python -m arxiv_mcp_server.benchmarks.bench_workers [--workers 1 2 4] [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+from arxiv_mcp_server.services.shared_state import SHARED_STATE_FILE_NAME, SharedState
+
+HOST = "127.0.0.1"
+STARTUP_TIMEOUT = 60.0
+STATUS_PAPER_ID = "0000.00000"
+STATUS_CHECKS = 50
+WORDS = ("graph", "neural", "attention", "transformer", "retrieval", "protein", "quantum",
+         "diffusion", "language", "vision", "reinforcement", "learning", "sparse", "kernel")
+
+
+def _papers(count: int) -> list:
+    """Synthetic papers with random titles and abstracts from a small vocabulary."""
+    rng = np.random.default_rng(0)
+    return [
+        {
+            "id": f"bench.{index:05d}",
+            "title": " ".join(rng.choice(WORDS, 6)),
+            "abstract": " ".join(rng.choice(WORDS, 150)),
+        }
+        for index in range(count)
+    ]
+
+
+def _start_server(workers: int, port: int, storage_path: str) -> subprocess.Popen:
+    env = dict(os.environ, WORKERS=str(workers), HOST=HOST, PORT=str(port),
+               STORAGE_PATH=storage_path, LIBRARY_WATCHER="off", RERANK_BACKEND="none")
+    return subprocess.Popen([sys.executable, "-m", "arxiv_mcp_server"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def _wait_until_healthy(client: httpx.AsyncClient) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+
+async def _check_shared_status(base_url: str) -> int:
+    """Read the seeded status over fresh connections; return how many answers were wrong."""
+    wrong = 0
+    for _ in range(STATUS_CHECKS):
+        # A new connection each time lets the kernel spread the checks over workers.
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            response = await client.post(
+                "/tools/download_paper", json={"paper_id": STATUS_PAPER_ID, "check_status": True}
+            )
+        if json.loads(response.json()[0]["text"])["status"] != "converting":
+            wrong += 1
+    return wrong
+
+
+async def _run_load(client: httpx.AsyncClient, body: dict, requests: int, concurrency: int) -> list:
+    """Send ``requests`` calls from ``concurrency`` clients; return the latencies."""
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.post("/tools/calculate_relevance_batch", json=body)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+async def _bench(workers: int, args) -> dict:
+    port = args.port + workers
+    base_url = f"http://{HOST}:{port}"
+    with tempfile.TemporaryDirectory() as storage_path:
+        state = SharedState(Path(storage_path) / SHARED_STATE_FILE_NAME)
+        state.start_conversion(STATUS_PAPER_ID, "downloading")
+        state.update_conversion(STATUS_PAPER_ID, "converting")
+
+        server = _start_server(workers, port, storage_path)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                await _wait_until_healthy(client)
+                wrong = await _check_shared_status(base_url)
+                body = {"query": "graph attention transformer", "papers": _papers(args.papers), "rerank": False}
+                await _run_load(client, body, args.concurrency, args.concurrency)  # warm-up
+                started = time.perf_counter()
+                latencies = await _run_load(client, body, args.requests, args.concurrency)
+                elapsed = time.perf_counter() - started
+        finally:
+            server.terminate()
+            server.wait()
+
+    return {
+        "workers": workers,
+        "throughput": args.requests / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+        "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+        "wrong_status": wrong,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--papers", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8100)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.papers} papers per request, concurrency {args.concurrency}")
+    print(f"{'workers':>8} {'req/s':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'bad status':>11}")
+    baseline = None
+    failed = False
+    for workers in args.workers:
+        result = asyncio.run(_bench(workers, args))
+        baseline = baseline or result["throughput"]
+        failed = failed or result["wrong_status"] > 0
+        print(f"{workers:>8} {result['throughput']:8.1f} {result['throughput'] / baseline:7.2f}x "
+              f"{result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['wrong_status']:>11}")
+
+    if failed:
+        print("FAIL: some workers did not see the shared download status")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,12 @@
 
 import sys
 import argparse
+import threading
+from functools import cached_property
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 import logging
-from typing import Optional
+from typing import Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -17,9 +19,30 @@ DEFAULT_BATCH_SIZE = 20
 DEFAULT_REQUEST_TIMEOUT = 60
 DEFAULT_HOST = "0.0.0.0"
 DEFAULT_PORT = 8000
+DEFAULT_WORKERS = 1
+DEFAULT_COMPRESSION_MIN_BYTES = 1024
+DEFAULT_PROFILE_INTERVAL_MS = 1.0
+DEFAULT_PROFILE_MAX_FILES = 100
+# Downloads convert PDFs in the request and can hold hundreds of MB each
+DEFAULT_TOOL_CONCURRENCY = {"download": 2, "search": 4, "calculate_relevance": 8, "calculate_relevance_batch": 4}
+DEFAULT_TOOL_QUEUE_SIZE = {"download": 8, "search": 16, "calculate_relevance": 32, "calculate_relevance_batch": 16}
 DEFAULT_API_URL = "http://localhost:8000"
 DEFAULT_STORAGE_PATH = "./data/papers"
 DEFAULT_PDF_CONVERSION_THREADS = 4
+DEFAULT_STORAGE_LAYOUT = "flat"
+DEFAULT_STORAGE_SHARD_BUCKETS = 256
+DEFAULT_PAPER_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_CHUNK_MAX_TOKENS = 512
+DEFAULT_EMBEDDING_MODEL = "hashing-384"
+DEFAULT_EMBEDDING_DTYPE = "float32"
+DEFAULT_RERANK_BACKEND = "none"
+DEFAULT_RERANK_TOP_K = 10
+DEFAULT_RERANK_LATENCY_BUDGET_MS = 2000
+DEFAULT_RERANK_TOKEN_BUDGET = 4000
+DEFAULT_RERANK_BATCH_SIZE = 5
+DEFAULT_RELEVANCE_CACHE_ENTRIES = 200_000
+DEFAULT_LIBRARY_WATCHER = "auto"
+DEFAULT_LIBRARY_POLL_INTERVAL = 5.0
 DEFAULT_ENV_FILE = ".env"
 DEFAULT_ENCODING = "utf-8"
 
@@ -34,15 +57,59 @@ class Settings(BaseSettings):
     REQUEST_TIMEOUT: int = DEFAULT_REQUEST_TIMEOUT
     HOST: str = DEFAULT_HOST
     PORT: int = DEFAULT_PORT
+    # Server processes; above one, shared state lives in SQLite under STORAGE_PATH
+    WORKERS: int = DEFAULT_WORKERS
+    # Responses smaller than this are sent uncompressed
+    COMPRESSION_MIN_BYTES: int = DEFAULT_COMPRESSION_MIN_BYTES
+    # Guards the /admin endpoints and X-Profile requests; empty disables both
+    ADMIN_TOKEN: str = ""
+
+    # Request profiling: share of /tools/* requests profiled (0 to 1), sampling interval, files kept
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_MS: float = DEFAULT_PROFILE_INTERVAL_MS
+    PROFILE_MAX_FILES: int = DEFAULT_PROFILE_MAX_FILES
+
+    # Admission control per worker: concurrent calls per tool and calls allowed to wait beyond
+    # that (JSON objects in the environment); unlisted tools are unlimited, full ones answer 429
+    TOOL_CONCURRENCY: Dict[str, int] = DEFAULT_TOOL_CONCURRENCY
+    TOOL_QUEUE_SIZE: Dict[str, int] = DEFAULT_TOOL_QUEUE_SIZE
 
     # API Configuration
     API_URL: str = DEFAULT_API_URL
-    OPENAI_API_KEY: str
+    OPENAI_API_KEY: str = ""
     DEBUG: bool = False
 
     # Storage Configuration
     STORAGE_PATH: str = DEFAULT_STORAGE_PATH
     PDF_CONVERSION_THREADS: int = DEFAULT_PDF_CONVERSION_THREADS
+    STORAGE_LAYOUT: str = DEFAULT_STORAGE_LAYOUT  # flat or sharded
+    STORAGE_SHARD_BUCKETS: int = DEFAULT_STORAGE_SHARD_BUCKETS
+
+    # Memory budget of the decoded paper content cache (0 disables it)
+    PAPER_CACHE_BYTES: int = DEFAULT_PAPER_CACHE_BYTES
+
+    # Upper bound on the size of the chunks produced for LLM context packing
+    CHUNK_MAX_TOKENS: int = DEFAULT_CHUNK_MAX_TOKENS
+
+    # Paper embeddings: hashing-<dim> (built in) or a sentence-transformers model
+    EMBEDDING_MODEL: str = DEFAULT_EMBEDDING_MODEL
+    EMBEDDING_DTYPE: str = DEFAULT_EMBEDDING_DTYPE  # float32 or float16
+
+    # Second relevance stage, applied to the best lexical matches only
+    RERANK_BACKEND: str = DEFAULT_RERANK_BACKEND  # none, stub, cross-encoder or llm
+    RERANK_MODEL: str = ""  # empty picks the backend's default model
+    RERANK_TOP_K: int = DEFAULT_RERANK_TOP_K
+    RERANK_LATENCY_BUDGET_MS: int = DEFAULT_RERANK_LATENCY_BUDGET_MS
+    RERANK_TOKEN_BUDGET: int = DEFAULT_RERANK_TOKEN_BUDGET
+    RERANK_BATCH_SIZE: int = DEFAULT_RERANK_BATCH_SIZE  # papers per concurrent reranker call
+    RERANK_COST_PER_1K_TOKENS: float = 0.0  # USD, for cost reporting
+
+    # Persistent (query, paper, scorer version) relevance score cache; 0 disables it
+    RELEVANCE_CACHE_ENTRIES: int = DEFAULT_RELEVANCE_CACHE_ENTRIES
+
+    # Library Index Configuration
+    LIBRARY_WATCHER: str = DEFAULT_LIBRARY_WATCHER  # auto, inotify, poll or off
+    LIBRARY_POLL_INTERVAL: float = DEFAULT_LIBRARY_POLL_INTERVAL
 
     model_config = SettingsConfigDict(
         env_file=DEFAULT_ENV_FILE,
@@ -67,8 +134,23 @@ class Settings(BaseSettings):
         path.mkdir(parents=True, exist_ok=True)
         return path
 
-    @property
+    @cached_property
     def storage_path(self) -> Path:
-        """Get the storage path, ensuring it exists."""
+        """Get the storage path, ensuring it exists; resolved once per settings object."""
         path = self._get_storage_path_from_args() or Path(self.STORAGE_PATH)
         return self._ensure_storage_directory(path)
+
+
+# Global settings instance
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+
+
+def get_settings() -> Settings:
+    """Get the settings, read from the environment and .env once per process."""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+    return _settings
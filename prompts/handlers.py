@@ -1,26 +1,69 @@
 """Handlers for prompt-related requests with paper analysis functionality."""
 
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 from mcp.types import Prompt, PromptMessage, TextContent, GetPromptResult
+from ..services.shared_state import get_shared_state
 from .prompts import PROMPTS
 from .deep_research_analysis_prompt import PAPER_ANALYSIS_PROMPT
 
+RESEARCH_CONTEXT_KEY = "research_context"
+
+
+def _new_context() -> Dict[str, Any]:
+    """Context of a research session that has not started yet."""
+    return {
+        "expertise_level": "intermediate",  # default
+        "explored_papers": {},  # paper_id -> basic metadata
+        "paper_analyses": {},  # paper_id -> analysis focus and summary
+    }
+
 
 # Legacy global research context - used as fallback when no session_id is provided
 class ResearchContext:
-    """Maintains context throughout a research session."""
+    """Maintains context throughout a research session.
+
+    The context lives in the server's shared state rather than in this
+    object, so every worker process sees the same session.
+    """
+
+    def __init__(self, key: str = RESEARCH_CONTEXT_KEY):
+        self.key = key
 
-    def __init__(self):
-        self.expertise_level = "intermediate"  # default
-        self.explored_papers = {}  # paper_id -> basic metadata
-        self.paper_analyses = {}  # paper_id -> analysis focus and summary
+    def _load(self) -> Dict[str, Any]:
+        return get_shared_state().get_document(self.key) or _new_context()
+
+    @property
+    def expertise_level(self) -> str:
+        return self._load()["expertise_level"]
+
+    @property
+    def explored_papers(self) -> Dict[str, Dict[str, str]]:
+        return self._load()["explored_papers"]
+
+    @property
+    def paper_analyses(self) -> Dict[str, Dict[str, str]]:
+        return self._load()["paper_analyses"]
 
     def update_from_arguments(self, args: Dict[str, str]) -> None:
         """Update context based on new arguments."""
-        if "expertise_level" in args:
-            self.expertise_level = args["expertise_level"]
-        if "paper_id" in args and args["paper_id"] not in self.explored_papers:
-            self.explored_papers[args["paper_id"]] = {"id": args["paper_id"]}
+        def update(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            context = context or _new_context()
+            if "expertise_level" in args:
+                context["expertise_level"] = args["expertise_level"]
+            if "paper_id" in args and args["paper_id"] not in context["explored_papers"]:
+                context["explored_papers"][args["paper_id"]] = {"id": args["paper_id"]}
+            return context
+
+        get_shared_state().update_document(self.key, update)
+
+    def record_analysis(self, paper_id: str, analysis: Dict[str, str]) -> None:
+        """Record the analysis of a paper."""
+        def update(context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            context = context or _new_context()
+            context["paper_analyses"][paper_id] = analysis
+            return context
+
+        get_shared_state().update_document(self.key, update)
 
 
 # Global research context for backward compatibility
@@ -81,15 +124,16 @@ async def get_prompt(
     previous_papers_context = ""
 
     # Use global context
-    if len(_research_context.explored_papers) > 1:
+    explored_papers = _research_context.explored_papers
+    if len(explored_papers) > 1:
         previous_ids = [
-            pid for pid in _research_context.explored_papers.keys() if pid != paper_id
+            pid for pid in explored_papers.keys() if pid != paper_id
         ]
         if previous_ids:
             previous_papers_context = f"\nI've previously analyzed papers: {', '.join(previous_ids)}. If relevant, note connections to these works."
 
     # Track this analysis in context (for global context only)
-    _research_context.paper_analyses[paper_id] = {"analysis": "complete"}
+    _research_context.record_analysis(paper_id, {"analysis": "complete"})
 
     return GetPromptResult(
         messages=[
@@ -1,14 +1,18 @@
 """Resource management and storage for arXiv papers."""
 
+import asyncio
 from pathlib import Path
 from typing import List
 import arxiv
-import pymupdf4llm
-import aiofiles
 import logging
 from pydantic import AnyUrl
 import mcp.types as types
-from ..config import Settings
+from ..config import get_settings
+from ..services.catalog import get_paper_catalog, metadata_from_result
+from ..services.conversion import convert_pdf, record_paper_metadata, store_converted_paper
+from ..services.library import get_library_index
+from ..services.paper_cache import get_paper_cache
+from ..storage import get_paper_path
 
 logger = logging.getLogger("arxiv-mcp-server")
 
@@ -23,14 +27,17 @@ class PaperManager:
 
     def __init__(self):
         """Initialize the paper management system."""
-        settings = Settings()
-        self.storage_path = Path(settings.STORAGE_PATH)
-        self.storage_path.mkdir(parents=True, exist_ok=True)
+        settings = get_settings()
+        self.storage_path = settings.storage_path
+        self.chunk_max_tokens = settings.CHUNK_MAX_TOKENS
         self.client = arxiv.Client()
+        self.library = get_library_index()
 
-    def _get_paper_path(self, paper_id: str, extension: str = MARKDOWN_EXTENSION) -> Path:
-        """Get the absolute file path for a paper with specified extension."""
-        return self.storage_path / f"{paper_id}{extension}"
+    def _get_paper_path(
+        self, paper_id: str, extension: str = MARKDOWN_EXTENSION, create: bool = False
+    ) -> Path:
+        """Get the file path for a paper with specified extension."""
+        return get_paper_path(paper_id, extension, create=create)
 
     def _get_paper_from_arxiv(self, paper_id: str) -> arxiv.Result:
         """Fetch paper metadata from arXiv."""
@@ -42,47 +49,35 @@ class PaperManager:
     async def _download_paper_pdf(self, paper: arxiv.Result, pdf_path: Path) -> None:
         """Download paper PDF to specified path."""
         try:
-            paper.download_pdf(dirpath=self.storage_path, filename=pdf_path)
+            await asyncio.to_thread(
+                paper.download_pdf, dirpath=str(pdf_path.parent), filename=pdf_path.name
+            )
         except arxiv.ArxivError as e:
             raise ValueError(f"Error: Failed to download paper {paper.entry_id} from arXiv. Details: {str(e)}")
 
-    async def _convert_pdf_to_markdown(self, pdf_path: Path) -> str:
-        """Convert PDF file to markdown format."""
-        try:
-            return pymupdf4llm.to_markdown(pdf_path, show_progress=False)
-        except Exception as e:
-            raise ValueError(f"Error: Failed to convert PDF to markdown. Details: {str(e)}")
-
-    async def _save_markdown_content(self, content: str, md_path: Path) -> None:
-        """Save markdown content to file."""
-        try:
-            async with aiofiles.open(md_path, "w", encoding=ENCODING) as f:
-                await f.write(content)
-        except Exception as e:
-            raise ValueError(f"Error: Failed to save markdown file. Details: {str(e)}")
-
     async def store_paper(self, paper_id: str, pdf_url: str) -> bool:
         """Download and store a paper from arXiv."""
-        paper_md_path = self._get_paper_path(paper_id, MARKDOWN_EXTENSION)
-
         # Return early if paper already exists
-        if paper_md_path.exists():
+        if paper_id in self.library:
             return True
 
         try:
-            paper_pdf_path = self._get_paper_path(paper_id, PDF_EXTENSION)
+            paper_pdf_path = self._get_paper_path(paper_id, PDF_EXTENSION, create=True)
 
             # Get paper metadata
-            paper = self._get_paper_from_arxiv(paper_id)
+            paper = await asyncio.to_thread(self._get_paper_from_arxiv, paper_id)
 
             # Download PDF
             await self._download_paper_pdf(paper, paper_pdf_path)
+            await asyncio.to_thread(get_paper_catalog().add_pdf, paper_id, paper_pdf_path)
 
-            # Convert to markdown
-            markdown = await self._convert_pdf_to_markdown(paper_pdf_path)
-
-            # Save markdown
-            await self._save_markdown_content(markdown, paper_md_path)
+            # Convert to markdown and store it with its indexes, as the download tool does
+            try:
+                page_texts = await convert_pdf(paper_pdf_path)
+            except Exception as e:
+                raise ValueError(f"Error: Failed to convert PDF to markdown. Details: {str(e)}")
+            await store_converted_paper(paper_id, page_texts, self.chunk_max_tokens)
+            await record_paper_metadata(paper_id, metadata_from_result(paper))
 
             return True
 
@@ -94,12 +89,11 @@ class PaperManager:
 
     async def has_paper(self, paper_id: str) -> bool:
         """Check if a paper is available in storage."""
-        return self._get_paper_path(paper_id).exists()
+        return paper_id in self.library
 
     async def list_papers(self) -> list[str]:
         """List all stored paper IDs."""
-        logger.info(f"Listing papers in {self.storage_path}")
-        paper_ids = [p.stem for p in self.storage_path.glob(f"*{MARKDOWN_EXTENSION}")]
+        paper_ids = self.library.list_ids()
         logger.info(f"Found {len(paper_ids)} papers")
         return paper_ids
 
@@ -139,5 +133,4 @@ class PaperManager:
         if not paper_path.exists():
             raise ValueError(f"Paper {paper_id} not found in storage")
 
-        async with aiofiles.open(paper_path, "r", encoding=ENCODING) as f:
-            return await f.read()
+        return await asyncio.to_thread(get_paper_cache().read, paper_path)
@@ -5,50 +5,159 @@ Arxiv Server
 This module implements the server for interacting with arXiv.
 """
 
+import asyncio
+import hmac
 import logging
-from fastapi import FastAPI, HTTPException
-from typing import Dict, Any, List
-from .config import Settings
+import os
+import time
+from contextlib import AsyncExitStack
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Any, Callable, List, NamedTuple, Optional, Type
+from . import IMPORT_STARTED
+from .config import get_settings
 from .types import Tool, TextContent, Resource
-from .tools import handle_search, handle_download, handle_list_papers, handle_read_paper
+from .tools import (
+    handle_search,
+    handle_download,
+    handle_list_papers,
+    handle_read_paper,
+    handle_get_paper_chunks,
+    handle_find_in_papers,
+    handle_semantic_search,
+)
+from .services.admission import AdmissionController, AdmissionRejected
+from .services.ann import get_ann_index
+from .services.catalog import backfill_catalog_metadata, get_paper_catalog
+from .services.compression import CompressionMiddleware
+from .services.file_serving import serve_file
+from .services.fulltext import backfill_fulltext_index, get_fulltext_index
+from .services.library import create_library_watcher
+from .services.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    METRICS_DIRECTORY,
+    SNAPSHOT_INTERVAL,
+    STARTUP_SECONDS,
+    MetricsMiddleware,
+    SnapshotExchange,
+    record_cache_stats,
+    registry as metrics_registry,
+)
+from .services.paper_cache import get_paper_cache
+from .services.profiling import PROFILES_DIRECTORY, ProfileStore, ProfilingMiddleware
+from .services.sections import SectionNotFoundError
+from .storage import InvalidPaperIdError, get_paper_path
+from .tools.models import (
+    DownloadRequest,
+    FindInPapersRequest,
+    ListPapersRequest,
+    PaperChunksRequest,
+    ReadPaperRequest,
+    RelevanceBatchRequest,
+    RelevanceRequest,
+    SearchRequest,
+    SemanticSearchRequest,
+)
+from .tools.read_paper import open_paper_stream
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Constants
 SERVER_TITLE = "arXiv Research Server"
 DEFAULT_RELEVANCE_SCORE = 0.5
+MAX_RELEVANCE_BATCH_SIZE = 1000
 LOGGER_NAME = "arxiv-server"
+MARKDOWN_EXTENSION = ".md"
+RAW_FORMAT_EXTENSIONS = {"markdown": MARKDOWN_EXTENSION, "pdf": ".pdf"}
+MARKDOWN_MEDIA_TYPE = "text/markdown; charset=utf-8"
+TOOLS_PATH_PREFIX = "/tools/"
+RELEVANCE_TOOL_NAMES = ("calculate_relevance", "calculate_relevance_batch")
+# Metric labels of the other routes; anything unmatched is "unknown", so labels stay bounded.
+ENDPOINT_LABELS = {"/": "root", "/health": "health", "/stats": "stats", "/metrics": "metrics"}
+UNKNOWN_ENDPOINT = "unknown"
+ADMIN_PATH_PREFIX = "/admin/"
+ADMIN_TOKEN_HEADER = "x-admin-token"
+SPEEDSCOPE_MEDIA_TYPE = "application/json"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by orjson when it is installed.
+
+    orjson serializes dataclasses such as TextContent natively, so endpoints
+    returning this class directly skip FastAPI's generic encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return super().render(jsonable_encoder(content))
+
+
+class AdmittedStreamingResponse(StreamingResponse):
+    """Streaming response that keeps its caller's admission slot until the body is sent.
+
+    Endpoints return before a streamed body is read, so the slot is handed
+    over in ``slot`` and released once sending ends, however it ends.
+    """
+
+    def __init__(self, content: Any, slot: AsyncExitStack, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self._slot = slot
 
-settings = Settings()
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            await self._slot.aclose()
+
+
+class ToolEndpoint(NamedTuple):
+    """A tool reachable through ``POST /tools/{name}``."""
+    model: Type[BaseModel]
+    handler: Callable
+    admission: Optional[str] = None  # admission limit it shares, if not its own
+
+
+settings = get_settings()
 logger = logging.getLogger(LOGGER_NAME)
 logger.setLevel(logging.INFO)
-app = FastAPI(title=SERVER_TITLE)
+app = FastAPI(title=SERVER_TITLE, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
 
 # Initialize relevance scorer
 relevance_scorer = None
+cascade_ranker = None
+library_watcher = None
+background_tasks = set()
+metrics_exchange = None
 
 
 def _initialize_relevance_scorer() -> None:
-    """Initialize the relevance scorer if OpenAI API key is available."""
-    global relevance_scorer
+    """Initialize the local relevance scorer and the ranking cascade built on it."""
+    global relevance_scorer, cascade_ranker
     try:
-        from .services.relevance import RelevanceScorer
-        if hasattr(settings, 'OPENAI_API_KEY') and settings.OPENAI_API_KEY:
-            relevance_scorer = RelevanceScorer(settings.OPENAI_API_KEY)
-            logger.info("Relevance scorer initialized successfully")
-        else:
-            logger.warning("OpenAI API key not found in settings")
+        from .services.relevance import get_cascade_ranker, get_relevance_scorer
+        relevance_scorer = get_relevance_scorer()
+        cascade_ranker = get_cascade_ranker()
+        logger.info("Relevance scorer initialized successfully")
     except ImportError as e:
         logger.warning(f"Could not import RelevanceScorer: {e}")
     except Exception as e:
         logger.error(f"Error initializing relevance scorer: {e}")
 
 
-def _validate_relevance_request(request: Dict[str, Any]) -> tuple[str, Dict[str, Any], str]:
+def _validate_relevance_request(request: RelevanceRequest) -> tuple[str, Dict[str, Any], str]:
     """Validate relevance calculation request and return query, paper_data, and error message."""
-    query = request.get("query", "")
-    paper_data = request.get("paper_data", {})
+    query = request.query
+    paper_data = request.paper_data
     
-    if not relevance_scorer:
-        return query, paper_data, "OpenAI API key not configured"
+    if not cascade_ranker:
+        return query, paper_data, "Relevance scorer not available"
     
     if not query or not paper_data:
         return query, paper_data, "Missing query or paper_data"
@@ -56,6 +165,28 @@ def _validate_relevance_request(request: Dict[str, Any]) -> tuple[str, Dict[str,
     return query, paper_data, None
 
 
+def _validate_relevance_batch_request(request: RelevanceBatchRequest) -> tuple[str, List[Dict[str, Any]], str]:
+    """Validate a batch relevance request and return query, papers, and error message."""
+    query = request.query
+    papers = request.papers
+
+    if not cascade_ranker:
+        return query, papers, "Relevance scorer not available"
+
+    if not query:
+        return query, papers, "Missing query or papers list"
+
+    if len(papers) > MAX_RELEVANCE_BATCH_SIZE:
+        return query, papers, f"At most {MAX_RELEVANCE_BATCH_SIZE} papers can be scored per request"
+
+    return query, papers, None
+
+
+def _request_deadline(deadline_ms: Optional[float]) -> Optional[float]:
+    """Absolute monotonic deadline of a request carrying ``deadline_ms``, if any."""
+    return time.monotonic() + deadline_ms / 1000 if deadline_ms else None
+
+
 def _create_relevance_response(status: str, score: float = DEFAULT_RELEVANCE_SCORE, 
                               message: str = None) -> Dict[str, Any]:
     """Create standardized relevance response."""
@@ -65,57 +196,281 @@ def _create_relevance_response(status: str, score: float = DEFAULT_RELEVANCE_SCO
     return response
 
 
-def _get_available_tools() -> Dict[str, Any]:
-    """Get dictionary of available tools."""
-    return {
-        "search": handle_search,
-        "download": handle_download,
-        "download_paper": handle_download,
-        "list_papers": handle_list_papers,
-        "read_paper": handle_read_paper,
-        "calculate_relevance": calculate_relevance
-    }
+# Tools served by handle_tool; the relevance tools have routes of their own.
+TOOL_ENDPOINTS: Dict[str, ToolEndpoint] = {
+    "search": ToolEndpoint(SearchRequest, handle_search),
+    "download": ToolEndpoint(DownloadRequest, handle_download),
+    "download_paper": ToolEndpoint(DownloadRequest, handle_download, "download"),
+    "list_papers": ToolEndpoint(ListPapersRequest, handle_list_papers),
+    "read_paper": ToolEndpoint(ReadPaperRequest, handle_read_paper),
+    "get_paper_chunks": ToolEndpoint(PaperChunksRequest, handle_get_paper_chunks),
+    "find_in_papers": ToolEndpoint(FindInPapersRequest, handle_find_in_papers),
+    "semantic_search": ToolEndpoint(SemanticSearchRequest, handle_semantic_search),
+}
+
+
+def _endpoint_label(path: str) -> str:
+    """Metric label of a request path: the tool name, or the route it hits."""
+    if path.startswith(TOOLS_PATH_PREFIX):
+        name = path[len(TOOLS_PATH_PREFIX):]
+        return name if name in TOOL_ENDPOINTS or name in RELEVANCE_TOOL_NAMES else UNKNOWN_ENDPOINT
+    if path.startswith("/papers/") and path.endswith("/raw"):
+        return "paper_raw"
+    if path.startswith(ADMIN_PATH_PREFIX):
+        return "admin"
+    return ENDPOINT_LABELS.get(path, UNKNOWN_ENDPOINT)
+
+
+def _collect_cache_stats() -> None:
+    """Mirror the caches' hit and miss counts into the metrics."""
+    record_cache_stats("paper", get_paper_cache().get_stats())
+    if cascade_ranker and cascade_ranker.cache:
+        record_cache_stats("relevance", cascade_ranker.cache.get_stats())
+
 
+async def _publish_metrics(exchange: SnapshotExchange) -> None:
+    """Share this worker's metrics with the others until shutdown."""
+    while True:
+        try:
+            await asyncio.to_thread(exchange.publish)
+        except OSError as e:
+            logger.warning(f"Could not publish metrics snapshot: {e}")
+        await asyncio.sleep(SNAPSHOT_INTERVAL)
+
+
+def _require_admin(request: Request) -> None:
+    """Reject requests without the admin token; without a configured token the endpoints do not exist."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = request.headers.get(ADMIN_TOKEN_HEADER, "")
+    if not hmac.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+admission = AdmissionController(settings.TOOL_CONCURRENCY, settings.TOOL_QUEUE_SIZE)
+profile_store = ProfileStore(settings.storage_path / PROFILES_DIRECTORY, settings.PROFILE_MAX_FILES)
+app.add_middleware(
+    ProfilingMiddleware,
+    store=profile_store,
+    endpoint_label=_endpoint_label,
+    token=settings.ADMIN_TOKEN,
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    interval=settings.PROFILE_INTERVAL_MS / 1000,
+)
+# Added last, so it is outermost and times compression and profiling too
+app.add_middleware(MetricsMiddleware, endpoint_label=_endpoint_label)
+metrics_registry.add_collector(_collect_cache_stats)
 
 # Initialize components
 _initialize_relevance_scorer()
 
 
+@app.on_event("startup")
+async def start_library_watcher():
+    """Load the library index, catalog, full-text and ANN indexes and keep them in sync with storage.
+
+    With several workers, each also starts sharing its metrics with the others.
+    """
+    global library_watcher, metrics_exchange
+    library_watcher = create_library_watcher()
+    library_watcher.start()
+    for task in (
+        asyncio.create_task(backfill_catalog_metadata(get_paper_catalog(), settings.BATCH_SIZE)),
+        asyncio.create_task(backfill_fulltext_index(get_fulltext_index())),
+        asyncio.create_task(asyncio.to_thread(get_ann_index)),
+    ):
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    if settings.WORKERS > 1:
+        metrics_exchange = SnapshotExchange(settings.storage_path / METRICS_DIRECTORY, metrics_registry)
+        task = asyncio.create_task(_publish_metrics(metrics_exchange))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+    STARTUP_SECONDS.set(time.perf_counter() - IMPORT_STARTED, str(os.getpid()))
+
+
+@app.on_event("shutdown")
+async def stop_library_watcher():
+    """Stop the library watcher and persist the index snapshot."""
+    if library_watcher:
+        library_watcher.stop()
+    if metrics_exchange:
+        metrics_exchange.withdraw()
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    """Answer calls to a tool at capacity with 429 and when to retry."""
+    return FastJSONResponse(
+        {"detail": str(exc)}, status_code=429, headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint providing server status."""
     return {"message": "arXiv Server is running"}
 
 
+@app.get("/papers/{paper_id:path}/raw")
+async def get_paper_raw(paper_id: str, request: Request, format: str = "markdown"):
+    """Serve a stored paper file directly, with ETag, Last-Modified and Range support.
+
+    Markdown is sent precompressed to clients that accept a content coding.
+    """
+    extension = RAW_FORMAT_EXTENSIONS.get(format)
+    if extension is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    try:
+        return await serve_file(
+            request, get_paper_path(paper_id, extension), precompressed=extension == MARKDOWN_EXTENSION
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Paper {paper_id} not found in storage")
+    except InvalidPaperIdError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.post("/tools/calculate_relevance")
-async def calculate_relevance(request: Dict[str, Any]):
-    """Calculate relevance score between query and paper."""
+async def calculate_relevance(request: RelevanceRequest):
+    """Calculate relevance score between query and paper.
+
+    The paper goes through the ranking cascade within the request's
+    ``deadline_ms``; if the reranker misses it, the lexical score is returned
+    with ``degraded`` set.
+    """
+    deadline = _request_deadline(request.deadline_ms)
+    async with admission.admit("calculate_relevance"):
+        try:
+            query, paper_data, error_message = _validate_relevance_request(request)
+
+            if error_message:
+                return _create_relevance_response("error", message=error_message)
+
+            ranking = await cascade_ranker.rank(query, [paper_data], deadline=deadline)
+            response = _create_relevance_response("success", score=ranking["scores"][0])
+            response["degraded"] = bool(ranking["degraded"])
+            return response
+
+        except Exception as e:
+            logger.error(f"Error calculating relevance: {e}")
+            return _create_relevance_response("error", message=str(e))
+
+
+async def _stream_paper(arguments: Dict[str, Any], slot: AsyncExitStack) -> StreamingResponse:
+    """Stream a paper's markdown in fixed-size chunks instead of one JSON body.
+
+    The response takes over the admission slot held by ``slot`` and frees it
+    once the body has been sent.
+    """
     try:
-        query, paper_data, error_message = _validate_relevance_request(request)
-        
-        if error_message:
-            return _create_relevance_response("error", message=error_message)
-        
-        score = await relevance_scorer.score_paper(query, paper_data)
-        return _create_relevance_response("success", score=score)
-        
-    except Exception as e:
-        logger.error(f"Error calculating relevance: {e}")
-        return _create_relevance_response("error", message=str(e))
+        chunks, metadata = await asyncio.to_thread(open_paper_stream, arguments)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Paper {arguments['paper_id']} not found in storage")
+    except (SectionNotFoundError, InvalidPaperIdError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    start, end = metadata["range"]
+    headers = {
+        "Content-Length": str(end - start),
+        "X-Paper-Id": metadata["paper_id"],
+        "X-Total-Bytes": str(metadata["total_bytes"]),
+        "X-Byte-Range": f"{start}-{end}",
+    }
+    # A sync iterator is drained in the threadpool, so file reads stay off the event loop
+    return AdmittedStreamingResponse(chunks, slot.pop_all(), media_type=MARKDOWN_MEDIA_TYPE, headers=headers)
+
+
+@app.post("/tools/calculate_relevance_batch")
+async def calculate_relevance_batch(request: RelevanceBatchRequest):
+    """Score a whole result set against one query in a single call.
+
+    Papers go through the ranking cascade: BM25 for all, then the configured
+    reranker for the best few unless ``rerank`` is false. The response adds
+    the ranked order and per-stage timings and cost to the scores, and lists
+    in ``degraded`` the papers that kept their lexical score because the
+    reranker missed ``deadline_ms``.
+    """
+    deadline = _request_deadline(request.deadline_ms)
+    async with admission.admit("calculate_relevance_batch"):
+        try:
+            query, papers, error_message = _validate_relevance_batch_request(request)
+
+            if error_message:
+                return {"status": "error", "scores": [], "message": error_message}
+
+            ranking = await cascade_ranker.rank(query, papers, rerank=request.rerank, deadline=deadline)
+            return FastJSONResponse({"status": "success", **ranking})
+
+        except Exception as e:
+            logger.error(f"Error calculating batch relevance: {e}")
+            return {"status": "error", "scores": [], "message": str(e)}
 
 
 @app.post("/tools/{tool_name}")
-async def handle_tool(tool_name: str, arguments: Dict[str, Any]):
-    """Handle tool calls."""
-    tools = _get_available_tools()
+async def handle_tool(tool_name: str, request: Request):
+    """Handle tool calls.
 
-    if tool_name not in tools:
+    The body is validated against the tool's request model straight from
+    JSON, and the handler's TextContent list is rendered without FastAPI's
+    generic encoder. Calls beyond the tool's concurrency limit wait for a
+    slot, or get 429 with Retry-After when its wait queue is full too.
+    """
+    endpoint = TOOL_ENDPOINTS.get(tool_name)
+    if endpoint is None:
         raise HTTPException(status_code=404, detail="Tool not found")
 
-    return await tools[tool_name](arguments)
+    try:
+        arguments = endpoint.model.model_validate_json(await request.body()).arguments()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+
+    async with AsyncExitStack() as slot:
+        await slot.enter_async_context(admission.admit(endpoint.admission or tool_name))
+        if tool_name == "read_paper" and arguments.get("stream"):
+            return await _stream_paper(arguments, slot)
+
+        return FastJSONResponse(await endpoint.handler(arguments))
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "message": "Server is running properly"}
+
+
+@app.get("/stats")
+async def get_stats():
+    """Report cache effectiveness, memory use and admission queues."""
+    stats = {"paper_cache": get_paper_cache().get_stats()}
+    if cascade_ranker and cascade_ranker.cache:
+        stats["relevance_cache"] = cascade_ranker.cache.get_stats()
+    stats["admission"] = admission.get_stats()
+    return stats
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Expose request, upstream, conversion and cache metrics in the Prometheus text format.
+
+    With several workers, the other workers' latest snapshots are added in.
+    """
+    others = await asyncio.to_thread(metrics_exchange.others) if metrics_exchange else ()
+    return PlainTextResponse(metrics_registry.render(others), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """List stored request profiles, newest first."""
+    _require_admin(request)
+    return {"profiles": await asyncio.to_thread(profile_store.list)}
+
+
+@app.get("/admin/profiles/{name}")
+async def get_profile(name: str, request: Request):
+    """Download a stored profile in speedscope's format."""
+    _require_admin(request)
+    try:
+        return await serve_file(request, profile_store.path(name), media_type=SPEEDSCOPE_MEDIA_TYPE)
+    except (ValueError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail=f"Profile {name} not found")
@@ -0,0 +1,109 @@
+"""Admission control for expensive tools.
+
+Each limited tool runs at most ``concurrency`` calls at once, and at most
+``queue_size`` more wait for a slot, first come first served. A call
+arriving when both are full is rejected at once with
+``AdmissionRejected``, which the server answers with 429 and a
+``Retry-After`` of the time the queue ahead of it should take to drain:
+slots free up at ``concurrency / mean call duration`` per second, the mean
+being a moving average of recent calls.
+
+Limits apply per worker process. Tools without a configured limit are
+admitted unconditionally.
+"""
+
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager, nullcontext
+from typing import AsyncIterator, Dict, Mapping
+
+from .metrics import ADMISSION_REJECTED, ADMISSION_WAITING
+
+# Constants
+DEFAULT_QUEUE_FACTOR = 4  # queue size of a tool with a concurrency limit but no queue size
+# Assumed call duration until the first call of a tool completes.
+INITIAL_CALL_SECONDS = 1.0
+# Weight of each completed call in the moving average of call durations.
+CALL_SECONDS_SMOOTHING = 0.2
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 120
+
+
+class AdmissionRejected(Exception):
+    """Raised when a tool's slots and wait queue are both full."""
+
+    def __init__(self, tool: str, retry_after: int):
+        super().__init__(f"Too many concurrent {tool} requests, retry in {retry_after} s")
+        self.tool = tool
+        self.retry_after = retry_after
+
+
+class AdmissionLimit:
+    """Concurrency limit and bounded wait queue of one tool."""
+
+    def __init__(self, tool: str, concurrency: int, queue_size: int):
+        self.tool = tool
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self._waiting = 0
+        self._call_seconds = INITIAL_CALL_SECONDS
+
+    def retry_after(self) -> int:
+        """Seconds until the calls waiting now, plus one more, should have started."""
+        drain_rate = self.concurrency / max(self._call_seconds, 1e-3)
+        seconds = math.ceil((self._waiting + 1) / drain_rate)
+        return min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER, seconds))
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """Hold a slot for the block, waiting in the queue if needed."""
+        if self._slots.locked() and self._waiting >= self.queue_size:
+            ADMISSION_REJECTED.inc(self.tool)
+            raise AdmissionRejected(self.tool, self.retry_after())
+
+        self._waiting += 1
+        ADMISSION_WAITING.inc(self.tool)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+            ADMISSION_WAITING.dec(self.tool)
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._slots.release()
+            elapsed = time.perf_counter() - started
+            self._call_seconds += CALL_SECONDS_SMOOTHING * (elapsed - self._call_seconds)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Report the limit, current queue and mean call duration."""
+        return {
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "waiting": self._waiting,
+            "mean_call_seconds": self._call_seconds,
+        }
+
+
+class AdmissionController:
+    """The admission limits of all tools, built from the per-tool settings."""
+
+    def __init__(self, concurrency: Mapping[str, int], queue_sizes: Mapping[str, int]):
+        self._limits = {
+            tool: AdmissionLimit(tool, limit, queue_sizes.get(tool, limit * DEFAULT_QUEUE_FACTOR))
+            for tool, limit in concurrency.items()
+            if limit > 0
+        }
+
+    def admit(self, tool: str):
+        """Async context manager admitting one call of ``tool``; raises AdmissionRejected when full."""
+        limit = self._limits.get(tool)
+        return limit.admit() if limit else nullcontext()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Report every limited tool's state."""
+        return {tool: limit.get_stats() for tool, limit in self._limits.items()}
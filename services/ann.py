@@ -0,0 +1,365 @@
+"""Approximate nearest-neighbor index over the paper embedding store.
+
+An inverted-file (IVF) index: spherical k-means splits the embedded papers
+into cells, and a query only scores the papers in the few cells whose
+centroids are closest to it. Cells hold row numbers into the embedding
+store's memory-mapped matrix rather than copies of the vectors, so the index
+costs four bytes per paper on disk and loads in milliseconds. Until the
+store holds MIN_TRAIN_SIZE papers every query is answered exactly.
+
+Worker processes sharing a store each keep their own copy of the index.
+Writes to its files hold a file lock: assignments are appended only where
+the file ends, so a row already persisted by another worker is not written
+twice, and a worker that finishes training after another one published a
+newer index loads that index instead of replacing it.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from ..utils import DEFAULT_ENCODING, ensure_directory_exists, file_lock
+from .embeddings import EmbeddingStore, get_embedding_store
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+# Constants
+INDEX_DIRECTORY = "ivf"
+META_FILE_NAME = "meta.json"
+LOCK_FILE_NAME = "index.lock"
+INDEX_VERSION = 1
+MIN_TRAIN_SIZE = 4096
+# Retrain once the store has grown this many times past the last training size.
+RETRAIN_GROWTH = 4
+# Cells per square root of the paper count.
+CELLS_PER_SQRT = 2
+TRAIN_SAMPLE_PER_CELL = 32
+KMEANS_ITERATIONS = 10
+ASSIGN_BATCH_SIZE = 8192
+DEFAULT_NPROBE = 16
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length, leaving zero rows alone."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+def assign_cells(matrix: np.ndarray, rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Cell of each given matrix row: the centroid with the highest cosine similarity."""
+    labels = np.empty(len(rows), dtype=np.int32)
+    for start in range(0, len(rows), ASSIGN_BATCH_SIZE):
+        batch = np.asarray(matrix[rows[start:start + ASSIGN_BATCH_SIZE]], dtype=np.float32)
+        labels[start:start + len(batch)] = np.argmax(batch @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(vectors: np.ndarray, n_cells: int, iterations: int = KMEANS_ITERATIONS,
+                    seed: int = 0) -> np.ndarray:
+    """Spherical k-means over unit vectors; returns unit-length centroids."""
+    rng = np.random.default_rng(seed)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), n_cells, replace=False)]
+    all_rows = np.arange(len(vectors))
+    for _ in range(iterations):
+        labels = assign_cells(vectors, all_rows, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=n_cells)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(vectors[order], starts, axis=0)
+        # Cells that lost every member restart from a random vector.
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def _build_cells(rows: np.ndarray, labels: np.ndarray, n_cells: int) -> List[np.ndarray]:
+    """Group rows by cell label."""
+    order = np.argsort(labels, kind="stable")
+    counts = np.bincount(labels, minlength=n_cells)
+    return np.split(rows[order], np.cumsum(counts)[:-1])
+
+
+class IVFIndex:
+    """Inverted-file index over the vectors of an embedding store."""
+
+    def __init__(self, store: EmbeddingStore):
+        """Load the index persisted next to ``store``, catching up on rows added since."""
+        self.store = store
+        self.directory = ensure_directory_exists(store.directory / INDEX_DIRECTORY)
+        self.lock_path = self.directory / LOCK_FILE_NAME
+        self._lock = threading.Lock()
+        self._train_lock = threading.Lock()
+        # Untrained, the index is a single cell scanned exactly.
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._cells: List[np.ndarray] = [np.empty(0, dtype=np.int64)]
+        self._covered = 0
+        self._generation = 0
+        self._trained_size = 0
+        # Rows other workers appended must be known before their assignments are read.
+        store.refresh()
+        with self._lock:
+            self._load()
+        self._maybe_train()
+
+    def _centroids_path(self, generation: int) -> Path:
+        return self.directory / f"centroids-{generation}.npy"
+
+    def _assignments_path(self, generation: int) -> Path:
+        return self.directory / f"assignments-{generation}.bin"
+
+    def _load(self) -> None:
+        """Read the persisted centroids and cell assignments, if they match the store."""
+        rows = self.store.current_rows()
+        try:
+            with open(self.directory / META_FILE_NAME, "r", encoding=DEFAULT_ENCODING) as f:
+                meta = json.load(f)
+            if meta["version"] != INDEX_VERSION or meta["dim"] != self.store.dim:
+                raise ValueError("index was built for another store")
+            generation = meta["generation"]
+            centroids = np.load(self._centroids_path(generation))
+            assignments = np.fromfile(self._assignments_path(generation), dtype=np.int32)
+            # More assignments than vectors means the store was rebuilt underneath us.
+            if len(assignments) > len(self.store.matrix):
+                raise ValueError("index is ahead of the store")
+        except (OSError, ValueError, KeyError) as e:
+            if rows.size:
+                logger.info(f"Rebuilding the ANN index of {self.store.directory}: {e}")
+            # Forget the stale index so a later load cannot mistake it for a current one.
+            (self.directory / META_FILE_NAME).unlink(missing_ok=True)
+            self._centroids = None
+            self._assignments = np.empty(0, dtype=np.int32)
+            self._generation = 0
+            self._cells = [rows]
+            self._covered = len(self.store.matrix)
+            return
+
+        self._centroids = centroids
+        self._assignments = assignments
+        self._generation = generation
+        self._trained_size = meta["trained_size"]
+        self._covered = len(assignments)
+        rows = rows[rows < self._covered]
+        self._cells = _build_cells(rows, assignments[rows], len(centroids))
+        self._cover_new_rows([])
+
+    def _cover_new_rows(self, replaced: List[int]) -> None:
+        """Insert store rows appended since the last call and drop superseded ones.
+
+        Must be called with the lock held.
+        """
+        matrix = self.store.matrix
+        new_rows = np.arange(self._covered, len(matrix))
+        if new_rows.size:
+            if self._centroids is None:
+                self._cells[0] = np.concatenate((self._cells[0], new_rows))
+            else:
+                labels = assign_cells(matrix, new_rows, self._centroids)
+                self._append_assignments(self._covered, labels)
+                self._assignments = np.concatenate((self._assignments, labels))
+                for cell in np.unique(labels):
+                    self._cells[cell] = np.concatenate((self._cells[cell], new_rows[labels == cell]))
+            self._covered = len(matrix)
+        for row in replaced:
+            cell = 0 if self._centroids is None else self._assignments[row]
+            if cell >= 0:
+                self._cells[cell] = self._cells[cell][self._cells[cell] != row]
+
+    def _append_assignments(self, first_row: int, labels: np.ndarray) -> None:
+        """Persist the cells of rows from ``first_row`` on, unless another worker already did."""
+        path = self._assignments_path(self._generation)
+        with file_lock(self.lock_path):
+            try:
+                written = path.stat().st_size // labels.itemsize
+            except FileNotFoundError:
+                # A newer generation replaced this one; it is loaded on restart.
+                return
+            if written == first_row:
+                with open(path, "ab") as f:
+                    f.write(labels.tobytes())
+
+    def _published_generation(self) -> int:
+        """Generation of the index persisted on disk, 0 if there is none."""
+        try:
+            with open(self.directory / META_FILE_NAME, "r", encoding=DEFAULT_ENCODING) as f:
+                return json.load(f)["generation"]
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def on_vectors_added(self, rows: List[int], replaced: List[int]) -> None:
+        """Embedding store listener inserting new vectors incrementally."""
+        with self._lock:
+            self._cover_new_rows(replaced)
+        self._maybe_train()
+
+    def _maybe_train(self) -> None:
+        """Train on first reaching MIN_TRAIN_SIZE papers and retrain as the store grows."""
+        size = len(self.store)
+        if size < max(MIN_TRAIN_SIZE, RETRAIN_GROWTH * self._trained_size):
+            return
+        # A single trainer at a time; other callers keep using the current index.
+        if self._train_lock.acquire(blocking=False):
+            try:
+                self.train()
+            finally:
+                self._train_lock.release()
+
+    def train(self) -> None:
+        """Cluster the store's current vectors and persist the new index.
+
+        Clustering runs without the lock, so searches and inserts continue on
+        the previous index; rows appended meanwhile are assigned at the swap.
+        """
+        matrix = self.store.matrix
+        rows = self.store.current_rows()
+        n_cells = max(1, min(len(rows), int(CELLS_PER_SQRT * math.sqrt(len(rows)))))
+        rng = np.random.default_rng(len(rows))
+        sample = rng.choice(rows, min(len(rows), n_cells * TRAIN_SAMPLE_PER_CELL), replace=False)
+        centroids = train_centroids(matrix[np.sort(sample)], n_cells)
+        assignments = np.full(len(matrix), -1, dtype=np.int32)
+        assignments[rows] = assign_cells(matrix, rows, centroids)
+
+        with self._lock:
+            generation = self._generation + 1
+            with file_lock(self.lock_path):
+                published = self._published_generation() == self._generation
+                if published:
+                    self._persist(generation, centroids, assignments, len(rows))
+            if published:
+                self._centroids = centroids
+                self._assignments = assignments
+                self._generation = generation
+                self._trained_size = len(rows)
+                self._cells = _build_cells(rows, assignments[rows], n_cells)
+                self._covered = len(matrix)
+                # Rows appended while clustering ran; superseded rows are skipped at query time.
+                self._cover_new_rows([])
+        if published:
+            logger.info(f"ANN index trained on {len(rows)} papers with {n_cells} cells")
+            return
+
+        # Another worker trained meanwhile: share its index rather than replace it,
+        # after taking in the rows it covers.
+        self.store.refresh()
+        with self._lock:
+            self._load()
+        logger.info(f"ANN index loaded generation {self._generation} trained by another worker")
+
+    def _persist(self, generation: int, centroids: np.ndarray, assignments: np.ndarray,
+                 trained_size: int) -> None:
+        """Write a newly trained index and delete the one it replaces.
+
+        Must be called with the file lock held.
+        """
+        with open(self._centroids_path(generation), "wb") as f:
+            np.save(f, centroids)
+        assignments.tofile(self._assignments_path(generation))
+        meta = {
+            "version": INDEX_VERSION,
+            "dim": self.store.dim,
+            "generation": generation,
+            "cells": len(centroids),
+            "trained_size": trained_size,
+        }
+        temp_path = self.directory / f"{META_FILE_NAME}.tmp"
+        with open(temp_path, "w", encoding=DEFAULT_ENCODING) as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self.directory / META_FILE_NAME)
+        self._centroids_path(self._generation).unlink(missing_ok=True)
+        self._assignments_path(self._generation).unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def trained(self) -> bool:
+        """Whether queries use the cell structure rather than an exact scan."""
+        return self._centroids is not None
+
+    @property
+    def cell_count(self) -> int:
+        """Number of cells queries choose from."""
+        return len(self._cells)
+
+    def search_vector(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        nprobe: int = DEFAULT_NPROBE,
+        accept: Optional[Callable[[str], bool]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return up to ``k`` (paper_id, cosine similarity) pairs, best first.
+
+        ``nprobe`` cells are scanned; passing the cell count makes the search
+        exact. ``accept`` filters candidates by paper id.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        self.store.refresh()
+        with self._lock:
+            matrix = self.store.matrix
+            if self._centroids is None or nprobe >= len(self._cells):
+                probed = self._cells
+            else:
+                closest = np.argpartition(-(self._centroids @ query), nprobe - 1)[:nprobe]
+                probed = [self._cells[cell] for cell in closest]
+            candidates = np.concatenate(probed)
+        if not candidates.size:
+            return []
+
+        scores = matrix[candidates] @ query
+        if accept is None and 2 * k < len(scores):
+            # Superseded rows may still sit in a cell; leave room to skip them.
+            top = np.argpartition(-scores, 2 * k)[:2 * k + 1]
+            results = self._collect(candidates, scores, top[np.argsort(-scores[top])], k, accept)
+            if len(results) == k:
+                return results
+        return self._collect(candidates, scores, np.argsort(-scores), k, accept)
+
+    def _collect(self, candidates: np.ndarray, scores: np.ndarray, order: np.ndarray, k: int,
+                 accept: Optional[Callable[[str], bool]]) -> List[Tuple[str, float]]:
+        """Walk candidates best first, keeping the first ``k`` current, accepted papers."""
+        results = []
+        for position in order:
+            row = int(candidates[position])
+            paper_id = self.store.id_at(row)
+            if self.store.row_of(paper_id) != row or (accept and not accept(paper_id)):
+                continue
+            results.append((paper_id, round(float(scores[position]), 4)))
+            if len(results) == k:
+                break
+        return results
+
+    def search(self, text: str, k: int = 10, nprobe: int = DEFAULT_NPROBE,
+               accept: Optional[Callable[[str], bool]] = None) -> List[Tuple[str, float]]:
+        """Embed ``text`` and return the ``k`` most similar papers."""
+        return self.search_vector(self.store.embedder.embed([text])[0], k, nprobe, accept)
+
+
+# Global ANN index instance
+_ann_index: Optional[IVFIndex] = None
+_ann_lock = threading.Lock()
+
+
+def get_ann_index() -> IVFIndex:
+    """Get or create the ANN index, kept current with the embedding store."""
+    global _ann_index
+    if _ann_index is None:
+        with _ann_lock:
+            if _ann_index is None:
+                store = get_embedding_store()
+                index = IVFIndex(store)
+                store.add_listener(index.on_vectors_added)
+                # Cover anything appended before the listener was registered.
+                index.on_vectors_added([], [])
+                _ann_index = index
+    return _ann_index
@@ -1,10 +1,10 @@
 # Placeholder for ArxivAPIService
 import asyncio
-from ..config import Settings # Assuming your Settings are in config.py at the parent level
+from ..config import get_settings # Assuming your Settings are in config.py at the parent level
 
 class ArxivAPIService:
     def __init__(self):
-        self.settings = Settings()
+        self.settings = get_settings()
         # Initialize your API client or other necessary components here
         # Example: self.arxiv_client = arxiv.Client()
         print("ArxivAPIService initialized")
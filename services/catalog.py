@@ -0,0 +1,374 @@
+"""Indexed catalog of paper metadata for listing the library.
+
+The catalog is a SQLite table mirroring the library index, enriched with the
+arXiv metadata captured at download time. Each paper records its conversion
+tier: ``pdf`` from the moment its PDF is downloaded, ``markdown`` once the
+converted file is in the library. Filters and sort keys are backed by
+SQL indexes and pagination uses keyset cursors, so listing a page costs the
+same no matter how large the library grows.
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from ..config import get_settings
+from ..storage import get_paper_path
+from ..utils import PDF_EXTENSION, connect_sqlite
+from .library import LibraryEntry, LibraryIndex, get_library_index
+from .metrics import track_upstream
+
+if TYPE_CHECKING:
+    import arxiv
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+# Constants
+CATALOG_FILE_NAME = ".catalog.sqlite3"
+TIER_PDF = "pdf"
+TIER_MARKDOWN = "markdown"
+TIERS = (TIER_PDF, TIER_MARKDOWN)
+SORT_KEYS = ("added_at", "published", "title", "paper_id")
+SORT_ORDERS = ("asc", "desc")
+LIST_FIELDS = (
+    "paper_id", "title", "summary", "authors", "categories",
+    "primary_category", "published", "pdf_url", "added_at", "tier", "size",
+)
+DEFAULT_LIST_FIELDS = ("paper_id", "title", "authors", "categories", "added_at", "tier")
+_JSON_FIELDS = ("authors", "categories")
+_VERSION_SUFFIX = re.compile(r"v\d+$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    summary TEXT NOT NULL DEFAULT '',
+    authors TEXT NOT NULL DEFAULT '[]',
+    categories TEXT NOT NULL DEFAULT '[]',
+    primary_category TEXT NOT NULL DEFAULT '',
+    published TEXT NOT NULL DEFAULT '',
+    pdf_url TEXT NOT NULL DEFAULT '',
+    added_at REAL NOT NULL,
+    tier TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS paper_authors (
+    author TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    PRIMARY KEY (author, paper_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS paper_categories (
+    category TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    PRIMARY KEY (category, paper_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS papers_added_at ON papers (added_at, paper_id);
+CREATE INDEX IF NOT EXISTS papers_published ON papers (published, paper_id);
+CREATE INDEX IF NOT EXISTS papers_title ON papers (title, paper_id);
+CREATE INDEX IF NOT EXISTS papers_tier ON papers (tier, added_at, paper_id);
+-- Row count kept by triggers, so reading the library size never scans the table.
+CREATE TABLE IF NOT EXISTS paper_count (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO paper_count (id, total) VALUES (0, (SELECT COUNT(*) FROM papers));
+CREATE TRIGGER IF NOT EXISTS papers_counted_insert AFTER INSERT ON papers BEGIN
+    UPDATE paper_count SET total = total + 1 WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS papers_counted_delete AFTER DELETE ON papers BEGIN
+    UPDATE paper_count SET total = total - 1 WHERE id = 0;
+END;
+"""
+
+
+class CatalogQueryError(ValueError):
+    """Raised for invalid list arguments such as a bad cursor or sort key."""
+
+
+def metadata_from_result(result: "arxiv.Result") -> Dict[str, Any]:
+    """Extract catalog metadata from an arXiv search result."""
+    return {
+        "title": result.title,
+        "summary": result.summary,
+        "authors": [author.name for author in result.authors],
+        "categories": list(result.categories),
+        "primary_category": result.primary_category,
+        "published": result.published.isoformat() if result.published else "",
+        "pdf_url": result.pdf_url or "",
+    }
+
+
+def _normalize_author(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _encode_cursor(sort: str, order: str, value: Any, paper_id: str) -> str:
+    payload = json.dumps([sort, order, value, paper_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, str]:
+    try:
+        cursor_sort, cursor_order, value, paper_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError):
+        raise CatalogQueryError("Invalid cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise CatalogQueryError("Cursor was issued for a different sort order")
+    return value, paper_id
+
+
+def _parse_date(value: Optional[str], name: str) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise CatalogQueryError(f"Invalid {name}: expected an ISO date such as 2024-01-31")
+
+
+class PaperCatalog:
+    """SQLite-backed metadata catalog of the papers in the library."""
+
+    def __init__(self, db_path: Path):
+        """Open (and create if needed) the catalog database."""
+        self.db_path = db_path
+        self._conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def upsert(self, paper_id: str, added_at: float, size: int = 0, tier: str = TIER_MARKDOWN) -> None:
+        """Insert a paper, or refresh its size and tier if already present."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO papers (paper_id, added_at, size, tier) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (paper_id) DO UPDATE SET size = excluded.size, tier = excluded.tier",
+                (paper_id, added_at, size, tier),
+            )
+
+    def add_pdf(self, paper_id: str, pdf_path: Path) -> None:
+        """Record a paper whose PDF is downloaded but not converted."""
+        stat = pdf_path.stat()
+        self.upsert(paper_id, stat.st_mtime, stat.st_size, TIER_PDF)
+
+    def _remove_markdown(self, paper_id: str) -> None:
+        """Fall back to the PDF tier when the PDF is still stored, else remove the paper."""
+        try:
+            self.add_pdf(paper_id, get_paper_path(paper_id, PDF_EXTENSION))
+        except (OSError, ValueError):
+            self.remove(paper_id)
+
+    def remove(self, paper_id: str) -> None:
+        """Remove a paper and its filter rows."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM papers WHERE paper_id = ?", (paper_id,))
+            self._conn.execute("DELETE FROM paper_authors WHERE paper_id = ?", (paper_id,))
+            self._conn.execute("DELETE FROM paper_categories WHERE paper_id = ?", (paper_id,))
+
+    def set_metadata(self, paper_id: str, metadata: Dict[str, Any]) -> None:
+        """Store arXiv metadata for a paper already in the catalog."""
+        authors = metadata.get("authors", [])
+        categories = metadata.get("categories", [])
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE papers SET title = ?, summary = ?, authors = ?, categories = ?, "
+                "primary_category = ?, published = ?, pdf_url = ? WHERE paper_id = ?",
+                (
+                    metadata.get("title", ""),
+                    metadata.get("summary", ""),
+                    json.dumps(authors),
+                    json.dumps(categories),
+                    metadata.get("primary_category", ""),
+                    metadata.get("published", ""),
+                    metadata.get("pdf_url", ""),
+                    paper_id,
+                ),
+            )
+            self._conn.execute("DELETE FROM paper_authors WHERE paper_id = ?", (paper_id,))
+            self._conn.execute("DELETE FROM paper_categories WHERE paper_id = ?", (paper_id,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO paper_authors (author, paper_id) VALUES (?, ?)",
+                [(_normalize_author(name), paper_id) for name in authors],
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO paper_categories (category, paper_id) VALUES (?, ?)",
+                [(category, paper_id) for category in categories],
+            )
+
+    def get(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """Get the catalog row for a paper with all fields."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM papers WHERE paper_id = ?", (paper_id,)).fetchone()
+        return self._project(row, LIST_FIELDS) if row else None
+
+    def sync(self, index: LibraryIndex) -> None:
+        """Bring the catalog in line with the library index."""
+        with self._lock:
+            known = dict(self._conn.execute("SELECT paper_id, tier FROM papers"))
+        current = set(index.list_ids())
+        for paper_id in current:
+            entry = index.get(paper_id)
+            if entry and known.get(paper_id) != TIER_MARKDOWN:
+                self.upsert(paper_id, entry.modified_at, entry.size)
+        for paper_id in set(known) - current:
+            self._remove_markdown(paper_id)
+
+    def on_library_change(self, paper_id: str, entry: Optional[LibraryEntry]) -> None:
+        """Library index listener keeping the catalog in sync."""
+        if entry is None:
+            self._remove_markdown(paper_id)
+        else:
+            self.upsert(paper_id, entry.modified_at, entry.size, TIER_MARKDOWN)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT total FROM paper_count WHERE id = 0").fetchone()[0]
+
+    def missing_metadata(self, limit: int, after: str = "") -> List[str]:
+        """Get IDs of papers whose arXiv metadata has not been fetched yet."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT paper_id FROM papers WHERE title = '' AND paper_id > ? "
+                "ORDER BY paper_id LIMIT ?",
+                (after, limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _project(row, fields: Iterable[str]) -> Dict[str, Any]:
+        """Build a response dict with only the requested fields."""
+        item = {}
+        for field in fields:
+            value = row[field]
+            item[field] = json.loads(value) if field in _JSON_FIELDS else value
+        return item
+
+    def query(
+        self,
+        *,
+        category: Optional[str] = None,
+        author: Optional[str] = None,
+        added_after: Optional[str] = None,
+        added_before: Optional[str] = None,
+        tier: Optional[str] = None,
+        sort: str = "added_at",
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        fields: Optional[List[str]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return one page of papers and the cursor of the next page."""
+        if sort not in SORT_KEYS:
+            raise CatalogQueryError(f"Invalid sort key: {sort}. Expected one of {', '.join(SORT_KEYS)}")
+        if order not in SORT_ORDERS:
+            raise CatalogQueryError("Invalid order: expected 'asc' or 'desc'")
+        if tier and tier not in TIERS:
+            raise CatalogQueryError(f"Invalid tier: {tier}. Expected one of {', '.join(TIERS)}")
+        fields = list(fields or DEFAULT_LIST_FIELDS)
+        unknown = [field for field in fields if field not in LIST_FIELDS]
+        if unknown:
+            raise CatalogQueryError(f"Unknown fields: {', '.join(unknown)}")
+
+        clauses, params = [], []
+        if category:
+            clauses.append("paper_id IN (SELECT paper_id FROM paper_categories WHERE category = ?)")
+            params.append(category)
+        if author:
+            clauses.append("paper_id IN (SELECT paper_id FROM paper_authors WHERE author = ?)")
+            params.append(_normalize_author(author))
+        after_ts = _parse_date(added_after, "added_after")
+        if after_ts is not None:
+            clauses.append("added_at >= ?")
+            params.append(after_ts)
+        before_ts = _parse_date(added_before, "added_before")
+        if before_ts is not None:
+            clauses.append("added_at < ?")
+            params.append(before_ts)
+        if tier:
+            clauses.append("tier = ?")
+            params.append(tier)
+        if cursor:
+            value, paper_id = _decode_cursor(cursor, sort, order)
+            comparison = "<" if order == "desc" else ">"
+            if sort == "paper_id":
+                clauses.append(f"paper_id {comparison} ?")
+                params.append(paper_id)
+            else:
+                clauses.append(f"({sort}, paper_id) {comparison} (?, ?)")
+                params.extend([value, paper_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            f"SELECT * FROM papers {where} "
+            f"ORDER BY {sort} {order.upper()}, paper_id {order.upper()} LIMIT ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, [*params, limit + 1]).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = _encode_cursor(sort, order, last[sort], last["paper_id"])
+        return [self._project(row, fields) for row in rows], next_cursor
+
+
+def _fetch_metadata(paper_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Fetch arXiv metadata for a batch of papers in one request."""
+    import arxiv  # loaded on first use, it is slow to import
+
+    client = arxiv.Client()
+    results = client.results(arxiv.Search(id_list=paper_ids, max_results=len(paper_ids)))
+    metadata = {}
+    with track_upstream("metadata"):
+        for result in results:
+            metadata[_VERSION_SUFFIX.sub("", result.get_short_id())] = metadata_from_result(result)
+    return metadata
+
+
+async def backfill_catalog_metadata(catalog: "PaperCatalog", batch_size: int) -> None:
+    """Fetch missing arXiv metadata for papers that predate the catalog."""
+    after = ""
+    while True:
+        paper_ids = catalog.missing_metadata(batch_size, after)
+        if not paper_ids:
+            return
+        after = paper_ids[-1]
+        try:
+            fetched = await asyncio.to_thread(_fetch_metadata, paper_ids)
+        except Exception as e:
+            logger.warning(f"Catalog metadata backfill failed: {e}")
+            return
+        for paper_id in paper_ids:
+            # Stored IDs may or may not carry a version suffix.
+            metadata = fetched.get(_VERSION_SUFFIX.sub("", paper_id))
+            if metadata:
+                catalog.set_metadata(paper_id, metadata)
+
+
+# Global catalog instance
+_paper_catalog: Optional[PaperCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_paper_catalog() -> PaperCatalog:
+    """Get or create the global catalog, synced with the library index."""
+    global _paper_catalog
+    if _paper_catalog is None:
+        with _catalog_lock:
+            if _paper_catalog is None:
+                started = time.perf_counter()
+                index = get_library_index()
+                catalog = PaperCatalog(get_settings().storage_path / CATALOG_FILE_NAME)
+                catalog.sync(index)
+                index.add_listener(catalog.on_library_change)
+                _paper_catalog = catalog
+                logger.info(f"Paper catalog ready in {time.perf_counter() - started:.2f}s")
+    return _paper_catalog
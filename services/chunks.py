@@ -0,0 +1,250 @@
+"""Pre-chunked, token-counted paper segments for LLM context packing.
+
+Conversion splits each paper into heading-aware chunks, counts their tokens
+once and stores the result as ``<paper_id>.chunks.jsonl`` next to the
+markdown. Each record holds a stable content-derived id, the section it
+belongs to, its byte span in the markdown and its token count; the text
+itself is read from the markdown by seeking to the span when served.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils import DEFAULT_ENCODING
+from .sections import get_or_build_section_index, normalize_section_title
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - optional dependency
+    tiktoken = None
+
+# Constants
+CHUNK_STORE_EXTENSION = ".chunks.jsonl"
+CHUNK_STORE_VERSION = 1
+TIKTOKEN_ENCODING = "cl100k_base"
+HEURISTIC_TOKENIZER = "heuristic"
+# BPE tokenizers split roughly 1.3 tokens per word-or-punctuation unit in English prose.
+HEURISTIC_TOKENS_PER_UNIT = 1.3
+
+_TOKEN_UNITS = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = re.compile(r"(?<=[.!?])(?=\s)")
+_encoder = None
+
+
+def tokenizer_name() -> str:
+    """Name of the tokenizer used for token counts."""
+    return TIKTOKEN_ENCODING if tiktoken is not None else HEURISTIC_TOKENIZER
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, else estimate them."""
+    global _encoder
+    if tiktoken is not None:
+        if _encoder is None:
+            _encoder = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+        return len(_encoder.encode(text, disallowed_special=()))
+    return int(len(_TOKEN_UNITS.findall(text)) * HEURISTIC_TOKENS_PER_UNIT + 0.5)
+
+
+def _split_blocks(markdown: str, heading_starts: set) -> List[Tuple[int, int, str]]:
+    """Split markdown into paragraph blocks as (start, end, text) byte spans.
+
+    Blank lines end a block, and every heading starts a new one.
+    """
+    blocks = []
+    block_start, block_lines = 0, []
+    offset = 0
+    for line in markdown.splitlines(keepends=True):
+        if offset in heading_starts and block_lines:
+            blocks.append((block_start, offset, "".join(block_lines)))
+            block_lines = []
+        if not block_lines:
+            block_start = offset
+        block_lines.append(line)
+        offset += len(line.encode(DEFAULT_ENCODING))
+        if not line.strip():
+            blocks.append((block_start, offset, "".join(block_lines)))
+            block_lines = []
+    if block_lines:
+        blocks.append((block_start, offset, "".join(block_lines)))
+    return blocks
+
+
+def _split_oversized(block: Tuple[int, int, str], max_tokens: int) -> List[Tuple[int, int, str, int]]:
+    """Split a block larger than the chunk size at line, then sentence, boundaries."""
+    start, _, text = block
+    units = []
+    for line in text.splitlines(keepends=True):
+        units.extend(_SENTENCE_END.split(line) if count_tokens(line) > max_tokens else [line])
+
+    pieces, lines, tokens = [], [], 0
+    piece_start = offset = start
+    for line in units:
+        line_tokens = count_tokens(line)
+        if lines and tokens + line_tokens > max_tokens:
+            pieces.append((piece_start, offset, "".join(lines), tokens))
+            lines, tokens, piece_start = [], 0, offset
+        lines.append(line)
+        tokens += line_tokens
+        offset += len(line.encode(DEFAULT_ENCODING))
+    if lines:
+        pieces.append((piece_start, offset, "".join(lines), tokens))
+    return pieces
+
+
+def _section_at(sections: List[Dict[str, Any]], offset: int) -> Optional[str]:
+    """Title of the innermost section containing a byte offset."""
+    title = None
+    for section in sections:
+        if section["start"] > offset:
+            break
+        if offset < section["end"]:
+            title = section["title"]
+    return title
+
+
+def build_chunks(
+    paper_id: str, markdown: str, section_index: Dict[str, Any], max_tokens: int
+) -> List[Dict[str, Any]]:
+    """Pack a paper's paragraphs into heading-aware chunks of at most ``max_tokens``.
+
+    Chunks never span a section boundary. A single paragraph larger than
+    ``max_tokens`` is split at line or sentence boundaries. Ids are derived
+    from the chunk text, so they survive re-conversion of unchanged content.
+    """
+    sections = section_index["sections"]
+    heading_starts = {section["start"] for section in sections}
+
+    pieces: List[Tuple[int, int, str, int]] = []
+    for block in _split_blocks(markdown, heading_starts):
+        tokens = count_tokens(block[2])
+        if tokens > max_tokens:
+            pieces.extend(_split_oversized(block, max_tokens))
+        else:
+            pieces.append((*block, tokens))
+
+    chunks: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for start, end, text, tokens in pieces:
+        section = _section_at(sections, start)
+        starts_section = start in heading_starts
+        if current and (starts_section or current["tokens"] + tokens > max_tokens
+                        or current["section"] != section):
+            chunks.append(current)
+            current = None
+        if current is None:
+            current = {"section": section, "start": start, "end": end, "tokens": 0, "_text": []}
+        current["end"] = end
+        current["tokens"] += tokens
+        current["_text"].append(text)
+    if current:
+        chunks.append(current)
+
+    chunks = [chunk for chunk in chunks if chunk["tokens"] > 0]
+    seen: Dict[str, int] = {}
+    for ordinal, chunk in enumerate(chunks):
+        text = "".join(chunk.pop("_text"))
+        digest = hashlib.sha1(text.encode(DEFAULT_ENCODING)).hexdigest()[:12]
+        # Repeated text (boilerplate, headers) gets an occurrence suffix
+        seen[digest] = seen.get(digest, 0) + 1
+        suffix = f"-{seen[digest]}" if seen[digest] > 1 else ""
+        chunk["id"] = f"{paper_id}#{digest}{suffix}"
+        chunk["ordinal"] = ordinal
+    return chunks
+
+
+def write_chunk_store(
+    chunks: List[Dict[str, Any]], total_bytes: int, store_path: Path
+) -> None:
+    """Atomically write a chunk store: a header line, then one chunk per line."""
+    tmp_path = store_path.with_name(store_path.name + ".tmp")
+    header = {
+        "version": CHUNK_STORE_VERSION,
+        "tokenizer": tokenizer_name(),
+        "total_bytes": total_bytes,
+        "total_tokens": sum(chunk["tokens"] for chunk in chunks),
+    }
+    with open(tmp_path, "w", encoding=DEFAULT_ENCODING) as f:
+        f.write(json.dumps(header, separators=(",", ":")) + "\n")
+        for chunk in chunks:
+            f.write(json.dumps(chunk, separators=(",", ":")) + "\n")
+    os.replace(tmp_path, store_path)
+
+
+def load_chunk_store(
+    store_path: Path, markdown_path: Path
+) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """Load (header, chunks), or None if missing or stale for the markdown file."""
+    try:
+        with open(store_path, "r", encoding=DEFAULT_ENCODING) as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CHUNK_STORE_VERSION:
+                return None
+            if header.get("tokenizer") != tokenizer_name():
+                return None
+            if header.get("total_bytes") != markdown_path.stat().st_size:
+                return None
+            chunks = [json.loads(line) for line in f if line.strip()]
+        return header, chunks
+    except (OSError, ValueError):
+        return None
+
+
+def get_or_build_chunk_store(
+    paper_id: str, store_path: Path, markdown_path: Path, index_path: Path, max_tokens: int
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Load the chunk store, rebuilding it from the markdown if needed.
+
+    Papers converted before chunk stores existed are chunked on first use.
+    """
+    store = load_chunk_store(store_path, markdown_path)
+    if store is None:
+        section_index = get_or_build_section_index(index_path, markdown_path)
+        with open(markdown_path, "r", encoding=DEFAULT_ENCODING, newline="") as f:
+            chunks = build_chunks(paper_id, f.read(), section_index, max_tokens)
+        try:
+            write_chunk_store(chunks, section_index["total_bytes"], store_path)
+        except OSError:
+            pass
+        store = (
+            {"tokenizer": tokenizer_name(), "total_tokens": sum(c["tokens"] for c in chunks)},
+            chunks,
+        )
+    return store
+
+
+def select_chunks(
+    chunks: List[Dict[str, Any]],
+    token_budget: int,
+    section: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Select chunks in document order until the token budget is used.
+
+    ``after`` continues after the chunk with that id. Returns the chosen
+    chunks and how many matching chunks were left out.
+    """
+    candidates = chunks
+    if after:
+        position = next((i for i, chunk in enumerate(chunks) if chunk["id"] == after), None)
+        if position is None:
+            raise ValueError(f"Unknown chunk id: {after}")
+        candidates = chunks[position + 1:]
+    if section:
+        wanted = normalize_section_title(section)
+        candidates = [
+            chunk for chunk in candidates
+            if chunk["section"] and wanted in normalize_section_title(chunk["section"])
+        ]
+
+    selected, used = [], 0
+    for chunk in candidates:
+        if used + chunk["tokens"] > token_budget:
+            break
+        selected.append(chunk)
+        used += chunk["tokens"]
+    return selected, len(candidates) - len(selected)
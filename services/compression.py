@@ -0,0 +1,249 @@
+"""Negotiated response compression and precompressed paper files.
+
+``CompressionMiddleware`` compresses responses with the best content coding
+the client accepts: brotli and zstd when their optional packages are
+installed, gzip always. Small responses, already encoded ones and types
+that do not compress (PDFs) are left alone. Streamed responses are
+compressed chunk by chunk, flushed after each, so readers still receive
+data as it is produced.
+
+Stored markdown does not need compressing per request:
+``ensure_precompressed`` keeps a ``<paper>.md.<ext>`` copy per coding,
+compressed once at the highest level and rebuilt when the markdown
+changes, which the file endpoint serves as is.
+"""
+
+import asyncio
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, NamedTuple, Optional, Sequence
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Constants
+DEFAULT_MINIMUM_SIZE = 1024
+# Bodies larger than this are compressed off the event loop.
+THREAD_THRESHOLD = 64 * 1024
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+NOT_COMPRESSIBLE_STATUSES = (204, 206, 304)
+# Suffixes of every precompressed variant a stored markdown file may have.
+PRECOMPRESSED_EXTENSIONS = [".md.gz", ".md.br", ".md.zst"]
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+
+class ContentCoding(NamedTuple):
+    """A content coding the server can produce."""
+    name: str
+    extension: str
+    compressor: Callable[[int], Any]
+    dynamic_level: int  # per-response compression, where speed matters
+    static_level: int  # precompressed files, compressed once
+
+
+_CODINGS = [
+    ContentCoding("br", ".br", _BrotliCompressor, 4, 11) if brotli else None,
+    ContentCoding("zstd", ".zst", _ZstdCompressor, 3, 19) if zstandard else None,
+    ContentCoding("gzip", ".gz", _GzipCompressor, 6, 9),
+]
+# Available codings by name, in order of preference.
+CODINGS: Dict[str, ContentCoding] = {coding.name: coding for coding in _CODINGS if coding}
+
+
+def negotiate_encoding(accept_encoding: Optional[str], offered: Sequence[str] = tuple(CODINGS)) -> Optional[str]:
+    """Pick the coding among ``offered`` the client weighs highest, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, parameters = part.partition(";")
+        weight = 1.0
+        for parameter in parameters.split(";"):
+            key, _, value = parameter.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for coding in offered:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a whole body, at the coding's per-response level unless ``level`` is given."""
+    coding = CODINGS[encoding]
+    return coding.compressor(coding.dynamic_level if level is None else level).compress(data, True)
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """Whether a media type is text-like enough to be worth compressing."""
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.split(";")[0].endswith("+json")
+
+
+def precompressed_path(path: Path, encoding: str) -> Path:
+    """Location of a file's precompressed variant for ``encoding``."""
+    return path.with_name(path.name + CODINGS[encoding].extension)
+
+
+def ensure_precompressed(path: Path, encoding: str, source_stat: Optional[os.stat_result] = None) -> os.stat_result:
+    """Return the stat of ``path``'s variant for ``encoding``, writing it if missing or stale."""
+    source_stat = source_stat or os.stat(path)
+    variant = precompressed_path(path, encoding)
+    try:
+        variant_stat = os.stat(variant)
+        if variant_stat.st_mtime_ns >= source_stat.st_mtime_ns:
+            return variant_stat
+    except FileNotFoundError:
+        pass
+    with open(path, "rb") as f:
+        data = compress(f.read(), encoding, CODINGS[encoding].static_level)
+    # Concurrent writers each use their own temporary file; the last rename wins.
+    temp_path = variant.with_name(f"{variant.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, variant)
+    return os.stat(variant)
+
+
+def precompress_file(path: Path) -> None:
+    """Write ``path``'s variant for every available coding."""
+    source_stat = os.stat(path)
+    for encoding in CODINGS:
+        ensure_precompressed(path, encoding, source_stat)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the best coding the client accepts."""
+
+    def __init__(self, app, minimum_size: int = DEFAULT_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSender(send, encoding, self.minimum_size))
+
+
+class _CompressingSender:
+    """Wraps ``send`` for one response, deciding on compression at its first body message."""
+
+    def __init__(self, send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message = None
+        self.compressor = None
+        self.decided = False
+
+    async def __call__(self, message) -> None:
+        if message["type"] == "http.response.start":
+            # Held back until the first body message shows whether to compress.
+            self.start_message = message
+            return
+        if not self.decided:
+            self.decided = True
+            if self._should_compress(message):
+                await self._send_compressed_first(message)
+                return
+            await self.send(self.start_message)
+        elif self.compressor is not None and message["type"] == "http.response.body":
+            more_body = message.get("more_body", False)
+            body = await self._compress(message.get("body", b""), not more_body)
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+        await self.send(message)
+
+    def _should_compress(self, message) -> bool:
+        headers = Headers(raw=self.start_message["headers"])
+        if (
+            self.start_message["status"] in NOT_COMPRESSIBLE_STATUSES
+            or "content-encoding" in headers
+            or not is_compressible(headers.get("content-type"))
+        ):
+            return False
+        if "content-length" in headers:
+            size = int(headers["content-length"])
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            size = len(message.get("body", b""))
+        else:
+            # A stream of unknown length is assumed to be worth it.
+            return True
+        return size >= self.minimum_size
+
+    async def _send_compressed_first(self, message) -> None:
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        del headers["Content-Length"]
+        coding = CODINGS[self.encoding]
+        self.compressor = coding.compressor(coding.dynamic_level)
+
+        if message["type"] == "http.response.pathsend":
+            # The file would have been sent by the server; compress it here instead.
+            data = await asyncio.to_thread(Path(message["path"]).read_bytes)
+            message = {"type": "http.response.body", "body": data, "more_body": False}
+        more_body = message.get("more_body", False)
+        body = await self._compress(message.get("body", b""), not more_body)
+        if not more_body:
+            headers["Content-Length"] = str(len(body))
+        await self.send(self.start_message)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) > THREAD_THRESHOLD:
+            return await asyncio.to_thread(self.compressor.compress, data, final)
+        return self.compressor.compress(data, final)
@@ -0,0 +1,99 @@
+"""Steps shared by every path that turns a downloaded PDF into a library paper.
+
+The download tool and ``PaperManager.store_paper`` both convert a PDF and
+then derive the same files and index entries from the markdown: section
+index, chunk store, the markdown itself with its precompressed copies, the
+full-text index and the library entry, followed by the catalog metadata and
+the embedding. Keeping the steps here means the two paths cannot drift
+apart. CPU- and disk-bound steps run in threads so the event loop keeps
+serving other requests during a conversion.
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from ..storage import get_paper_path
+from ..utils import DEFAULT_ENCODING, MARKDOWN_EXTENSION, strip_version
+from .catalog import get_paper_catalog
+from .chunks import CHUNK_STORE_EXTENSION, build_chunks, write_chunk_store
+from .compression import precompress_file
+from .embeddings import get_embedding_store, paper_text
+from .fulltext import get_fulltext_index
+from .library import get_library_index
+from .metrics import CONVERSION_SECONDS_PER_PAGE
+from .paper_cache import get_paper_cache
+from .sections import SECTION_INDEX_EXTENSION, build_section_index, write_section_index
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+
+def _convert_pdf_pages(pdf_path: Path) -> List[str]:
+    """Convert a PDF to markdown, one string per page."""
+    # Deferred to the first conversion: importing pymupdf4llm takes most of a second
+    import pymupdf4llm
+
+    pages = pymupdf4llm.to_markdown(str(pdf_path), page_chunks=True, show_progress=False)
+    return [page["text"] for page in pages]
+
+
+async def convert_pdf(pdf_path: Path) -> List[str]:
+    """Convert a PDF to markdown pages in a thread, recording the time per page."""
+    started = time.perf_counter()
+    page_texts = await asyncio.to_thread(_convert_pdf_pages, pdf_path)
+    if page_texts:
+        CONVERSION_SECONDS_PER_PAGE.observe((time.perf_counter() - started) / len(page_texts))
+    return page_texts
+
+
+async def _write_markdown_file(content: str, file_path: Path) -> None:
+    """Write markdown content to file."""
+    import aiofiles
+
+    # newline="" keeps byte offsets identical to the section index on every platform.
+    async with aiofiles.open(file_path, "w", encoding=DEFAULT_ENCODING, newline="") as f:
+        await f.write(content)
+
+
+async def store_converted_paper(paper_id: str, page_texts: List[str], chunk_max_tokens: int) -> Path:
+    """Store a converted paper and everything derived from it; return the markdown path.
+
+    The paper joins the library last, once every file and index a reader
+    may look for exists.
+    """
+    markdown = "".join(page_texts)
+
+    # Record page and section offsets so readers can seek to what they need
+    section_index = build_section_index(page_texts)
+    index_path = get_paper_path(paper_id, SECTION_INDEX_EXTENSION, create=True)
+    await asyncio.to_thread(write_section_index, section_index, index_path)
+
+    # Chunk and count tokens once so context packing never has to
+    chunks = await asyncio.to_thread(build_chunks, paper_id, markdown, section_index, chunk_max_tokens)
+    store_path = get_paper_path(paper_id, CHUNK_STORE_EXTENSION, create=True)
+    await asyncio.to_thread(write_chunk_store, chunks, section_index["total_bytes"], store_path)
+
+    md_path = get_paper_path(paper_id, MARKDOWN_EXTENSION, create=True)
+    await _write_markdown_file(markdown, md_path)
+    get_paper_cache().invalidate(md_path)
+    # Compressed once here, so the raw endpoint never compresses per request
+    try:
+        await asyncio.to_thread(precompress_file, md_path)
+    except OSError as e:
+        logger.warning(f"Could not precompress {paper_id}: {e}")
+    await asyncio.to_thread(get_fulltext_index().index_paper, paper_id, markdown, section_index)
+    await asyncio.to_thread(get_library_index().add, paper_id, md_path)
+    return md_path
+
+
+async def record_paper_metadata(paper_id: str, metadata: Dict[str, Any]) -> None:
+    """Store a paper's arXiv metadata in the catalog and embed it if not embedded yet."""
+    await asyncio.to_thread(get_paper_catalog().set_metadata, paper_id, metadata)
+    try:
+        await asyncio.to_thread(
+            get_embedding_store().ensure, {strip_version(paper_id): paper_text(metadata)}
+        )
+    except Exception as e:
+        logger.warning(f"Could not store embedding for {paper_id}: {e}")
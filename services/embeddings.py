@@ -0,0 +1,360 @@
+"""Persistent store of paper embeddings backed by a memory-mapped matrix.
+
+Vectors live under ``STORAGE_PATH/embeddings/<model>/`` as a raw, append-only
+float32 (or float16) matrix with one row per paper, next to an append-only
+list of paper ids giving each row's owner. On load the matrix is mapped with
+``np.memmap`` rather than read, so restarts cost no RAM up front and scorers
+read rows straight from the page cache. Each embedding model gets its own
+directory, so switching models never mixes incompatible vectors.
+
+Several server workers may share a store. Appends hold an exclusive file
+lock, and each process picks up rows the others appended by reading the id
+list past the point it has seen, before its own appends and on ``refresh``.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..config import get_settings
+from ..utils import DEFAULT_ENCODING, ensure_directory_exists, file_lock
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+# Constants
+EMBEDDINGS_DIRECTORY = "embeddings"
+VECTORS_FILE_NAME = "vectors.bin"
+IDS_FILE_NAME = "ids.txt"
+META_FILE_NAME = "meta.json"
+LOCK_FILE_NAME = "store.lock"
+STORE_VERSION = 1
+SUPPORTED_DTYPES = ("float32", "float16")
+HASHING_MODEL_PREFIX = "hashing-"
+EMBED_BATCH_SIZE = 64
+
+_WORD = re.compile(r"[a-z0-9]+")
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9._-]+")
+
+# Called with (new rows, rows they superseded) after every append.
+EmbeddingListener = Callable[[List[int], List[int]], None]
+
+
+def _ngrams(words: List[str]) -> Iterable[str]:
+    """Yield the unigrams and bigrams of a word sequence."""
+    yield from words
+    for first, second in zip(words, words[1:]):
+        yield f"{first} {second}"
+
+
+class HashingEmbedder:
+    """Local embedder hashing word unigrams and bigrams into a fixed-size vector.
+
+    Needs no model download or network access. Hashes use CRC32, which is
+    stable across processes, so stored vectors stay valid after a restart.
+    """
+
+    def __init__(self, dim: int):
+        """Create an embedder producing ``dim``-dimensional unit vectors."""
+        self.dim = dim
+        self.name = f"{HASHING_MODEL_PREFIX}{dim}"
+
+    def _features(self, text: str) -> List[int]:
+        words = _WORD.findall(text.lower())
+        return [zlib.crc32(ngram.encode()) for ngram in _ngrams(words)]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts as rows of an L2-normalized float32 matrix."""
+        rows, columns, signs = [], [], []
+        for row, text in enumerate(texts):
+            hashes = np.asarray(self._features(text), dtype=np.uint32)
+            rows.append(np.full(hashes.size, row))
+            columns.append(hashes % self.dim)
+            # A second hash bit picks the sign so collisions tend to cancel out.
+            signs.append(np.where(hashes & 0x80000000, -1.0, 1.0))
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.concatenate(rows), np.concatenate(columns)), np.concatenate(signs))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class SentenceTransformerEmbedder:
+    """Embedder running a sentence-transformers model locally."""
+
+    def __init__(self, model: str):
+        """Load ``model``; requires the optional sentence-transformers package."""
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError(f"Embedding model {model} requires the sentence-transformers package")
+        self.name = model
+        self._model = SentenceTransformer(model)
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed a batch of texts as rows of an L2-normalized float32 matrix."""
+        return self._model.encode(
+            list(texts), normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+def create_embedder(model: str):
+    """Create the embedder for a model name.
+
+    ``hashing-<dim>`` is built in; any other name is a sentence-transformers model.
+    """
+    if model.startswith(HASHING_MODEL_PREFIX):
+        return HashingEmbedder(int(model[len(HASHING_MODEL_PREFIX):]))
+    return SentenceTransformerEmbedder(model)
+
+
+def paper_text(paper_data: Dict[str, Any]) -> str:
+    """Text embedded for a paper: its title and abstract."""
+    title = paper_data.get("title") or ""
+    abstract = paper_data.get("abstract") or paper_data.get("summary") or ""
+    return f"{title}\n{abstract}"
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped matrix of paper embeddings for one model."""
+
+    def __init__(self, root: Path, embedder, dtype: str = "float32"):
+        """Open (and create if needed) the store of ``embedder``'s vectors under ``root``."""
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self.dtype = np.dtype(dtype)
+        self.directory = ensure_directory_exists(root / _UNSAFE_NAME.sub("_", embedder.name))
+        self.vectors_path = self.directory / VECTORS_FILE_NAME
+        self.ids_path = self.directory / IDS_FILE_NAME
+        self.lock_path = self.directory / LOCK_FILE_NAME
+        self._row_bytes = self.dim * self.dtype.itemsize
+        self._lock = threading.Lock()
+        self._ids: List[str] = []
+        # Bytes of the id list read so far; anything beyond was appended by another process.
+        self._ids_bytes = 0
+        self._rows: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._listeners: List[EmbeddingListener] = []
+        with file_lock(self.lock_path):
+            self._check_meta()
+            self._load()
+
+    def _check_meta(self) -> None:
+        """Write the store's metadata, or start over if it belongs to another configuration."""
+        meta = {"version": STORE_VERSION, "model": self.embedder.name, "dim": self.dim, "dtype": self.dtype.name}
+        meta_path = self.directory / META_FILE_NAME
+        try:
+            with open(meta_path, "r", encoding=DEFAULT_ENCODING) as f:
+                if json.load(f) == meta:
+                    return
+            logger.warning(f"Embedding store {self.directory} was built differently; rebuilding it")
+        except (OSError, ValueError):
+            pass
+        for path in (self.vectors_path, self.ids_path):
+            path.unlink(missing_ok=True)
+        with open(meta_path, "w", encoding=DEFAULT_ENCODING) as f:
+            json.dump(meta, f)
+
+    def _load(self) -> None:
+        """Map the matrix and read the id list, dropping a torn last append."""
+        try:
+            with open(self.ids_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+        # A torn append can leave a last id without its newline; it never counts.
+        complete = data[:data.rfind(b"\n") + 1]
+        ids = complete.decode(DEFAULT_ENCODING).splitlines()
+        vector_bytes = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        rows = min(len(ids), vector_bytes // self._row_bytes)
+        if rows < len(ids) or rows * self._row_bytes < vector_bytes or len(complete) < len(data):
+            logger.warning(f"Embedding store {self.directory} was not closed cleanly; keeping {rows} rows")
+            with open(self.ids_path, "w", encoding=DEFAULT_ENCODING) as f:
+                f.write("".join(f"{paper_id}\n" for paper_id in ids[:rows]))
+            if self.vectors_path.exists():
+                os.truncate(self.vectors_path, rows * self._row_bytes)
+        self._ids = ids[:rows]
+        self._ids_bytes = self.ids_path.stat().st_size if self.ids_path.exists() else 0
+        # Later rows win: a re-embedded paper is appended, never rewritten in place.
+        self._rows = {paper_id: row for row, paper_id in enumerate(self._ids)}
+        self._remap()
+
+    def _remap(self) -> None:
+        rows = len(self._ids)
+        self._matrix = (
+            np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+            if rows else np.empty((0, self.dim), dtype=self.dtype)
+        )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._rows
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The whole memory-mapped matrix (rows of superseded vectors included)."""
+        return self._matrix
+
+    def row_of(self, paper_id: str) -> Optional[int]:
+        """Matrix row holding a paper's current vector."""
+        return self._rows.get(paper_id)
+
+    def ids(self) -> List[str]:
+        """IDs of every paper with a vector."""
+        return list(self._rows)
+
+    def id_at(self, row: int) -> str:
+        """ID of the paper owning a matrix row."""
+        return self._ids[row]
+
+    def current_rows(self) -> np.ndarray:
+        """Rows holding the current vector of each paper."""
+        return np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+
+    def add_listener(self, listener: EmbeddingListener) -> None:
+        """Register a callback notified of every append."""
+        self._listeners.append(listener)
+
+    def _notify(self, rows: List[int], replaced: List[int]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(rows, replaced)
+            except Exception as e:
+                logger.warning(f"Embedding listener failed: {e}")
+
+    def _index_rows(self, paper_ids: Sequence[str]) -> List[int]:
+        """Make appended ids current; return the rows they superseded.
+
+        Must be called with the lock held.
+        """
+        first_row = len(self._ids)
+        self._ids.extend(paper_ids)
+        replaced = []
+        for offset, paper_id in enumerate(paper_ids):
+            previous = self._rows.get(paper_id)
+            if previous is not None:
+                replaced.append(previous)
+            self._rows[paper_id] = first_row + offset
+        return replaced
+
+    def _read_appended(self) -> Tuple[List[int], List[int]]:
+        """Take in rows other processes appended; return (new rows, superseded rows).
+
+        Must be called with both the lock and the file lock held.
+        """
+        with open(self.ids_path, "rb") as f:
+            f.seek(self._ids_bytes)
+            data = f.read()
+        # Only whole lines, and only ids whose vectors are fully written.
+        lines = data[:data.rfind(b"\n") + 1].splitlines(keepends=True)
+        rows_written = self.vectors_path.stat().st_size // self._row_bytes
+        lines = lines[:max(0, rows_written - len(self._ids))]
+        if not lines:
+            return [], []
+        first_row = len(self._ids)
+        replaced = self._index_rows([line.decode(DEFAULT_ENCODING).rstrip("\r\n") for line in lines])
+        self._ids_bytes += sum(len(line) for line in lines)
+        self._remap()
+        return list(range(first_row, len(self._ids))), replaced
+
+    def _drop_torn_append(self) -> None:
+        """Cut what a writer that died mid-append left past the last complete row.
+
+        Must be called with both the lock and the file lock held.
+        """
+        vector_bytes = len(self._ids) * self._row_bytes
+        if self.vectors_path.exists() and self.vectors_path.stat().st_size > vector_bytes:
+            os.truncate(self.vectors_path, vector_bytes)
+        if self.ids_path.exists() and self.ids_path.stat().st_size > self._ids_bytes:
+            os.truncate(self.ids_path, self._ids_bytes)
+
+    def refresh(self) -> None:
+        """Take in rows other worker processes appended since the last look."""
+        try:
+            if self.ids_path.stat().st_size == self._ids_bytes:
+                return
+        except FileNotFoundError:
+            return
+        with self._lock, file_lock(self.lock_path):
+            rows, replaced = self._read_appended()
+        if rows:
+            self._notify(rows, replaced)
+
+    def get(self, paper_ids: Sequence[str]) -> np.ndarray:
+        """Vectors of the given papers, in order; raises KeyError for unknown ids.
+
+        Papers stored in consecutive rows come back as a read-only view of the
+        memory map; any other selection is copied, so code reading many or all
+        vectors should use ``matrix`` with ``current_rows`` instead.
+        """
+        rows = [self._rows[paper_id] for paper_id in paper_ids]
+        if rows and rows == list(range(rows[0], rows[0] + len(rows))):
+            return self._matrix[rows[0]:rows[0] + len(rows)]
+        return self._matrix[rows]
+
+    def add(self, paper_ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Append vectors for papers; a paper already stored gets a new current row."""
+        if not len(paper_ids):
+            return
+        data = np.ascontiguousarray(vectors, dtype=self.dtype)
+        if data.shape != (len(paper_ids), self.dim):
+            raise ValueError(f"Expected {len(paper_ids)} vectors of dimension {self.dim}")
+        id_lines = "".join(f"{paper_id}\n" for paper_id in paper_ids).encode(DEFAULT_ENCODING)
+        with self._lock, file_lock(self.lock_path):
+            # Rows of other processes come first, so row numbers match the files.
+            rows, replaced = self._read_appended() if self.ids_path.exists() else ([], [])
+            self._drop_torn_append()
+            first_row = len(self._ids)
+            with open(self.vectors_path, "ab") as f:
+                f.write(data.tobytes())
+            # Ids are written after their vectors, so a crash never leaves an id without a row.
+            with open(self.ids_path, "ab") as f:
+                f.write(id_lines)
+            self._ids_bytes += len(id_lines)
+            replaced += self._index_rows(paper_ids)
+            self._remap()
+        self._notify(rows + list(range(first_row, first_row + len(paper_ids))), replaced)
+
+    def missing(self, paper_ids: Iterable[str]) -> List[str]:
+        """IDs among ``paper_ids`` without a stored vector."""
+        return [paper_id for paper_id in paper_ids if paper_id not in self._rows]
+
+    def ensure(self, papers: Dict[str, str], batch_size: int = EMBED_BATCH_SIZE) -> int:
+        """Embed and store papers not stored yet, given as {paper_id: text}; return how many."""
+        self.refresh()
+        missing = list(dict.fromkeys(self.missing(papers)))
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            self.add(batch, self.embedder.embed([papers[paper_id] for paper_id in batch]))
+        return len(missing)
+
+
+# Global embedding store instance
+_embedding_store: Optional[EmbeddingStore] = None
+_store_lock = threading.Lock()
+
+
+def get_embedding_store() -> EmbeddingStore:
+    """Get or create the embedding store of the configured model."""
+    global _embedding_store
+    if _embedding_store is None:
+        with _store_lock:
+            if _embedding_store is None:
+                settings = get_settings()
+                _embedding_store = EmbeddingStore(
+                    settings.storage_path / EMBEDDINGS_DIRECTORY,
+                    create_embedder(settings.EMBEDDING_MODEL),
+                    settings.EMBEDDING_DTYPE,
+                )
+    return _embedding_store
@@ -0,0 +1,164 @@
+"""Cache-validated serving of stored paper files.
+
+Validators (``ETag``/``Last-Modified``) come from a single ``stat`` call, so
+conditional requests are answered with 304 without opening the file. Full
+responses go through ``FileResponse``, which hands the path to the ASGI
+server (sendfile / ``http.response.pathsend`` where supported) instead of
+reading it in Python; single byte ranges are read with ``os.pread`` off the
+event loop.
+
+Files served with ``precompressed`` set are sent, to clients accepting a
+content coding, as their precompressed variant (see ``compression``), which
+carries its own ETag. Range requests always get the identity encoding.
+"""
+
+import asyncio
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+from .compression import ensure_precompressed, negotiate_encoding, precompressed_path
+
+# Constants
+HTTP_PARTIAL_CONTENT = 206
+HTTP_NOT_MODIFIED = 304
+HTTP_RANGE_NOT_SATISFIABLE = 416
+CACHE_CONTROL = "no-cache"
+MEDIA_TYPES = {
+    ".md": "text/markdown; charset=utf-8",
+    ".pdf": "application/pdf",
+}
+
+
+def make_etag(stat: os.stat_result, encoding: Optional[str] = None) -> str:
+    """Build a strong ETag from file size and modification time (and the content coding)."""
+    suffix = f"-{encoding}" if encoding else ""
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}{suffix}"'
+
+
+def _validator_headers(stat: os.stat_result, encoding: Optional[str] = None) -> dict:
+    return {
+        "ETag": make_etag(stat, encoding),
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+
+def is_not_modified(request: Request, stat: os.stat_result, encoding: Optional[str] = None) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the file's validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = make_etag(stat, encoding)
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat.st_mtime) <= since
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range into an inclusive (start, end) pair.
+
+    Returns None for headers we choose to ignore (multiple ranges or other
+    units), in which case the full file is served. Raises ValueError if the
+    range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+
+def _read_range(path: Path, start: int, length: int) -> bytes:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return os.pread(fd, length, start)
+    finally:
+        os.close(fd)
+
+
+async def _serve_precompressed(request: Request, path: Path, stat: os.stat_result, media_type: str,
+                               encoding: str) -> Response:
+    """Serve the variant of ``path`` compressed with ``encoding``, creating it on first use."""
+    # Validators come from the source file, so they change exactly when it does.
+    headers = _validator_headers(stat, encoding)
+    headers["Vary"] = "Accept-Encoding"
+    if is_not_modified(request, stat, encoding):
+        return Response(status_code=HTTP_NOT_MODIFIED, headers=headers)
+
+    variant_stat = await asyncio.to_thread(ensure_precompressed, path, encoding, stat)
+    headers["Content-Encoding"] = encoding
+    return FileResponse(
+        precompressed_path(path, encoding),
+        media_type=media_type,
+        headers=headers,
+        stat_result=variant_stat,
+    )
+
+
+async def serve_file(request: Request, path: Path, media_type: Optional[str] = None,
+                     precompressed: bool = False) -> Response:
+    """Serve a stored file with conditional and range request support.
+
+    With ``precompressed``, clients accepting a content coding get the
+    file's precompressed variant instead.
+    """
+    stat = await asyncio.to_thread(os.stat, path)
+    media_type = media_type or MEDIA_TYPES.get(path.suffix, "application/octet-stream")
+
+    range_header = request.headers.get("range")
+    if precompressed and not range_header:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding:
+            return await _serve_precompressed(request, path, stat, media_type, encoding)
+
+    headers = _validator_headers(stat)
+    if precompressed:
+        headers["Vary"] = "Accept-Encoding"
+
+    if is_not_modified(request, stat):
+        return Response(status_code=HTTP_NOT_MODIFIED, headers=headers)
+
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == headers["ETag"]):
+        try:
+            byte_range = parse_range(range_header, stat.st_size)
+        except ValueError:
+            return Response(
+                status_code=HTTP_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{stat.st_size}"},
+            )
+        if byte_range:
+            start, end = byte_range
+            body = await asyncio.to_thread(_read_range, path, start, end - start + 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            return Response(
+                content=body,
+                status_code=HTTP_PARTIAL_CONTENT,
+                media_type=media_type,
+                headers=headers,
+            )
+
+    return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
@@ -0,0 +1,287 @@
+"""Full-text index of the library for keyword-in-context search.
+
+Each paper is split at its headings and every segment is stored in a SQLite
+FTS5 table, a positional inverted index, together with the paper id, the
+section title and the segment's byte offset in the markdown. Papers are
+indexed once when converted, so a query is an index lookup ranked by BM25
+rather than a scan of every file.
+
+Scoring is what a query costs, so it is bounded: a query is only ranked over
+the newest ``CANDIDATE_WINDOW`` segments holding its sparsest word (widened
+when that yields too few results). Queries with any word rarer than that are
+ranked over all their matches; queries made only of words found all over the
+library are ranked among their most recent matches, which keeps latency flat
+as the library grows.
+"""
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+from ..storage import get_paper_path
+from ..utils import DEFAULT_ENCODING, connect_sqlite
+from .library import LibraryEntry, LibraryIndex, get_library_index
+from .sections import SECTION_INDEX_EXTENSION, get_or_build_section_index
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+# Constants
+FULLTEXT_FILE_NAME = ".fulltext.sqlite3"
+SNIPPET_CONTEXT_CHARS = 80
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+# Matching segments of the sparsest query word that are scored; the window grows by
+# WINDOW_GROWTH while it holds too few results.
+CANDIDATE_WINDOW = 2000
+WINDOW_GROWTH = 4
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS segments USING fts5 (
+    paper_id UNINDEXED,
+    section UNINDEXED,
+    start UNINDEXED,
+    body,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS indexed_papers (
+    paper_id TEXT PRIMARY KEY,
+    total_bytes INTEGER NOT NULL
+);
+"""
+_QUERY_TERMS = re.compile(r'"([^"]+)"|(\S+)')
+_WORDS = re.compile(r"\w+")
+
+
+class FullTextQueryError(ValueError):
+    """Raised for queries that contain no searchable terms."""
+
+
+def _segments(markdown: str, section_index: Dict[str, Any]) -> List[Tuple[Optional[str], int, str]]:
+    """Split markdown at every heading into (section, byte offset, text) segments."""
+    data = markdown.encode(DEFAULT_ENCODING)
+    boundaries = [(None, 0)] + [(s["title"], s["start"]) for s in section_index["sections"]]
+    segments = []
+    for i, (title, start) in enumerate(boundaries):
+        end = boundaries[i + 1][1] if i + 1 < len(boundaries) else len(data)
+        text = data[start:end].decode(DEFAULT_ENCODING, errors="ignore")
+        if text.strip():
+            segments.append((title, start, text))
+    return segments
+
+
+def to_match_expression(query: str) -> str:
+    """Turn a user query into an FTS5 expression: all words, "quoted phrases" kept."""
+    terms = []
+    for phrase, word in _QUERY_TERMS.findall(query):
+        term = phrase or word
+        if re.search(r"\w", term):
+            terms.append('"' + term.replace('"', "") + '"')
+    if not terms:
+        raise FullTextQueryError("Query contains no searchable terms")
+    return " ".join(terms)
+
+
+def _query_words(query: str) -> List[str]:
+    """Every distinct word of a query, phrases included, as single-word FTS5 expressions."""
+    words = (word for phrase, term in _QUERY_TERMS.findall(query) for word in _WORDS.findall(phrase or term))
+    return ['"' + word + '"' for word in dict.fromkeys(words)]
+
+
+def _snippet(highlighted: str) -> Tuple[str, str]:
+    """Get the text before the first match and a snippet around it."""
+    position = max(highlighted.find(MATCH_START), 0)
+    start = max(position - SNIPPET_CONTEXT_CHARS, 0)
+    end = highlighted.find(MATCH_END, position) + 1 + SNIPPET_CONTEXT_CHARS
+    snippet = " ".join(highlighted[start:end].split())
+    snippet = snippet.replace(MATCH_START, "**").replace(MATCH_END, "**")
+    if start > 0:
+        snippet = "…" + snippet
+    if end < len(highlighted):
+        snippet += "…"
+    return highlighted[:position], snippet
+
+
+class FullTextIndex:
+    """SQLite FTS5 index of paper segments."""
+
+    def __init__(self, db_path: Path):
+        """Open (and create if needed) the full-text database."""
+        self.db_path = db_path
+        self._conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def is_indexed(self, paper_id: str, total_bytes: int) -> bool:
+        """Check whether a paper is indexed at its current size."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT total_bytes FROM indexed_papers WHERE paper_id = ?", (paper_id,)
+            ).fetchone()
+        return row is not None and row[0] == total_bytes
+
+    def index_paper(self, paper_id: str, markdown: str, section_index: Dict[str, Any]) -> None:
+        """Replace the indexed segments of a paper."""
+        rows = [
+            (paper_id, section, start, text)
+            for section, start, text in _segments(markdown, section_index)
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM segments WHERE paper_id = ?", (paper_id,))
+            self._conn.executemany(
+                "INSERT INTO segments (paper_id, section, start, body) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO indexed_papers (paper_id, total_bytes) VALUES (?, ?)",
+                (paper_id, section_index["total_bytes"]),
+            )
+
+    def index_file(self, paper_id: str, markdown_path: Path) -> None:
+        """Index a stored paper from its markdown file."""
+        section_index = get_or_build_section_index(
+            get_paper_path(paper_id, SECTION_INDEX_EXTENSION), markdown_path
+        )
+        with open(markdown_path, "r", encoding=DEFAULT_ENCODING, newline="") as f:
+            self.index_paper(paper_id, f.read(), section_index)
+
+    def remove(self, paper_id: str) -> None:
+        """Drop a paper from the index."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM segments WHERE paper_id = ?", (paper_id,))
+            self._conn.execute("DELETE FROM indexed_papers WHERE paper_id = ?", (paper_id,))
+
+    def indexed_ids(self) -> Dict[str, int]:
+        """Map every indexed paper to the size it was indexed at."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT paper_id, total_bytes FROM indexed_papers"))
+
+    def on_library_change(self, paper_id: str, entry: Optional[LibraryEntry]) -> None:
+        """Library index listener keeping the full-text index in sync.
+
+        Conversions index papers before adding them to the library, so this
+        only does work for files that appear or change outside the pipeline.
+        """
+        if entry is None:
+            self.remove(paper_id)
+        elif not self.is_indexed(paper_id, entry.size):
+            self.index_file(paper_id, Path(entry.path))
+
+    def _window_start(self, words: List[str], window: int) -> Optional[int]:
+        """Lowest rowid of the newest ``window`` segments holding the sparsest word.
+
+        None when some word has fewer matches than that, as the query then
+        matches few enough segments to rank them all. Must be called with the
+        lock held.
+        """
+        start = None
+        for word in words:
+            # Walks the word's matches newest first without scoring them.
+            row = self._conn.execute(
+                "SELECT rowid FROM segments WHERE segments MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                (word, window - 1),
+            ).fetchone()
+            if row is None:
+                return None
+            start = row[0] if start is None else min(start, row[0])
+        return start
+
+    def _rank(self, expression: str, start: Optional[int], limit: int, per_paper: int) -> List[Tuple[int, float]]:
+        """Best (rowid, score) matches from ``start`` on, at most ``per_paper`` per paper.
+
+        The per-paper cap is applied while reading matches best first, so
+        reading stops at the last segment kept. Must be called with the lock held.
+        """
+        sql = "SELECT rowid, paper_id, rank FROM segments WHERE segments MATCH ?"
+        params = [expression]
+        if start is not None:
+            sql += " AND rowid >= ?"
+            params.append(start)
+        ranked, per_paper_counts = [], {}
+        cursor = self._conn.execute(sql + " ORDER BY rank", params)
+        for rowid, paper_id, score in cursor:
+            if per_paper_counts.get(paper_id, 0) < per_paper:
+                per_paper_counts[paper_id] = per_paper_counts.get(paper_id, 0) + 1
+                ranked.append((rowid, score))
+                if len(ranked) == limit:
+                    break
+        cursor.close()
+        return ranked
+
+    def search(self, query: str, limit: int = 10, per_paper: int = 3) -> List[Dict[str, Any]]:
+        """Return the best matching segments with a snippet around the first match."""
+        expression = to_match_expression(query)
+        words = _query_words(query)
+        window = CANDIDATE_WINDOW
+        with self._lock:
+            while True:
+                start = self._window_start(words, window)
+                ranked = self._rank(expression, start, limit, per_paper)
+                if start is None or len(ranked) == limit:
+                    break
+                window *= WINDOW_GROWTH
+            if not ranked:
+                return []
+            placeholders = ",".join("?" * len(ranked))
+            rows = self._conn.execute(
+                f"SELECT rowid, paper_id, section, start, "
+                f"highlight(segments, 3, '{MATCH_START}', '{MATCH_END}') AS highlighted "
+                f"FROM segments WHERE segments MATCH ? AND rowid IN ({placeholders})",
+                (expression, *[rowid for rowid, _ in ranked]),
+            ).fetchall()
+
+        by_id = {row["rowid"]: row for row in rows}
+        results = []
+        for rowid, score in ranked:
+            row = by_id[rowid]
+            before, snippet = _snippet(row["highlighted"])
+            results.append({
+                "paper_id": row["paper_id"],
+                "section": row["section"],
+                "offset": row["start"] + len(before.encode(DEFAULT_ENCODING)),
+                "score": round(-score, 4),
+                "snippet": snippet,
+            })
+        return results
+
+
+def sync_fulltext_index(fulltext: FullTextIndex, index: LibraryIndex) -> None:
+    """Index library papers that are missing or stale and drop removed ones."""
+    indexed = fulltext.indexed_ids()
+    for paper_id in set(indexed) - set(index.list_ids()):
+        fulltext.remove(paper_id)
+    for paper_id in index.list_ids():
+        entry = index.get(paper_id)
+        if entry and indexed.get(paper_id) != entry.size:
+            try:
+                fulltext.index_file(paper_id, Path(entry.path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not index {paper_id} for full-text search: {e}")
+
+
+async def backfill_fulltext_index(fulltext: FullTextIndex) -> None:
+    """Index papers converted before the full-text index existed, off the event loop."""
+    started = time.perf_counter()
+    await asyncio.to_thread(sync_fulltext_index, fulltext, get_library_index())
+    logger.info(f"Full-text index synced in {time.perf_counter() - started:.2f}s")
+
+
+# Global full-text index instance
+_fulltext_index: Optional[FullTextIndex] = None
+_fulltext_lock = threading.Lock()
+
+
+def get_fulltext_index() -> FullTextIndex:
+    """Get or create the global full-text index, listening to the library."""
+    global _fulltext_index
+    if _fulltext_index is None:
+        with _fulltext_lock:
+            if _fulltext_index is None:
+                fulltext = FullTextIndex(get_settings().storage_path / FULLTEXT_FILE_NAME)
+                get_library_index().add_listener(fulltext.on_library_change)
+                _fulltext_index = fulltext
+    return _fulltext_index
@@ -0,0 +1,399 @@
+"""In-memory index of the papers available in local storage.
+
+The index is built once (from a snapshot when one exists, otherwise from a
+single directory scan) and then kept current by the download pipeline and by
+a background watcher, so membership checks and listings never touch the
+filesystem on the request path.
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+from ..utils import strip_version
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # pragma: no cover - optional dependency
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+# Constants
+MARKDOWN_EXTENSION = ".md"
+SNAPSHOT_FILE_NAME = ".library_index.json"
+SNAPSHOT_VERSION = 1
+ENCODING = "utf-8"
+WATCHER_AUTO = "auto"
+WATCHER_INOTIFY = "inotify"
+WATCHER_POLL = "poll"
+WATCHER_OFF = "off"
+
+
+@dataclass
+class LibraryEntry:
+    """A converted paper known to the library."""
+    paper_id: str
+    path: str
+    size: int
+    modified_at: float
+
+
+# Called with (paper_id, entry) on add/update and (paper_id, None) on removal.
+LibraryListener = Callable[[str, Optional[LibraryEntry]], None]
+
+
+def _entry_from_path(paper_id: str, path: Path) -> Optional[LibraryEntry]:
+    """Build an entry from a markdown file, or None if it vanished."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return LibraryEntry(
+        paper_id=paper_id,
+        path=str(path),
+        size=stat.st_size,
+        modified_at=stat.st_mtime,
+    )
+
+
+class LibraryIndex:
+    """Thread-safe map of paper ID to its converted markdown file."""
+
+    def __init__(self, storage_path: Path):
+        """Create an empty index for the given storage directory."""
+        self.storage_path = storage_path
+        self._entries: Dict[str, LibraryEntry] = {}
+        # Number of indexed versions of each paper, keyed by version-less ID.
+        self._base_ids: Counter = Counter()
+        self._directories: List[str] = [str(storage_path)]
+        self._listeners: List[LibraryListener] = []
+        self._lock = threading.RLock()
+        self._dirty = False
+
+    @property
+    def snapshot_path(self) -> Path:
+        """Location of the on-disk snapshot."""
+        return self.storage_path / SNAPSHOT_FILE_NAME
+
+    def __contains__(self, paper_id: str) -> bool:
+        return paper_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def has_any_version(self, base_id: str) -> bool:
+        """Check whether some version of a paper is indexed, given its version-less ID."""
+        return base_id in self._base_ids
+
+    def get(self, paper_id: str) -> Optional[LibraryEntry]:
+        """Return the entry for a paper, if present."""
+        return self._entries.get(paper_id)
+
+    def list_ids(self) -> List[str]:
+        """Return the IDs of all indexed papers."""
+        return list(self._entries)
+
+    def add_listener(self, listener: LibraryListener) -> None:
+        """Register a callback notified of every change to the index."""
+        self._listeners.append(listener)
+
+    def _notify(self, paper_id: str, entry: Optional[LibraryEntry]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(paper_id, entry)
+            except Exception as e:
+                logger.warning(f"Library listener failed for {paper_id}: {e}")
+
+    def add(self, paper_id: str, path: Path) -> None:
+        """Record a newly converted paper."""
+        entry = _entry_from_path(paper_id, path)
+        if entry is None:
+            return
+        with self._lock:
+            if paper_id not in self._entries:
+                self._base_ids[strip_version(paper_id)] += 1
+            self._entries[paper_id] = entry
+            self._dirty = True
+        self._notify(paper_id, entry)
+
+    def discard(self, paper_id: str, path: Optional[Path] = None) -> None:
+        """Forget a paper whose markdown file was removed.
+
+        When ``path`` is given the entry is only dropped if it still points
+        there, so a file moved into a shard is not lost when its old copy goes.
+        """
+        with self._lock:
+            entry = self._entries.get(paper_id)
+            if entry is None or (path is not None and entry.path != str(path)):
+                return
+            del self._entries[paper_id]
+            base_id = strip_version(paper_id)
+            self._base_ids[base_id] -= 1
+            if not self._base_ids[base_id]:
+                del self._base_ids[base_id]
+            self._dirty = True
+        self._notify(paper_id, None)
+
+    @property
+    def directories(self) -> List[str]:
+        """Directories seen by the last scan, flat root and shards alike."""
+        return self._directories
+
+    def scan(self) -> Tuple[Dict[str, LibraryEntry], List[str]]:
+        """Scan storage (including shard directories) for markdown files.
+
+        Only used off the request path. Returns the entries found and every
+        directory visited.
+        """
+        entries = {}
+        directories = []
+        pending = [str(self.storage_path)]
+        while pending:
+            directory = pending.pop()
+            try:
+                it = os.scandir(directory)
+            except OSError:
+                continue
+            directories.append(directory)
+            with it:
+                for item in it:
+                    if item.is_dir(follow_symlinks=False):
+                        if not item.name.startswith("."):
+                            pending.append(item.path)
+                        continue
+                    if not item.name.endswith(MARKDOWN_EXTENSION):
+                        continue
+                    paper_id = item.name[:-len(MARKDOWN_EXTENSION)]
+                    stat = item.stat()
+                    entries[paper_id] = LibraryEntry(
+                        paper_id=paper_id,
+                        path=item.path,
+                        size=stat.st_size,
+                        modified_at=stat.st_mtime,
+                    )
+        return entries, directories
+
+    def reconcile(self) -> None:
+        """Replace the index contents with a fresh scan of storage."""
+        entries, directories = self.scan()
+        with self._lock:
+            self._directories = directories
+            if entries == self._entries:
+                return
+            previous = self._entries
+            self._entries = entries
+            self._base_ids = Counter(map(strip_version, entries))
+            self._dirty = True
+        for paper_id, entry in entries.items():
+            if previous.get(paper_id) != entry:
+                self._notify(paper_id, entry)
+        for paper_id in previous.keys() - entries.keys():
+            self._notify(paper_id, None)
+
+    def load(self) -> None:
+        """Populate the index from the snapshot, falling back to a scan."""
+        if self._load_snapshot():
+            logger.info(f"Loaded library index snapshot with {len(self)} papers")
+            return
+        self.reconcile()
+        self.save_snapshot()
+        logger.info(f"Built library index with {len(self)} papers")
+
+    def _load_snapshot(self) -> bool:
+        """Load entries from the snapshot file; return False if unusable."""
+        try:
+            with open(self.snapshot_path, "r", encoding=ENCODING) as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return False
+        if data.get("version") != SNAPSHOT_VERSION:
+            return False
+        with self._lock:
+            self._entries = {
+                item["paper_id"]: LibraryEntry(**item) for item in data.get("entries", [])
+            }
+            self._base_ids = Counter(map(strip_version, self._entries))
+            self._dirty = False
+        return True
+
+    def save_snapshot(self, force: bool = False) -> None:
+        """Atomically persist the index if it changed since the last save."""
+        with self._lock:
+            if not (self._dirty or force):
+                return
+            data = {
+                "version": SNAPSHOT_VERSION,
+                "entries": [asdict(entry) for entry in self._entries.values()],
+            }
+            self._dirty = False
+        try:
+            self.storage_path.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding=ENCODING) as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"Failed to save library index snapshot: {e}")
+            self._dirty = True
+
+
+class _LibraryEventHandler(FileSystemEventHandler):
+    """Translate filesystem events into index updates."""
+
+    def __init__(self, index: LibraryIndex):
+        super().__init__()
+        self.index = index
+
+    @staticmethod
+    def _paper_id(path: str) -> Optional[str]:
+        name = os.path.basename(path)
+        return name[:-len(MARKDOWN_EXTENSION)] if name.endswith(MARKDOWN_EXTENSION) else None
+
+    def _added(self, path: str) -> None:
+        paper_id = self._paper_id(path)
+        if paper_id:
+            self.index.add(paper_id, Path(path))
+
+    def _removed(self, path: str) -> None:
+        paper_id = self._paper_id(path)
+        if paper_id:
+            self.index.discard(paper_id, Path(path))
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._added(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._added(event.src_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self._removed(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._removed(event.src_path)
+            self._added(event.dest_path)
+
+
+class LibraryWatcher:
+    """Keep a LibraryIndex in sync with storage in the background.
+
+    Uses inotify-style notifications through ``watchdog`` when it is
+    installed, and otherwise polls the mtimes of the storage directory and
+    its shard directories, rescanning only when one of them changes.
+    """
+
+    def __init__(self, index: LibraryIndex, mode: str = WATCHER_AUTO, poll_interval: float = 5.0):
+        """Configure the watcher; call start() to begin watching."""
+        self.index = index
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self._observer = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_mtimes: Dict[str, float] = {}
+
+    def _use_inotify(self) -> bool:
+        """Decide whether native notifications are available and wanted."""
+        if self.mode == WATCHER_INOTIFY and Observer is None:
+            logger.warning("watchdog is not installed; falling back to polling")
+        return self.mode in (WATCHER_AUTO, WATCHER_INOTIFY) and Observer is not None
+
+    def _directory_mtimes(self) -> Dict[str, float]:
+        """Stat every known directory; adding or removing a file bumps its mtime."""
+        mtimes = {}
+        for directory in self.index.directories:
+            try:
+                mtimes[directory] = os.stat(directory).st_mtime
+            except OSError:
+                pass
+        return mtimes
+
+    def _poll_once(self) -> None:
+        """Rescan storage only if a directory changed since the last check."""
+        mtimes = self._directory_mtimes()
+        if mtimes != self._last_mtimes:
+            self.index.reconcile()
+            self._last_mtimes = self._directory_mtimes()
+
+    def _run(self) -> None:
+        """Background loop: reconcile once, then poll and flush snapshots."""
+        polling = self._observer is None
+        try:
+            self.index.reconcile()
+            self._last_mtimes = self._directory_mtimes()
+        except OSError as e:
+            logger.warning(f"Initial library reconcile failed: {e}")
+        while not self._stop.wait(self.poll_interval):
+            try:
+                if polling:
+                    self._poll_once()
+                self.index.save_snapshot()
+            except OSError as e:
+                logger.warning(f"Library watcher iteration failed: {e}")
+
+    def start(self) -> None:
+        """Start watching storage."""
+        if self.mode == WATCHER_OFF or self._thread is not None:
+            return
+        self.index.storage_path.mkdir(parents=True, exist_ok=True)
+        if self._use_inotify():
+            self._observer = Observer()
+            self._observer.schedule(
+                _LibraryEventHandler(self.index), str(self.index.storage_path), recursive=True
+            )
+            self._observer.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="library-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Library watcher started ({'inotify' if self._observer else 'polling'})")
+
+    def stop(self) -> None:
+        """Stop watching and flush the snapshot."""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.index.save_snapshot()
+
+
+# Global library index instance
+_library_index: Optional[LibraryIndex] = None
+_library_lock = threading.Lock()
+
+
+def get_library_index() -> LibraryIndex:
+    """Get or create the global library index, loading it on first use."""
+    global _library_index
+    if _library_index is None:
+        with _library_lock:
+            if _library_index is None:
+                index = LibraryIndex(get_settings().storage_path)
+                index.load()
+                _library_index = index
+    return _library_index
+
+
+def create_library_watcher() -> LibraryWatcher:
+    """Create a watcher for the global library index from settings."""
+    settings = get_settings()
+    return LibraryWatcher(
+        get_library_index(),
+        mode=settings.LIBRARY_WATCHER,
+        poll_interval=settings.LIBRARY_POLL_INTERVAL,
+    )
@@ -1,10 +1,10 @@
 # Placeholder for LLMService
-from ..config import Settings # Assuming your Settings are in config.py at the parent level
+from ..config import get_settings # Assuming your Settings are in config.py at the parent level
 # import openai # If you're using OpenAI
 
 class LLMService:
     def __init__(self):
-        self.settings = Settings()
+        self.settings = get_settings()
         # Initialize your LLM client here, e.g., set API key
         # if self.settings.OPENAI_API_KEY:
         #     openai.api_key = self.settings.OPENAI_API_KEY
@@ -0,0 +1,390 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms keep their values in dicts keyed by label
+values; recording one is a dict update and, for histograms, a bisect over a
+dozen bucket bounds, cheap enough to leave on for every request. Values
+computed elsewhere (cache statistics) are pulled in by collectors when the
+metrics are rendered, not on the request path.
+
+With several worker processes each keeps its own registry. Workers then
+write a snapshot of it to ``STORAGE_PATH/.metrics/`` every few seconds, and
+whichever worker answers ``/metrics`` adds up its live values and the
+others' latest snapshots, so a scrape covers the whole server.
+"""
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+from ..utils import DEFAULT_ENCODING, ensure_directory_exists
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+# Constants
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_DIRECTORY = ".metrics"
+SNAPSHOT_INTERVAL = 5.0
+# Snapshots not refreshed for this long belong to workers that are gone.
+SNAPSHOT_STALE_AFTER = 60.0
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PER_PAGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Metric:
+    """Base of the metric types: a name, help text and label names."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly copy of the metric's values, keyed by joined label values."""
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing total per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        """Add ``amount`` to the total of a label set."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def set(self, value: float, *labels: str) -> None:
+        """Mirror a total kept elsewhere, such as a cache's hit count."""
+        with self._lock:
+            self._values[labels] = value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"\x1f".join(labels): value for labels, value in self._values.items()}
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        """Subtract ``amount`` from the value of a label set."""
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """Distribution of observed values over fixed buckets, per label set."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # Per label set: [count in each bucket (not cumulative) and above the last, sum]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        """Record one observation for a label set."""
+        with self._lock:
+            values = self._values.get(labels)
+            if values is None:
+                values = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            values[bisect_left(self.buckets, value)] += 1
+            values[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe how long the block takes, in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"\x1f".join(labels): list(values) for labels, values in self._values.items()}
+
+
+class HitRatio(Metric):
+    """Share of hits among lookups, derived from hit and miss counters when rendered.
+
+    Holds no values itself, so adding up workers' snapshots sums their
+    counters and the ratio comes out right for the whole server.
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, hits: Counter, misses: Counter):
+        super().__init__(name, documentation, hits.label_names)
+        self.hits = hits
+        self.misses = misses
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {}
+
+    def derive(self, merged: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+        """Ratio per label set from the merged counter values."""
+        hits = merged[self.hits.name]
+        misses = merged[self.misses.name]
+        ratios = {}
+        for key in set(hits) | set(misses):
+            lookups = hits.get(key, 0.0) + misses.get(key, 0.0)
+            ratios[key] = hits.get(key, 0.0) / lookups if lookups else 0.0
+        return ratios
+
+
+class MetricsRegistry:
+    """The metrics of one process and the collectors refreshing them."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric; names must be unique."""
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def hit_ratio(self, name: str, documentation: str, hits: Counter, misses: Counter) -> HitRatio:
+        return self.register(HitRatio(name, documentation, hits, misses))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that updates metrics just before they are read."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Values of every metric, after running the collectors."""
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def render(self, others: Sequence[Dict[str, Dict[str, Any]]] = ()) -> str:
+        """Text exposition of this registry, with other workers' snapshots added in."""
+        merged = self.snapshot()
+        for snapshot in others:
+            for name, values in snapshot.items():
+                if name in merged:
+                    _merge_values(merged[name], values)
+        for name, metric in self._metrics.items():
+            if isinstance(metric, HitRatio):
+                merged[name] = metric.derive(merged)
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key, value in sorted(merged[name].items()):
+                labels = tuple(key.split("\x1f")) if metric.label_names else ()
+                if isinstance(metric, Histogram):
+                    lines.extend(_histogram_lines(metric, labels, value))
+                else:
+                    lines.append(f"{name}{_format_labels(metric.label_names, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge_values(into: Dict[str, Any], values: Dict[str, Any]) -> None:
+    """Add one snapshot's values of a metric to another's."""
+    for key, value in values.items():
+        current = into.get(key)
+        if current is None:
+            into[key] = value
+        elif isinstance(current, list):
+            into[key] = [a + b for a, b in zip(current, value)]
+        else:
+            into[key] = current + value
+
+
+def _histogram_lines(metric: Histogram, labels: Labels, values: List[float]) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(metric.buckets + (math.inf,), values):
+        cumulative += count
+        bucket = _format_labels(metric.label_names, labels, f'le="{_format_value(bound)}"')
+        lines.append(f"{metric.name}_bucket{bucket} {_format_value(cumulative)}")
+    label_text = _format_labels(metric.label_names, labels)
+    lines.append(f"{metric.name}_sum{label_text} {_format_value(values[-1])}")
+    lines.append(f"{metric.name}_count{label_text} {_format_value(cumulative)}")
+    return lines
+
+
+class SnapshotExchange:
+    """Shares registry snapshots between worker processes through files."""
+
+    def __init__(self, directory: Path, registry: MetricsRegistry):
+        self.directory = ensure_directory_exists(directory)
+        self.registry = registry
+        self.path = directory / f"{os.getpid()}.json"
+
+    def publish(self) -> None:
+        """Write this worker's current snapshot."""
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding=DEFAULT_ENCODING) as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(temp_path, self.path)
+
+    def others(self) -> List[Dict[str, Dict[str, Any]]]:
+        """Latest snapshots of the other live workers; removes those of dead ones."""
+        snapshots = []
+        now = time.time()
+        for path in self.directory.glob("*.json"):
+            if path == self.path:
+                continue
+            try:
+                if now - path.stat().st_mtime > SNAPSHOT_STALE_AFTER:
+                    path.unlink(missing_ok=True)
+                    continue
+                with open(path, "r", encoding=DEFAULT_ENCODING) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def withdraw(self) -> None:
+        """Remove this worker's snapshot, on shutdown."""
+        self.path.unlink(missing_ok=True)
+
+
+# The process-wide registry and the metrics recorded across modules
+registry = MetricsRegistry()
+
+REQUESTS = registry.counter(
+    "arxiv_requests_total", "HTTP requests handled, by endpoint and status code", ("endpoint", "status")
+)
+REQUEST_DURATION = registry.histogram(
+    "arxiv_request_duration_seconds", "Time to handle an HTTP request, by endpoint", ("endpoint",)
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "arxiv_requests_in_flight", "HTTP requests being handled, by endpoint", ("endpoint",)
+)
+UPSTREAM_DURATION = registry.histogram(
+    "arxiv_upstream_request_duration_seconds", "Time spent in calls to arXiv, by operation", ("operation",)
+)
+UPSTREAM_ERRORS = registry.counter(
+    "arxiv_upstream_errors_total", "Calls to arXiv that failed, by operation", ("operation",)
+)
+CONVERSIONS_IN_PROGRESS = registry.gauge(
+    "arxiv_conversions_in_progress", "PDF conversions queued or running"
+)
+CONVERSIONS_IN_PROGRESS.set(0)
+CONVERSION_SECONDS_PER_PAGE = registry.histogram(
+    "arxiv_conversion_seconds_per_page", "PDF to markdown conversion time divided by page count",
+    buckets=PER_PAGE_BUCKETS,
+)
+ADMISSION_WAITING = registry.gauge(
+    "arxiv_admission_waiting", "Tool calls waiting for a concurrency slot", ("tool",)
+)
+ADMISSION_REJECTED = registry.counter(
+    "arxiv_admission_rejected_total", "Tool calls rejected with 429 because the tool was at capacity", ("tool",)
+)
+STARTUP_SECONDS = registry.gauge(
+    "arxiv_startup_seconds", "Time from package import to serving requests, per worker process", ("worker",)
+)
+CACHE_HITS = registry.counter("arxiv_cache_hits_total", "Cache lookups answered from the cache", ("cache",))
+CACHE_MISSES = registry.counter("arxiv_cache_misses_total", "Cache lookups that missed", ("cache",))
+CACHE_HIT_RATIO = registry.hit_ratio(
+    "arxiv_cache_hit_ratio", "Share of cache lookups that hit", CACHE_HITS, CACHE_MISSES
+)
+
+
+def record_cache_stats(cache: str, stats: Dict[str, Any]) -> None:
+    """Mirror a cache's ``get_stats()`` hit and miss counts."""
+    CACHE_HITS.set(stats["hits"], cache)
+    CACHE_MISSES.set(stats["misses"], cache)
+
+
+@contextmanager
+def track_upstream(operation: str) -> Iterator[None]:
+    """Time a call to arXiv and count it as failed if it raises.
+
+    StopIteration (an id with no result) is an answer, not a failure.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except StopIteration:
+        raise
+    except Exception:
+        UPSTREAM_ERRORS.inc(operation)
+        raise
+    finally:
+        UPSTREAM_DURATION.observe(time.perf_counter() - started, operation)
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting and timing requests and tracking those in flight."""
+
+    def __init__(self, app, endpoint_label: Callable[[str], str]):
+        self.app = app
+        self.endpoint_label = endpoint_label
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        endpoint = self.endpoint_label(scope["path"])
+        status = "500"
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(endpoint)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_DURATION.observe(time.perf_counter() - started, endpoint)
+            REQUESTS.inc(endpoint, status)
+            REQUESTS_IN_FLIGHT.dec(endpoint)
@@ -0,0 +1,111 @@
+"""Size-bounded in-memory cache of decoded paper content.
+
+Shared by ``read_paper`` and ``PaperManager.get_paper_content`` so a paper
+read repeatedly by a research group is decoded from disk once. Entries are
+validated against the file's size and mtime on every lookup, and the
+conversion pipeline invalidates them explicitly when it rewrites a file.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..config import get_settings
+from ..utils import DEFAULT_ENCODING
+
+
+class PaperContentCache:
+    """LRU cache of file contents bounded by total resident bytes."""
+
+    def __init__(self, max_bytes: int):
+        """Create an empty cache holding at most ``max_bytes`` of content."""
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], str, int]]" = OrderedDict()
+        self._resident_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _validator(path: Path) -> Tuple[int, int]:
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._resident_bytes -= entry[2]
+
+    def read(self, path: Path) -> str:
+        """Return the decoded content of a file, from cache when still valid."""
+        key = str(path)
+        validator = self._validator(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == validator:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+
+        with open(path, "r", encoding=DEFAULT_ENCODING) as f:
+            content = f.read()
+        self._store(key, validator, content)
+        return content
+
+    def _store(self, key: str, validator: Tuple[int, int], content: str) -> None:
+        """Insert content and evict least recently used entries over budget."""
+        size = sys.getsizeof(content)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (validator, content, size)
+            self._resident_bytes += size
+            while self._resident_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate(self, path: Path) -> None:
+        """Drop a file from the cache, e.g. after it was rewritten."""
+        with self._lock:
+            self._remove(str(path))
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._resident_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Report hit ratio and memory use."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "resident_bytes": self._resident_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Global paper cache instance
+_paper_cache: Optional[PaperContentCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_paper_cache() -> PaperContentCache:
+    """Get or create the global paper content cache."""
+    global _paper_cache
+    if _paper_cache is None:
+        with _cache_lock:
+            if _paper_cache is None:
+                _paper_cache = PaperContentCache(get_settings().PAPER_CACHE_BYTES)
+    return _paper_cache
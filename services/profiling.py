@@ -0,0 +1,247 @@
+"""Opt-in sampling profiles of single tool requests.
+
+A ``/tools/*`` request is profiled when it carries the ``X-Profile`` header
+with the configured admin token, or when it is drawn by
+``PROFILE_SAMPLE_RATE``. The profile is written in speedscope's JSON format
+(open it at https://www.speedscope.app) to ``STORAGE_PATH/.profiles/``,
+which keeps only the newest ``PROFILE_MAX_FILES``, and the response names
+it in ``X-Profile-Id``.
+
+pyinstrument is used when installed: in its async mode it follows the
+request's own task, so concurrent requests do not leak into the profile,
+and time spent awaiting worker threads (arXiv calls, PDF conversion)
+shows on the line that awaited them. Without it a small built-in sampler
+records the event loop thread, plus any thread running this package's
+code, which does include other requests running at the same time.
+
+Profiles cost a few percent of the request's time, so at most one request
+per worker is profiled at once; others run normally.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from ..utils import DEFAULT_ENCODING, ensure_directory_exists
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+# Constants
+PROFILES_DIRECTORY = ".profiles"
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILED_PATH_PREFIX = "/tools/"
+PROFILE_NAME_PATTERN = re.compile(r"^\d+-\d+-\d+-[A-Za-z0-9_]+\.speedscope\.json$")
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+PACKAGE_ROOT = str(Path(__file__).resolve().parent.parent)
+
+_sequence = itertools.count()
+
+
+class SamplingProfiler:
+    """Built-in fallback sampler, reading thread stacks from a background thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self._frames: Dict[Tuple[str, str, int], int] = {}
+        self._samples: Dict[int, List[Tuple[List[int], float]]] = {}
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._started = self._stopped = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+        self._stopped = time.perf_counter()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._stack(frame)
+                if thread_id == self.thread_id or any(
+                    key[1].startswith(PACKAGE_ROOT) for key in stack
+                ):
+                    indexes = [self._frames.setdefault(key, len(self._frames)) for key in stack]
+                    self._samples.setdefault(thread_id, []).append((indexes, now - last))
+            last = now
+
+    @staticmethod
+    def _stack(frame) -> List[Tuple[str, str, int]]:
+        """Functions on a thread's stack, outermost first."""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        """The samples as a speedscope document, one profile per thread."""
+        duration = self._stopped - self._started
+        profiles = []
+        for thread_id, samples in self._samples.items():
+            profiles.append({
+                "type": "sampled",
+                "name": "event loop" if thread_id == self.thread_id else f"thread {thread_id}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": duration,
+                "samples": [stack for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": "arxiv-mcp-server",
+            "shared": {"frames": [
+                {"name": function, "file": file, "line": line} for function, file, line in self._frames
+            ]},
+            "profiles": profiles,
+        }
+
+
+class ProfileStore:
+    """The directory of stored profiles, pruned to the newest ``max_files``."""
+
+    def __init__(self, directory: Path, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def new_name(self, endpoint: str) -> str:
+        """Unique, sortable file name of a profile about to be taken."""
+        return f"{time.time_ns() // 1_000_000}-{os.getpid()}-{next(_sequence)}-{endpoint}{PROFILE_SUFFIX}"
+
+    def path(self, name: str) -> Path:
+        """Location of a stored profile; raises ValueError for names it never produces."""
+        if not PROFILE_NAME_PATTERN.match(name):
+            raise ValueError(f"Invalid profile name: {name}")
+        return self.directory / name
+
+    def write(self, name: str, content: str) -> None:
+        """Store a profile, then drop the oldest beyond the limit."""
+        ensure_directory_exists(self.directory)
+        temp_path = self.directory / f".{name}.tmp"
+        with open(temp_path, "w", encoding=DEFAULT_ENCODING) as f:
+            f.write(content)
+        os.replace(temp_path, self.directory / name)
+        for entry in self.list()[self.max_files:]:
+            (self.directory / entry["name"]).unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first."""
+        entries = []
+        if not self.directory.exists():
+            return entries
+        for path in self.directory.iterdir():
+            if not PROFILE_NAME_PATTERN.match(path.name):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            created, pid, _, endpoint = path.name[:-len(PROFILE_SUFFIX)].split("-", 3)
+            entries.append({
+                "name": path.name,
+                "endpoint": endpoint,
+                "worker_pid": int(pid),
+                "created": int(created) / 1000,
+                "size": stat.st_size,
+            })
+        entries.sort(key=lambda entry: entry["name"], reverse=True)
+        return entries
+
+
+def _create_profiler(interval: float):
+    """A pyinstrument profiler in async mode, or the built-in sampler without it.
+
+    pyinstrument is imported here, on the first profiled request, to keep it
+    off the startup path.
+    """
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        return SamplingProfiler(interval)
+    return Profiler(interval=interval, async_mode="enabled")
+
+
+def _render(profiler, name: str) -> str:
+    """Speedscope JSON of a stopped profiler of either kind."""
+    if isinstance(profiler, SamplingProfiler):
+        return json.dumps(profiler.speedscope(name))
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    return profiler.output(SpeedscopeRenderer())
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling tool requests that opt in or are sampled."""
+
+    def __init__(self, app, store: ProfileStore, endpoint_label: Callable[[str], str],
+                 token: str = "", sample_rate: float = 0.0, interval: float = 0.001):
+        self.app = app
+        self.store = store
+        self.endpoint_label = endpoint_label
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._active = threading.Lock()
+
+    def _wants_profile(self, scope) -> bool:
+        if scope["type"] != "http" or not scope["path"].startswith(PROFILED_PATH_PREFIX):
+            return False
+        if self.token and Headers(scope=scope).get(PROFILE_HEADER) == self.token:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send) -> None:
+        if not self._wants_profile(scope) or not self._active.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+        try:
+            name = self.store.new_name(self.endpoint_label(scope["path"]))
+
+            async def send_with_profile_id(message) -> None:
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message)[PROFILE_ID_HEADER] = name
+                await send(message)
+
+            profiler = _create_profiler(self.interval)
+            profiler.start()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profiler.stop()
+                # Failed requests are stored too; they are often the interesting ones
+                await self._store(profiler, name)
+        finally:
+            self._active.release()
+
+    async def _store(self, profiler, name: str) -> None:
+        try:
+            content = await asyncio.to_thread(_render, profiler, name)
+            await asyncio.to_thread(self.store.write, name, content)
+        except OSError as e:
+            logger.warning(f"Could not store profile {name}: {e}")
@@ -0,0 +1,408 @@
+"""Local relevance scoring of papers against a search query.
+
+Scores are Okapi BM25 over each paper's title and abstract, computed for a
+whole result set in one vectorized NumPy pass: the set is joined into a
+single normalized string, query terms are located with C-level substring
+search and attributed to documents by binary search over their offsets, and
+term frequencies, length normalization and IDF weighting are array operations.
+No network calls are made, so scoring works offline and costs nothing.
+
+CascadeRanker puts an optional expensive reranker (see ``rerankers``) behind
+this scorer: BM25 ranks the whole result set and only the best few papers,
+within a token and latency budget, are sent to the second stage, whose
+scores can be cached.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from ..config import (
+    DEFAULT_RERANK_BATCH_SIZE,
+    DEFAULT_RERANK_LATENCY_BUDGET_MS,
+    DEFAULT_RERANK_TOKEN_BUDGET,
+    DEFAULT_RERANK_TOP_K,
+    get_settings,
+)
+from ..utils import DEFAULT_ENCODING
+from .chunks import count_tokens
+from .relevance_cache import RelevanceCache, get_relevance_cache
+from .rerankers import create_reranker, estimate_tokens
+
+logger = logging.getLogger("arxiv-mcp-server")
+
+# Constants
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Title tokens count this many times towards term frequency and length.
+TITLE_WEIGHT = 2.0
+SCORER_VERSION = "bm25-1"
+
+# ASCII punctuation becomes a space so every word is delimited by spaces.
+_PUNCTUATION_TO_SPACE = str.maketrans({chr(c): " " for c in range(128) if not chr(c).isalnum()})
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this "
+    "to was were which with we our using via into over about paper papers".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word tokens of a text, split the same way documents are."""
+    return text.lower().translate(_PUNCTUATION_TO_SPACE).split()
+
+
+def _query_terms(query: str) -> List[str]:
+    """Distinct query terms without stopwords, in query order."""
+    terms = [term for term in tokenize(query) if term not in _STOPWORDS]
+    return list(dict.fromkeys(terms)) or list(dict.fromkeys(tokenize(query)))
+
+
+def query_fingerprint(query: str) -> str:
+    """Stable key of a query for caching reranker scores.
+
+    Only case and runs of whitespace are normalized away: a reranker reads
+    the query as written, so word order and stopwords can change its scores.
+    """
+    normalized = " ".join(query.casefold().split())
+    return hashlib.sha1(normalized.encode(DEFAULT_ENCODING)).hexdigest()
+
+
+def _variants(term: str) -> List[str]:
+    """Surface forms that count as the same term (singular and plural)."""
+    forms = {term, term + "s"}
+    if term.endswith("s") and not term.endswith("ss") and len(term) > 3:
+        forms.add(term[:-1])
+    if term.endswith("y") and len(term) > 3:
+        forms.add(term[:-1] + "ies")
+    if term.endswith("ies") and len(term) > 4:
+        forms.add(term[:-3] + "y")
+    return sorted(forms)
+
+
+def _paper_fields(paper_data: Dict[str, Any]) -> tuple:
+    """Title and abstract of a paper, accepting arXiv's 'summary' as the abstract."""
+    return (
+        paper_data.get("title") or "",
+        paper_data.get("abstract") or paper_data.get("summary") or "",
+    )
+
+
+def _corpus(texts: List[str]) -> tuple:
+    """Join texts into one normalized string; return it with each text's start offset."""
+    lengths = np.fromiter((len(text) + 1 for text in texts), dtype=np.int64, count=len(texts))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    corpus = (" ".join(texts) + " ").lower().translate(_PUNCTUATION_TO_SPACE)
+    return " " + corpus, starts + 1
+
+
+def _term_hits(corpus: str, term_forms: List[List[str]]) -> tuple:
+    """Find every occurrence of every query term as (positions, columns) arrays.
+
+    Each term costs one scan for the prefix its forms share; only the words
+    starting with that prefix are compared against the forms.
+    """
+    positions, hit_columns = [], []
+    for column, forms in enumerate(term_forms):
+        accepted = set(forms)
+        needle = " " + os.path.commonprefix(forms)
+        position = corpus.find(needle)
+        while position >= 0:
+            end = corpus.find(" ", position + 1)
+            if corpus[position + 1:end] in accepted:
+                positions.append(position + 1)
+                hit_columns.append(column)
+            # The word's trailing space may start the next match.
+            position = corpus.find(needle, end)
+    return np.asarray(positions, dtype=np.int64), np.asarray(hit_columns, dtype=np.int64)
+
+
+class RelevanceScorer:
+    """BM25 relevance scorer normalized to the 0-1 range."""
+
+    version = SCORER_VERSION
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B, title_weight: float = TITLE_WEIGHT):
+        """Configure BM25 term saturation (k1), length normalization (b) and title boost."""
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+
+    def score_papers(self, query: str, papers: Sequence[Dict[str, Any]]) -> List[float]:
+        """Score a result set against a query in one vectorized pass.
+
+        Document frequencies come from the result set itself. Each score is
+        the IDF-weighted share of the best attainable BM25 term saturation,
+        so 1.0 means every query term occurs often in the paper.
+        """
+        return self.score_page(query, papers)[0]
+
+    def score_page(self, query: str, papers: Sequence[Dict[str, Any]],
+                   reference: Optional[Dict[str, Any]] = None) -> tuple:
+        """Score one page of a longer result list; return (scores, reference).
+
+        Without ``reference`` the page's own term weights and average length
+        are used and returned as the reference. Passing the first page's
+        reference when scoring later pages keeps all scores on one scale.
+        """
+        terms = _query_terms(query)
+        if not papers or not terms:
+            return [0.0] * len(papers), reference
+
+        term_forms = [_variants(term) for term in terms]
+        n_docs, n_terms = len(papers), len(terms)
+        titles, abstracts = zip(*map(_paper_fields, papers))
+
+        tf = np.zeros(n_docs * n_terms)
+        # Document length is measured in characters; BM25 only uses it relative to the mean.
+        doc_lengths = np.zeros(n_docs)
+        for texts, weight in ((titles, self.title_weight), (abstracts, 1.0)):
+            corpus, starts = _corpus(list(texts))
+            positions, hit_columns = _term_hits(corpus, term_forms)
+            docs = np.searchsorted(starts, positions, side="right") - 1
+            tf += weight * np.bincount(docs * n_terms + hit_columns, minlength=n_docs * n_terms)
+            doc_lengths += weight * np.diff(np.append(starts, len(corpus)))
+        tf = tf.reshape(n_docs, n_terms)
+
+        if reference is None:
+            document_frequency = np.count_nonzero(tf, axis=0)
+            reference = {
+                "average_length": doc_lengths.mean() or 1.0,
+                "idf": np.log1p((n_docs - document_frequency + 0.5) / (document_frequency + 0.5)),
+            }
+        norm = self.k1 * (1.0 - self.b + self.b * doc_lengths / reference["average_length"])
+        saturation = tf * (self.k1 + 1.0) / (tf + norm[:, None])
+
+        idf = reference["idf"]
+        scores = saturation @ idf / ((self.k1 + 1.0) * idf.sum())
+        return np.clip(scores, 0.0, 1.0).round(4).tolist(), reference
+
+    async def score_paper(self, query: str, paper_data: Dict[str, Any]) -> float:
+        """Score a single paper against a query."""
+        return self.score_papers(query, [paper_data])[0]
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+class CascadeRanker:
+    """Two-stage ranking: BM25 over every paper, then a reranker over the best few."""
+
+    def __init__(
+        self,
+        scorer: RelevanceScorer,
+        reranker=None,
+        top_k: int = DEFAULT_RERANK_TOP_K,
+        latency_budget_ms: int = DEFAULT_RERANK_LATENCY_BUDGET_MS,
+        token_budget: int = DEFAULT_RERANK_TOKEN_BUDGET,
+        cost_per_1k_tokens: float = 0.0,
+        cache: Optional[RelevanceCache] = None,
+        batch_size: int = DEFAULT_RERANK_BATCH_SIZE,
+    ):
+        """Rerank at most ``top_k`` papers, with the calls bounded in time and prompt tokens."""
+        self.scorer = scorer
+        self.reranker = reranker
+        self.top_k = top_k
+        self.latency_budget_ms = latency_budget_ms
+        self.token_budget = token_budget
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+
+    def _rerank_candidates(self, query: str, papers: Sequence[Dict[str, Any]], order: List[int]) -> List[int]:
+        """Best first-stage papers, at most top_k, whose prompt fits the token budget."""
+        budget = self.token_budget - count_tokens(query)
+        candidates = []
+        for index in order[:self.top_k]:
+            budget -= estimate_tokens(papers[index])
+            if budget < 0:
+                break
+            candidates.append(index)
+        return candidates
+
+    async def _rerank(self, query: str, papers: Sequence[Dict[str, Any]], candidates: List[int],
+                      scores: List[float], deadline: Optional[float]) -> tuple:
+        """Rescore candidates in place; return (stage report, reranked indices, degraded indices).
+
+        Candidates are sent in concurrent batches of ``batch_size``. Batches
+        that fail or miss the time limit (the latency budget or the request
+        deadline, whichever comes first) keep their BM25 scores and are
+        reported as degraded.
+        """
+        stage = {"stage": "rerank", "scorer": self.reranker.name, "papers": len(candidates),
+                 "ms": 0.0, "tokens": 0, "cost_usd": 0.0, "status": "ok"}
+        if not candidates:
+            stage["status"] = "skipped"
+            return stage, [], []
+        started = time.perf_counter()
+        timeout = self.latency_budget_ms / 1000
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        if timeout <= 0:
+            stage["status"] = "deadline"
+            stage["degraded"] = len(candidates)
+            return stage, [], list(candidates)
+
+        batches = [candidates[start:start + self.batch_size] for start in range(0, len(candidates), self.batch_size)]
+        tasks = {
+            asyncio.ensure_future(self.reranker.score(query, [papers[index] for index in batch])): batch
+            for batch in batches
+        }
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+
+        reranked, errors = [], []
+        for task in done:
+            if task.exception() is not None:
+                errors.append(str(task.exception()))
+                continue
+            new_scores, tokens = task.result()
+            for index, score in zip(tasks[task], new_scores):
+                scores[index] = score
+            reranked.extend(tasks[task])
+            stage["tokens"] += tokens
+        scored = set(reranked)
+        degraded = [index for index in candidates if index not in scored]
+
+        if errors:
+            logger.warning(f"Reranker {self.reranker.name} failed: {errors[0]}")
+            stage["message"] = errors[0]
+        if degraded:
+            stage["status"] = "partial" if reranked else ("error" if errors and not pending else "timeout")
+        stage["degraded"] = len(degraded)
+        stage["cost_usd"] = round(stage["tokens"] * self.cost_per_1k_tokens / 1000, 6)
+        stage["ms"] = _elapsed_ms(started)
+        return stage, reranked, degraded
+
+    async def _rerank_cached(self, query: str, papers: Sequence[Dict[str, Any]], candidates: List[int],
+                             scores: List[float], deadline: Optional[float]) -> tuple:
+        """Rerank candidates, serving cached reranker scores; return (stage reports, reranked, degraded).
+
+        Only candidates carrying an ``id`` that the same reranker version
+        scored for the same normalized query before are hits; the rest go to
+        the reranker and its scores are stored. Degraded candidates are not
+        stored, so the next request tries the reranker again.
+        """
+        if self.cache is None:
+            stage, reranked, degraded = await self._rerank(query, papers, candidates, scores, deadline)
+            return [stage], reranked, degraded
+
+        started = time.perf_counter()
+        query_key = query_fingerprint(query)
+        paper_ids = {index: str(papers[index].get("id") or "") for index in candidates}
+        cached = self.cache.get_many(
+            query_key, self.reranker.version, [paper_id for paper_id in paper_ids.values() if paper_id]
+        )
+        hits = [index for index in candidates if paper_ids[index] in cached]
+        for index in hits:
+            scores[index] = cached[paper_ids[index]]["score"]
+        cache_stage = {
+            "stage": "cache", "scorer": self.reranker.name, "papers": len(candidates), "hits": len(hits),
+            "saved_ms": round(sum(cached[paper_ids[index]]["cost_ms"] for index in hits), 2),
+            "ms": _elapsed_ms(started), "tokens": 0, "cost_usd": 0.0, "status": "ok",
+        }
+
+        misses = [index for index in candidates if paper_ids[index] not in cached]
+        stage, reranked, degraded = await self._rerank(query, papers, misses, scores, deadline)
+        self.cache.put_many(query_key, self.reranker.version, {
+            paper_ids[index]: {
+                "score": scores[index], "reranked": True,
+                "cost_ms": stage["ms"] / len(reranked), "tokens": stage["tokens"] // len(reranked),
+            }
+            for index in reranked if paper_ids[index]
+        })
+        return [cache_stage, stage], hits + reranked, degraded
+
+    async def rank(self, query: str, papers: Sequence[Dict[str, Any]], rerank: bool = True,
+                   deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Score and order papers, reporting each stage's timing and cost.
+
+        Returns ``scores`` in input order and ``order``, the paper indices best
+        first: reranked papers ahead of the rest, each group sorted by score.
+        ``deadline`` is a ``time.monotonic()`` value bounding the reranker
+        along with the latency budget. Papers the reranker failed to score in
+        time keep their BM25 score and are listed by index in ``degraded``.
+
+        BM25 always scores the whole set, since its term weights depend on
+        the set, and the rerank candidates are the best of that ranking. With
+        a cache, only the reranker's scores are cached, so a cached score can
+        replace a candidate's reranker call but never decides candidacy.
+        """
+        started = time.perf_counter()
+        scores = self.scorer.score_papers(query, papers)
+        order = sorted(range(len(papers)), key=lambda index: -scores[index])
+        stages = [{"stage": "prefilter", "scorer": self.scorer.version, "papers": len(papers),
+                   "ms": _elapsed_ms(started), "tokens": 0, "cost_usd": 0.0, "status": "ok"}]
+
+        reranked, degraded = [], []
+        if self.reranker is not None and rerank:
+            candidates = self._rerank_candidates(query, papers, order)
+            rerank_stages, reranked, degraded = await self._rerank_cached(query, papers, candidates, scores, deadline)
+            stages.extend(rerank_stages)
+
+        is_reranked = set(reranked)
+        order = sorted(range(len(papers)), key=lambda index: (index not in is_reranked, -scores[index]))
+        return {
+            "scores": scores,
+            "order": order,
+            "reranked": len(is_reranked),
+            "degraded": sorted(degraded),
+            "stages": stages,
+            "ms": _elapsed_ms(started),
+            "cost_usd": sum(stage["cost_usd"] for stage in stages),
+        }
+
+
+# Global relevance scorer instances
+_relevance_scorer: Optional[RelevanceScorer] = None
+_cascade_ranker: Optional[CascadeRanker] = None
+_scorer_lock = threading.Lock()
+
+
+def get_relevance_scorer() -> RelevanceScorer:
+    """Get or create the global relevance scorer."""
+    global _relevance_scorer
+    if _relevance_scorer is None:
+        with _scorer_lock:
+            if _relevance_scorer is None:
+                _relevance_scorer = RelevanceScorer()
+    return _relevance_scorer
+
+
+def get_cascade_ranker() -> CascadeRanker:
+    """Get or create the ranking cascade configured by the RERANK_* settings.
+
+    A reranker that cannot be created (missing package or API key) is logged
+    and left out, so ranking falls back to BM25 alone.
+    """
+    global _cascade_ranker
+    if _cascade_ranker is None:
+        scorer = get_relevance_scorer()
+        with _scorer_lock:
+            if _cascade_ranker is None:
+                settings = get_settings()
+                try:
+                    reranker = create_reranker(
+                        settings.RERANK_BACKEND, settings.RERANK_MODEL, settings.OPENAI_API_KEY
+                    )
+                except ValueError as e:
+                    logger.warning(f"Reranking disabled: {e}")
+                    reranker = None
+                _cascade_ranker = CascadeRanker(
+                    scorer,
+                    reranker,
+                    settings.RERANK_TOP_K,
+                    settings.RERANK_LATENCY_BUDGET_MS,
+                    settings.RERANK_TOKEN_BUDGET,
+                    settings.RERANK_COST_PER_1K_TOKENS,
+                    get_relevance_cache() if settings.RELEVANCE_CACHE_ENTRIES > 0 else None,
+                    settings.RERANK_BATCH_SIZE,
+                )
+    return _cascade_ranker
@@ -0,0 +1,159 @@
+"""Persistent cache of reranker relevance scores.
+
+Scores are stored in SQLite keyed by (query fingerprint, reranker, paper id),
+so repeated and replayed searches skip the reranker calls, across restarts
+too. BM25 scores are not cached: they are cheap and depend on the whole
+result set. Each entry records what computing it cost in time and tokens, which is
+reported as saved whenever the entry is hit. The cache is bounded: once it
+holds more than ``max_entries`` rows the least recently used are evicted.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+from ..config import get_settings
+from ..utils import connect_sqlite
+
+# Constants
+RELEVANCE_CACHE_FILE_NAME = ".relevance_cache.sqlite3"
+# Eviction trims the cache to this share of its capacity, so it does not run on every put.
+EVICTION_TARGET = 0.9
+# Stay well below SQLite's limit on bound parameters per statement.
+LOOKUP_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    query_key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    score REAL NOT NULL,
+    reranked INTEGER NOT NULL DEFAULT 0,
+    cost_ms REAL NOT NULL DEFAULT 0,
+    tokens INTEGER NOT NULL DEFAULT 0,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (query_key, version, paper_id)
+);
+CREATE INDEX IF NOT EXISTS scores_used_at ON scores (used_at);
+"""
+
+
+class RelevanceCache:
+    """Bounded LRU cache of (query, reranker, paper) relevance scores."""
+
+    def __init__(self, db_path: Path, max_entries: int):
+        """Open (and create if needed) the cache database."""
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._size = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._saved_ms = 0.0
+        self._saved_tokens = 0
+
+    def get_many(self, query_key: str, version: str, paper_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """Look up many papers at once; return the cached entries by paper id."""
+        found = {}
+        unique_ids = list(dict.fromkeys(paper_ids))
+        with self._lock:
+            for start in range(0, len(unique_ids), LOOKUP_BATCH_SIZE):
+                batch = unique_ids[start:start + LOOKUP_BATCH_SIZE]
+                rows = self._conn.execute(
+                    "SELECT paper_id, score, reranked, cost_ms, tokens FROM scores "
+                    f"WHERE query_key = ? AND version = ? AND paper_id IN ({','.join('?' * len(batch))})",
+                    (query_key, version, *batch),
+                ).fetchall()
+                for row in rows:
+                    found[row["paper_id"]] = {
+                        "score": row["score"],
+                        "reranked": bool(row["reranked"]),
+                        "cost_ms": row["cost_ms"],
+                        "tokens": row["tokens"],
+                    }
+            if found:
+                now = time.time()
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE scores SET used_at = ? WHERE query_key = ? AND version = ? AND paper_id = ?",
+                        [(now, query_key, version, paper_id) for paper_id in found],
+                    )
+            self._hits += len(found)
+            self._misses += len(unique_ids) - len(found)
+            self._saved_ms += sum(entry["cost_ms"] for entry in found.values())
+            self._saved_tokens += sum(entry["tokens"] for entry in found.values())
+        return found
+
+    def put_many(self, query_key: str, version: str, entries: Dict[str, Dict[str, Any]]) -> None:
+        """Store entries given by paper id as {score, reranked, cost_ms, tokens}."""
+        if not entries or self.max_entries <= 0:
+            return
+        now = time.time()
+        rows = [
+            (query_key, version, paper_id, entry["score"], int(entry.get("reranked", False)),
+             entry.get("cost_ms", 0.0), entry.get("tokens", 0), now)
+            for paper_id, entry in entries.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            # Replacements make this an overestimate; it is corrected before evicting.
+            self._size += len(rows)
+            if self._size > self.max_entries:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Drop the least recently used entries; must be called with the lock held."""
+        self._size = self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        excess = self._size - int(self.max_entries * EVICTION_TARGET)
+        if self._size > self.max_entries and excess > 0:
+            self._conn.execute(
+                "DELETE FROM scores WHERE rowid IN (SELECT rowid FROM scores ORDER BY used_at LIMIT ?)",
+                (excess,),
+            )
+            self._size -= excess
+            self._evictions += excess
+
+    def clear(self) -> None:
+        """Drop every cached score."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM scores")
+            self._size = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Report hit ratio and the scoring time and tokens hits saved."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "saved_ms": round(self._saved_ms, 2),
+                "saved_tokens": self._saved_tokens,
+                "evictions": self._evictions,
+                "entries": self._size,
+                "max_entries": self.max_entries,
+            }
+
+
+# Global relevance cache instance
+_relevance_cache: Optional[RelevanceCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_relevance_cache() -> RelevanceCache:
+    """Get or create the global relevance cache."""
+    global _relevance_cache
+    if _relevance_cache is None:
+        with _cache_lock:
+            if _relevance_cache is None:
+                settings = get_settings()
+                _relevance_cache = RelevanceCache(
+                    settings.storage_path / RELEVANCE_CACHE_FILE_NAME,
+                    settings.RELEVANCE_CACHE_ENTRIES,
+                )
+    return _relevance_cache
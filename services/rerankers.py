@@ -0,0 +1,161 @@
+"""Expensive second-stage relevance scorers for the ranking cascade.
+
+Each reranker scores a short list of papers against a query and reports how
+many tokens the call consumed. ``stub`` runs locally and needs nothing
+installed, ``cross-encoder`` runs a sentence-transformers cross-encoder on
+the CPU, and ``llm`` asks an OpenAI chat model for scores in one request.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ..utils import DEFAULT_ENCODING
+from .chunks import count_tokens
+from .embeddings import HashingEmbedder
+
+# Constants
+RERANK_BACKEND_NONE = "none"
+RERANK_BACKEND_STUB = "stub"
+RERANK_BACKEND_CROSS_ENCODER = "cross-encoder"
+RERANK_BACKEND_LLM = "llm"
+DEFAULT_CROSS_ENCODER_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+DEFAULT_LLM_MODEL = "gpt-4o-mini"
+OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
+STUB_DIMENSION = 512
+# Abstracts are cut to this many characters before reranking.
+MAX_ABSTRACT_CHARS = 1500
+# Prompt tokens spent per paper on numbering and formatting.
+PAPER_OVERHEAD_TOKENS = 8
+LLM_INSTRUCTIONS = (
+    "Rate how relevant each numbered paper is to the search query, from 0 (unrelated) "
+    'to 1 (exactly what is sought). Reply with JSON: {"scores": [one number per paper, in order]}.'
+)
+# Bump when rerank_text changes what a reranker is shown, so cached scores are not reused.
+RERANK_TEXT_VERSION = 1
+
+
+def rerank_text(paper_data: Dict[str, Any]) -> str:
+    """Title and (truncated) abstract of a paper as shown to a reranker."""
+    title = paper_data.get("title") or ""
+    abstract = paper_data.get("abstract") or paper_data.get("summary") or ""
+    return f"{title}\n{abstract[:MAX_ABSTRACT_CHARS]}"
+
+
+def cache_version(model: str, prompt: str = "") -> str:
+    """Version under which a reranker's scores are cached: model, prompt and paper text format."""
+    prompt_hash = hashlib.sha1(prompt.encode(DEFAULT_ENCODING)).hexdigest()[:12]
+    return f"{model}|prompt-{prompt_hash}|abstract-{MAX_ABSTRACT_CHARS}|text-{RERANK_TEXT_VERSION}"
+
+
+def estimate_tokens(paper_data: Dict[str, Any]) -> int:
+    """Prompt tokens a paper adds to a rerank request."""
+    return count_tokens(rerank_text(paper_data)) + PAPER_OVERHEAD_TOKENS
+
+
+class StubReranker:
+    """Local stand-in for an expensive reranker: cosine of hashed word features.
+
+    Deterministic and free, for tests and offline use. Token usage is what an
+    LLM request would have cost, so budgets behave as they would in production.
+    """
+
+    name = RERANK_BACKEND_STUB
+    version = cache_version(f"{RERANK_BACKEND_STUB}-{STUB_DIMENSION}")
+
+    def __init__(self):
+        self._embedder = HashingEmbedder(STUB_DIMENSION)
+
+    async def score(self, query: str, papers: Sequence[Dict[str, Any]]) -> Tuple[List[float], int]:
+        """Score papers; return (scores, tokens used)."""
+        vectors = self._embedder.embed([query] + [rerank_text(paper) for paper in papers])
+        scores = np.clip(vectors[1:] @ vectors[0], 0.0, 1.0)
+        tokens = count_tokens(query) + sum(estimate_tokens(paper) for paper in papers)
+        return scores.round(4).tolist(), tokens
+
+
+class CrossEncoderReranker:
+    """Reranker running a sentence-transformers cross-encoder locally."""
+
+    def __init__(self, model: str = DEFAULT_CROSS_ENCODER_MODEL):
+        """Load ``model``; requires the optional sentence-transformers package."""
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError:
+            raise ValueError(f"Reranker {model} requires the sentence-transformers package")
+        self.name = model
+        self.version = cache_version(model)
+        self._model = CrossEncoder(model)
+
+    def _predict(self, query: str, papers: Sequence[Dict[str, Any]]) -> List[float]:
+        logits = self._model.predict([(query, rerank_text(paper)) for paper in papers])
+        return [round(1.0 / (1.0 + math.exp(-float(logit))), 4) for logit in logits]
+
+    async def score(self, query: str, papers: Sequence[Dict[str, Any]]) -> Tuple[List[float], int]:
+        """Score papers; return (scores, tokens processed)."""
+        scores = await asyncio.to_thread(self._predict, query, papers)
+        # Every pair is encoded separately, so the query counts once per paper.
+        tokens = sum(count_tokens(query) + estimate_tokens(paper) for paper in papers)
+        return scores, tokens
+
+
+class LLMReranker:
+    """Reranker asking an OpenAI chat model to score all papers in one request."""
+
+    def __init__(self, api_key: str, model: str = DEFAULT_LLM_MODEL):
+        """Configure the model and key; requires the httpx package."""
+        if not api_key:
+            raise ValueError("The llm reranker requires OPENAI_API_KEY")
+        try:
+            import httpx
+        except ImportError:
+            raise ValueError("The llm reranker requires the httpx package")
+        self.name = model
+        self.version = cache_version(model, LLM_INSTRUCTIONS)
+        self._httpx = httpx
+        self._api_key = api_key
+
+    def _prompt(self, query: str, papers: Sequence[Dict[str, Any]]) -> str:
+        listing = "\n\n".join(f"[{number}] {rerank_text(paper)}" for number, paper in enumerate(papers, 1))
+        return f"Query: {query}\n\nPapers:\n{listing}"
+
+    async def score(self, query: str, papers: Sequence[Dict[str, Any]]) -> Tuple[List[float], int]:
+        """Score papers; return (scores, tokens billed)."""
+        payload = {
+            "model": self.name,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+            "messages": [
+                {"role": "system", "content": LLM_INSTRUCTIONS},
+                {"role": "user", "content": self._prompt(query, papers)},
+            ],
+        }
+        async with self._httpx.AsyncClient() as client:
+            response = await client.post(
+                OPENAI_CHAT_URL, json=payload, headers={"Authorization": f"Bearer {self._api_key}"}
+            )
+            response.raise_for_status()
+            body = response.json()
+
+        scores = json.loads(body["choices"][0]["message"]["content"]).get("scores", [])
+        if len(scores) != len(papers):
+            raise ValueError(f"Reranker returned {len(scores)} scores for {len(papers)} papers")
+        tokens = body.get("usage", {}).get("total_tokens", 0)
+        return [round(min(max(float(score), 0.0), 1.0), 4) for score in scores], tokens
+
+
+def create_reranker(backend: str, model: str = "", api_key: str = ""):
+    """Create the reranker for a backend name, or None for ``none``."""
+    if backend == RERANK_BACKEND_NONE:
+        return None
+    if backend == RERANK_BACKEND_STUB:
+        return StubReranker()
+    if backend == RERANK_BACKEND_CROSS_ENCODER:
+        return CrossEncoderReranker(model or DEFAULT_CROSS_ENCODER_MODEL)
+    if backend == RERANK_BACKEND_LLM:
+        return LLMReranker(api_key, model or DEFAULT_LLM_MODEL)
+    raise ValueError(f"Unknown rerank backend: {backend}")
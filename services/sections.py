@@ -0,0 +1,181 @@
+"""Section and page offset index for converted papers.
+
+Conversion records the byte span of every page and heading of the markdown
+in a small JSON file next to it, so readers can seek straight to the part of
+a paper they need instead of loading the whole document.
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils import DEFAULT_ENCODING
+
+# Constants
+SECTION_INDEX_EXTENSION = ".sections.json"
+SECTION_INDEX_VERSION = 1
+MAX_BOLD_HEADING_LENGTH = 80
+
+_MARKDOWN_HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_BOLD_HEADING = re.compile(r"^\*\*\s*((?:[A-Z]|\d+(?:\.\d+)*\.?\s+\S).*?)\s*\*\*\s*$")
+_KNOWN_SECTIONS = re.compile(
+    r"^(?:\d+(?:\.\d+)*\.?\s+)?(abstract|introduction|background|related work|preliminaries|"
+    r"methods?|methodology|approach|experiments?|experimental setup|evaluation|results|"
+    r"discussion|limitations|conclusions?|acknowledge?ments|references|bibliography|appendix)\b",
+    re.IGNORECASE,
+)
+_NUMBERING = re.compile(r"^[\dIVXivx]+(?:\.\d+)*\.?\s+")
+
+
+class SectionNotFoundError(ValueError):
+    """Raised when a requested section or page is not in the index."""
+
+
+def _heading(line: str) -> Optional[Tuple[int, str]]:
+    """Return (level, title) if the markdown line is a section heading."""
+    match = _MARKDOWN_HEADING.match(line)
+    if match:
+        return len(match.group(1)), match.group(2).strip("* ")
+    # pymupdf4llm often renders section titles as bold lines instead of headings.
+    match = _BOLD_HEADING.match(line)
+    if match and len(line) <= MAX_BOLD_HEADING_LENGTH and _KNOWN_SECTIONS.match(match.group(1)):
+        return 2, match.group(1)
+    return None
+
+
+def normalize_section_title(title: str) -> str:
+    """Lower-case a section title and strip numbering and punctuation."""
+    title = _NUMBERING.sub("", title.strip().strip("*#").strip())
+    return " ".join(re.sub(r"[^\w\s]", " ", title.lower()).split())
+
+
+def build_section_index(page_texts: List[str]) -> Dict[str, Any]:
+    """Build the offset index of a markdown document given its page texts.
+
+    The document is the concatenation of ``page_texts``. Pass a single
+    element for documents converted without page information.
+    """
+    pages: List[List[int]] = []
+    headings: List[Dict[str, Any]] = []
+    offset = 0
+    for text in page_texts:
+        page_start = offset
+        for line in text.splitlines(keepends=True):
+            heading = _heading(line.strip())
+            if heading:
+                headings.append({"title": heading[1], "level": heading[0], "start": offset})
+            offset += len(line.encode(DEFAULT_ENCODING))
+        pages.append([page_start, offset])
+
+    # A section runs until the next heading at the same or a higher level.
+    for i, heading in enumerate(headings):
+        heading["end"] = next(
+            (h["start"] for h in headings[i + 1:] if h["level"] <= heading["level"]), offset
+        )
+
+    return {
+        "version": SECTION_INDEX_VERSION,
+        "total_bytes": offset,
+        "pages": pages if len(page_texts) > 1 else [],
+        "sections": headings,
+    }
+
+
+def write_section_index(index: Dict[str, Any], index_path: Path) -> None:
+    """Atomically write a section index next to its markdown file."""
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "w", encoding=DEFAULT_ENCODING) as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, index_path)
+
+
+def load_section_index(index_path: Path, markdown_path: Path) -> Optional[Dict[str, Any]]:
+    """Load a section index, or None if missing or stale for the markdown file."""
+    try:
+        with open(index_path, "r", encoding=DEFAULT_ENCODING) as f:
+            index = json.load(f)
+        if index.get("version") != SECTION_INDEX_VERSION:
+            return None
+        if index.get("total_bytes") != markdown_path.stat().st_size:
+            return None
+        return index
+    except (OSError, ValueError):
+        return None
+
+
+def get_or_build_section_index(index_path: Path, markdown_path: Path) -> Dict[str, Any]:
+    """Load the section index, rebuilding it from the markdown if needed.
+
+    Papers converted before indexing existed are indexed on first use
+    (without page offsets, which need the PDF).
+    """
+    index = load_section_index(index_path, markdown_path)
+    if index is None:
+        with open(markdown_path, "r", encoding=DEFAULT_ENCODING, newline="") as f:
+            index = build_section_index([f.read()])
+        try:
+            write_section_index(index, index_path)
+        except OSError:
+            pass
+    return index
+
+
+def find_section(index: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """Find a section by title: exact match, then prefix, then substring."""
+    wanted = normalize_section_title(name)
+    sections = index["sections"]
+    titles = [normalize_section_title(s["title"]) for s in sections]
+    for matches in (
+        lambda t: t == wanted,
+        lambda t: t.startswith(wanted),
+        lambda t: wanted in t,
+    ):
+        for section, title in zip(sections, titles):
+            if wanted and matches(title):
+                return section
+    available = ", ".join(s["title"] for s in sections) or "none"
+    raise SectionNotFoundError(f"Section '{name}' not found. Available sections: {available}")
+
+
+def parse_page_range(pages: Any) -> Tuple[int, int]:
+    """Parse a 1-based page selection such as 3, "3" or "3-5"."""
+    text = str(pages).strip()
+    first, _, last = text.partition("-")
+    try:
+        start, end = int(first), int(last or first)
+    except ValueError:
+        raise SectionNotFoundError(f"Invalid page range: {pages}")
+    if start < 1 or end < start:
+        raise SectionNotFoundError(f"Invalid page range: {pages}")
+    return start, end
+
+
+def page_span(index: Dict[str, Any], pages: Any) -> Tuple[int, int]:
+    """Get the byte span covering a page range."""
+    page_offsets = index["pages"]
+    if not page_offsets:
+        raise SectionNotFoundError("Page offsets are not available for this paper")
+    start, end = parse_page_range(pages)
+    if start > len(page_offsets):
+        raise SectionNotFoundError(f"Paper has only {len(page_offsets)} pages")
+    end = min(end, len(page_offsets))
+    return page_offsets[start - 1][0], page_offsets[end - 1][1]
+
+
+def outline(index: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Summarize the sections of a paper with their sizes in bytes."""
+    return [
+        {"title": s["title"], "level": s["level"], "bytes": s["end"] - s["start"]}
+        for s in index["sections"]
+    ]
+
+
+def read_span(markdown_path: Path, start: int, end: int) -> str:
+    """Read a byte span of a markdown file without loading the rest."""
+    with open(markdown_path, "rb") as f:
+        f.seek(start)
+        data = f.read(max(0, end - start))
+    # Arbitrary byte ranges may cut a multi-byte character at either end.
+    return data.decode(DEFAULT_ENCODING, errors="ignore")
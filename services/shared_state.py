@@ -0,0 +1,135 @@
+"""State shared by every worker process of the server.
+
+With ``WORKERS`` above one, uvicorn runs several processes with separate
+memory, and consecutive requests of a client may land on different ones.
+State one request writes and a later one reads therefore lives in SQLite
+rather than in module globals: the status of each paper conversion, and
+small JSON documents such as the research context of the analysis prompt.
+Read-modify-write updates run in ``BEGIN IMMEDIATE`` transactions, so
+workers updating the same entry serialize instead of losing writes.
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from ..config import get_settings
+from ..utils import connect_sqlite
+
+# Constants
+SHARED_STATE_FILE_NAME = ".shared_state.sqlite3"
+# An unfinished conversion this old is presumed lost with the worker running it.
+STALE_CONVERSION_SECONDS = 30 * 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    paper_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    completed_at REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS documents (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SharedState:
+    """Conversion statuses and JSON documents visible to all worker processes."""
+
+    def __init__(self, db_path: Path, stale_after: float = STALE_CONVERSION_SECONDS):
+        """Open (and create if needed) the shared state database."""
+        self.db_path = db_path
+        self.stale_after = stale_after
+        self._conn = connect_sqlite(db_path)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def get_conversion(self, paper_id: str) -> Optional[Dict[str, Any]]:
+        """The latest conversion of a paper as {status, started_at, completed_at, error}."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, started_at, completed_at, error FROM conversions WHERE paper_id = ?",
+                (paper_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def start_conversion(self, paper_id: str, status: str) -> Optional[Dict[str, Any]]:
+        """Record a new conversion unless one is already running.
+
+        Returns the running conversion if there is one (and records nothing),
+        or None once this caller owns the new conversion.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT status, started_at, completed_at, error FROM conversions WHERE paper_id = ?",
+                    (paper_id,),
+                ).fetchone()
+                if row and row["completed_at"] is None and now - row["started_at"] < self.stale_after:
+                    self._conn.rollback()
+                    return dict(row)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO conversions VALUES (?, ?, ?, NULL, NULL)",
+                    (paper_id, status, now),
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return None
+
+    def update_conversion(self, paper_id: str, status: str, completed: bool = False,
+                          error: Optional[str] = None) -> None:
+        """Move a conversion to ``status``, stamping its completion time if ``completed``."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE conversions SET status = ?, completed_at = ?, error = COALESCE(?, error) "
+                "WHERE paper_id = ?",
+                (status, time.time() if completed else None, error, paper_id),
+            )
+
+    def get_document(self, key: str, default: Any = None) -> Any:
+        """The JSON document stored under ``key``."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM documents WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def update_document(self, key: str, update: Callable[[Any], Any], default: Any = None) -> Any:
+        """Atomically replace the document under ``key`` with ``update(document)``; return it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT value FROM documents WHERE key = ?", (key,)).fetchone()
+                value = update(json.loads(row["value"]) if row else default)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents VALUES (?, ?)", (key, json.dumps(value))
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return value
+
+
+# Global shared state instance
+_shared_state: Optional[SharedState] = None
+_state_lock = threading.Lock()
+
+
+def get_shared_state() -> SharedState:
+    """Get or create the shared state of this storage path."""
+    global _shared_state
+    if _shared_state is None:
+        with _state_lock:
+            if _shared_state is None:
+                settings = get_settings()
+                _shared_state = SharedState(settings.storage_path / SHARED_STATE_FILE_NAME)
+    return _shared_state
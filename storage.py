@@ -0,0 +1,200 @@
+"""Storage layout and path resolution for stored papers.
+
+Every module resolves paper files through :func:`get_paper_path`, so the
+on-disk layout can be switched between a flat directory and a sharded tree
+(``<YYMM>/<hash bucket>/<paper_id>.<ext>``) from ``Settings``.
+
+An existing flat library can be migrated while the server keeps serving:
+set ``STORAGE_LAYOUT=sharded``, restart, then run::
+
+    python -m arxiv_mcp_server.storage migrate --workers 8
+
+Until a file has been moved, lookups fall back to its flat location.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .config import get_settings
+from .services.chunks import CHUNK_STORE_EXTENSION
+from .services.compression import PRECOMPRESSED_EXTENSIONS
+from .services.sections import SECTION_INDEX_EXTENSION
+from .utils import MARKDOWN_EXTENSION, PDF_EXTENSION, ensure_directory_exists, get_paper_file_path
+
+logger = logging.getLogger("arxiv-mcp-server")
+settings = get_settings()
+
+# Constants
+LAYOUT_FLAT = "flat"
+LAYOUT_SHARDED = "sharded"
+UNDATED_SHARD = "misc"
+DEFAULT_MIGRATION_WORKERS = 8
+
+# Suffixes of every file stored per paper, moved together by the migration.
+PAPER_FILE_EXTENSIONS = [
+    MARKDOWN_EXTENSION, PDF_EXTENSION, SECTION_INDEX_EXTENSION, CHUNK_STORE_EXTENSION,
+    *PRECOMPRESSED_EXTENSIONS,
+]
+
+_NEW_STYLE_ID = re.compile(r"^(\d{4})\.\d{4,5}")
+_OLD_STYLE_ID = re.compile(r"^[a-z\-]+(?:\.[A-Z]{2})?/(\d{4})\d{3}")
+_VERSION_SUFFIX = re.compile(r"v\d+$")
+# A whole arXiv ID of either style, with an optional version suffix.
+_PAPER_ID = re.compile(r"(?:\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?")
+
+
+class InvalidPaperIdError(ValueError):
+    """Raised for a paper ID that is not an arXiv ID, such as one with path separators."""
+
+
+def get_storage_root() -> Path:
+    """Get the root directory of the paper library."""
+    return settings.storage_path
+
+
+def _yymm_prefix(paper_id: str) -> str:
+    """Get the YYMM submission prefix of an arXiv ID."""
+    match = _NEW_STYLE_ID.match(paper_id) or _OLD_STYLE_ID.match(paper_id)
+    return match.group(1) if match else UNDATED_SHARD
+
+
+def _hash_bucket(paper_id: str, buckets: int) -> str:
+    """Get the hash bucket of an arXiv ID, ignoring its version suffix."""
+    base_id = _VERSION_SUFFIX.sub("", paper_id)
+    digest = hashlib.sha1(base_id.encode("utf-8")).hexdigest()
+    width = max(1, (max(buckets, 2) - 1).bit_length() + 3) // 4
+    return f"{int(digest[:8], 16) % buckets:0{width}x}"
+
+
+def shard_directory(paper_id: str, buckets: Optional[int] = None) -> Path:
+    """Get the shard directory of a paper, relative to the storage root."""
+    buckets = buckets or settings.STORAGE_SHARD_BUCKETS
+    return Path(_yymm_prefix(paper_id)) / _hash_bucket(paper_id, buckets)
+
+
+def get_paper_directory(paper_id: str, layout: Optional[str] = None) -> Path:
+    """Get the directory a paper's files belong in under the given layout."""
+    layout = layout or settings.STORAGE_LAYOUT
+    root = get_storage_root()
+    if layout == LAYOUT_SHARDED:
+        return root / shard_directory(paper_id)
+    return root
+
+
+def get_paper_path(paper_id: str, extension: str = MARKDOWN_EXTENSION, create: bool = False) -> Path:
+    """Resolve the file path of a paper.
+
+    With ``create`` the canonical location is returned and its directory is
+    created, which is what writers want. Readers get the canonical location
+    too, unless the library is sharded and the file still sits at its
+    pre-migration flat location.
+
+    IDs that are not arXiv IDs, or would resolve outside the storage root,
+    raise InvalidPaperIdError; paper IDs come straight from requests.
+    """
+    if not _PAPER_ID.fullmatch(paper_id):
+        raise InvalidPaperIdError(f"Invalid arXiv paper ID: {paper_id}")
+    path = get_paper_file_path(get_paper_directory(paper_id), paper_id, extension)
+    if not path.resolve().is_relative_to(get_storage_root().resolve()):
+        raise InvalidPaperIdError(f"Invalid arXiv paper ID: {paper_id}")
+    if create:
+        ensure_directory_exists(path.parent)
+        return path
+    if settings.STORAGE_LAYOUT == LAYOUT_SHARDED and not path.exists():
+        legacy_path = get_paper_file_path(get_storage_root(), paper_id, extension)
+        if legacy_path.exists():
+            return legacy_path
+    return path
+
+
+def split_paper_file_name(name: str) -> Optional[Tuple[str, str]]:
+    """Split a stored file name into (paper_id, extension), if it is a paper file."""
+    if name.startswith("."):
+        return None
+    for extension in sorted(PAPER_FILE_EXTENSIONS, key=len, reverse=True):
+        if name.endswith(extension) and len(name) > len(extension):
+            return name[:-len(extension)], extension
+    return None
+
+
+def _iter_flat_files(root: Path) -> Iterator[Tuple[Path, str, str]]:
+    """Yield (path, paper_id, extension) for paper files at the storage root."""
+    with os.scandir(root) as it:
+        for item in it:
+            if not item.is_file():
+                continue
+            parts = split_paper_file_name(item.name)
+            if parts:
+                yield Path(item.path), parts[0], parts[1]
+
+
+def _move_file(source: Path, paper_id: str, extension: str) -> bool:
+    """Move one file into its shard; return True if it was moved.
+
+    The file is hard-linked into place before the flat copy is removed, so a
+    concurrent reader always finds it at one of the two locations.
+    """
+    target = get_paper_file_path(get_storage_root() / shard_directory(paper_id), paper_id, extension)
+    ensure_directory_exists(target.parent)
+    try:
+        os.link(source, target)
+        os.unlink(source)
+    except FileExistsError:
+        # Already migrated by an earlier or concurrent run; keep the newer copy.
+        if source.stat().st_mtime > target.stat().st_mtime:
+            os.replace(source, target)
+        else:
+            os.unlink(source)
+    except OSError:
+        # Hard links unsupported (or cross-device); fall back to a move.
+        shutil.move(str(source), str(target))
+    return True
+
+
+def migrate_to_sharded(workers: int = DEFAULT_MIGRATION_WORKERS) -> int:
+    """Move a flat library into the sharded layout in parallel.
+
+    Safe to run while the server is serving and safe to re-run after an
+    interruption. Returns the number of files moved.
+    """
+    root = get_storage_root()
+    files: List[Tuple[Path, str, str]] = list(_iter_flat_files(root))
+    logger.info(f"Migrating {len(files)} files in {root} with {workers} workers")
+
+    moved = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_move_file, *item) for item in files]
+        for future in futures:
+            try:
+                moved += future.result()
+            except OSError as e:
+                logger.error(f"Failed to migrate file: {e}")
+
+    logger.info(f"Migrated {moved} of {len(files)} files")
+    return moved
+
+
+def main() -> None:
+    """Command line entry point for storage maintenance."""
+    parser = argparse.ArgumentParser(description="arXiv paper storage maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate = subparsers.add_parser("migrate", help="Move a flat library into the sharded layout")
+    migrate.add_argument("--workers", type=int, default=DEFAULT_MIGRATION_WORKERS)
+    args, _ = parser.parse_known_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "migrate":
+        if settings.STORAGE_LAYOUT != LAYOUT_SHARDED:
+            parser.error("set STORAGE_LAYOUT=sharded and restart the server before migrating")
+        migrate_to_sharded(args.workers)
+
+
+if __name__ == "__main__":
+    main()
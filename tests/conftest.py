@@ -0,0 +1,26 @@
+"""Shared setup: import the repository as ``arxiv_mcp_server`` with scratch storage.
+
+The repository root is the package itself, so when it is not installed a
+scratch directory holding an ``arxiv_mcp_server`` link to it goes on the
+import path, for the tests and the interpreters they start. Settings are
+read once per process, so storage is pointed at a scratch directory before
+anything is imported.
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+PACKAGE = "arxiv_mcp_server"
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_scratch = Path(tempfile.mkdtemp(prefix="arxiv-mcp-tests-"))
+os.environ["STORAGE_PATH"] = str(_scratch / "storage")
+os.environ["LIBRARY_WATCHER"] = "off"
+
+if importlib.util.find_spec(PACKAGE) is None:
+    (_scratch / PACKAGE).symlink_to(REPO_ROOT, target_is_directory=True)
+    sys.path.insert(0, str(_scratch))
+    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [str(_scratch), os.environ.get("PYTHONPATH")]))
@@ -0,0 +1,70 @@
+"""Admission control: bounded queues, rejection with Retry-After, and the server's 429 answer."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from arxiv_mcp_server import server
+from arxiv_mcp_server.services.admission import (
+    MAX_RETRY_AFTER,
+    MIN_RETRY_AFTER,
+    AdmissionController,
+    AdmissionLimit,
+    AdmissionRejected,
+)
+
+
+def test_full_queue_rejects_with_retry_after():
+    async def scenario():
+        limit = AdmissionLimit("tool", concurrency=1, queue_size=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limit.admit():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert limit.get_stats()["waiting"] == 1
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with limit.admit():
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.tool == "tool"
+    assert MIN_RETRY_AFTER <= rejected.retry_after <= MAX_RETRY_AFTER
+
+
+def test_retry_after_grows_with_the_queue():
+    limit = AdmissionLimit("tool", concurrency=1, queue_size=100)
+    limit._call_seconds = 2.0
+    short = limit.retry_after()
+    limit._waiting = 10
+    assert limit.retry_after() > short
+    limit._waiting = 10_000
+    assert limit.retry_after() == MAX_RETRY_AFTER
+
+
+def test_tool_at_capacity_gets_429(monkeypatch):
+    controller = AdmissionController({"read_paper": 1}, {"read_paper": 0})
+    monkeypatch.setattr(server, "admission", controller)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async with controller.admit("read_paper"):
+                busy = await client.post("/tools/read_paper", json={"paper_id": "2301.00001"})
+            free = await client.post("/tools/read_paper", json={"paper_id": "2301.00001"})
+        return busy, free
+
+    busy, free = asyncio.run(scenario())
+    assert busy.status_code == 429
+    assert int(busy.headers["Retry-After"]) >= MIN_RETRY_AFTER
+    assert "read_paper" in busy.json()["detail"]
+    assert free.status_code == 200
@@ -0,0 +1,41 @@
+"""Cold-start import checks, run in fresh interpreters as a worker would import the server."""
+
+import json
+import statistics
+import subprocess
+import sys
+
+from arxiv_mcp_server.benchmarks.bench_import_time import CHILD, DEFAULT_BUDGET_MS, DEFERRED_MODULES
+
+RUNS = 3
+# Only the server needs these; importing the package alone must not load them.
+SERVER_MODULES = ("arxiv_mcp_server.server", "fastapi", "numpy")
+
+PACKAGE_CHILD = """
+import json, sys
+import arxiv_mcp_server
+print(json.dumps({"loaded": [name for name in sys.argv[1:] if name in sys.modules]}))
+"""
+
+
+def _run_child(code, modules, cwd):
+    # A working directory outside the repository keeps its modules from shadowing the stdlib.
+    result = subprocess.run(
+        [sys.executable, "-c", code, *modules], cwd=cwd, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+def test_server_import_defers_heavy_modules(tmp_path):
+    run = _run_child(CHILD, DEFERRED_MODULES, tmp_path)
+    assert run["loaded"] == []
+
+
+def test_server_import_within_budget(tmp_path):
+    runs = [_run_child(CHILD, (), tmp_path) for _ in range(RUNS)]
+    assert statistics.median(run["seconds"] for run in runs) * 1000 <= DEFAULT_BUDGET_MS
+
+
+def test_package_import_does_not_load_server(tmp_path):
+    run = _run_child(PACKAGE_CHILD, SERVER_MODULES + DEFERRED_MODULES, tmp_path)
+    assert run["loaded"] == []
@@ -0,0 +1,43 @@
+"""Conversion claims in the shared state database, as used by every worker process."""
+
+import threading
+
+from arxiv_mcp_server.services.shared_state import SharedState
+
+WORKERS = 8
+
+
+def test_only_one_concurrent_claim_wins(tmp_path):
+    # One SharedState per thread, like separate worker processes sharing the database file.
+    db_path = tmp_path / "state.sqlite3"
+    states = [SharedState(db_path) for _ in range(WORKERS)]
+    barrier = threading.Barrier(WORKERS)
+    results = [None] * WORKERS
+
+    def claim(worker):
+        barrier.wait()
+        results[worker] = states[worker].start_conversion("2301.00001", "downloading")
+
+    threads = [threading.Thread(target=claim, args=(worker,)) for worker in range(WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    winners = [result for result in results if result is None]
+    assert len(winners) == 1
+    assert all(result["status"] == "downloading" for result in results if result is not None)
+
+
+def test_finished_conversion_can_be_claimed_again(tmp_path):
+    state = SharedState(tmp_path / "state.sqlite3")
+    assert state.start_conversion("2301.00001", "downloading") is None
+    assert state.start_conversion("2301.00001", "downloading") is not None
+    state.update_conversion("2301.00001", "error", completed=True, error="boom")
+    assert state.start_conversion("2301.00001", "downloading") is None
+
+
+def test_stale_claim_is_taken_over(tmp_path):
+    state = SharedState(tmp_path / "state.sqlite3", stale_after=0)
+    assert state.start_conversion("2301.00001", "downloading") is None
+    assert state.start_conversion("2301.00001", "downloading") is None
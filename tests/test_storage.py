@@ -0,0 +1,34 @@
+"""Paper path resolution: valid arXiv IDs resolve under the storage root, anything else is refused."""
+
+import pytest
+
+from arxiv_mcp_server.storage import InvalidPaperIdError, get_paper_path, get_storage_root
+
+
+@pytest.mark.parametrize("paper_id", ["2301.00001", "2301.00001v2", "0704.0001", "hep-th/9901001v1"])
+def test_arxiv_ids_resolve_inside_storage_root(paper_id):
+    path = get_paper_path(paper_id, ".md")
+    assert path.resolve().is_relative_to(get_storage_root().resolve())
+
+
+@pytest.mark.parametrize("paper_id", [
+    "../etc/passwd",
+    "../../2301.00001",
+    "2301.00001/../../x",
+    "/etc/passwd",
+    "hep-th/../../9901001",
+    "2301.00001\x00",
+    "..",
+    "",
+])
+def test_traversal_ids_are_rejected(paper_id):
+    with pytest.raises(InvalidPaperIdError):
+        get_paper_path(paper_id, ".md")
+
+
+def test_rejected_id_creates_nothing():
+    root = get_storage_root()
+    before = set(root.rglob("*"))
+    with pytest.raises(InvalidPaperIdError):
+        get_paper_path("../outside/2301.00001", ".pdf", create=True)
+    assert set(root.rglob("*")) == before
@@ -2,19 +2,25 @@
 
 from .search import search_tool, handle_search
 from .download import download_tool, handle_download
+from .list_papers import list_tool, handle_list_papers
 from .read_paper import read_paper_tool, handle_read_paper
+from .chunks import paper_chunks_tool, handle_get_paper_chunks
+from .find_in_papers import find_in_papers_tool, handle_find_in_papers
+from .semantic_search import semantic_search_tool, handle_semantic_search
 
 __all__ = [
     "search_tool",
     "handle_search",
     "download_tool",
     "handle_download",
+    "list_tool",
+    "handle_list_papers",
     "read_paper_tool",
     "handle_read_paper",
-    "handle_list_papers"
+    "paper_chunks_tool",
+    "handle_get_paper_chunks",
+    "find_in_papers_tool",
+    "handle_find_in_papers",
+    "semantic_search_tool",
+    "handle_semantic_search",
 ]
-
-async def handle_list_papers():
-    """List available papers."""
-    # Implementation will be added later
-    return []
@@ -0,0 +1,105 @@
+"""Tool for packing pre-chunked paper content into a token budget."""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Dict, Any, List
+from ..types import Tool, TextContent
+from ..config import get_settings
+from ..services.chunks import CHUNK_STORE_EXTENSION, get_or_build_chunk_store, select_chunks
+from ..services.sections import SECTION_INDEX_EXTENSION, read_span
+from ..storage import get_paper_path
+from ..utils import MARKDOWN_EXTENSION
+
+settings = get_settings()
+
+# Constants
+DEFAULT_TOKEN_BUDGET = 4000
+JSON_SEPARATORS = (",", ":")
+
+paper_chunks_tool = Tool(
+    name="get_paper_chunks",
+    description="Get as many consecutive chunks of a downloaded paper as fit in a token budget",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "paper_id": {
+                "type": "string",
+                "description": "The arXiv ID of the paper",
+            },
+            "token_budget": {
+                "type": "integer",
+                "description": "Maximum number of tokens to return",
+                "default": DEFAULT_TOKEN_BUDGET,
+            },
+            "section": {
+                "type": "string",
+                "description": "Only return chunks from this section (e.g. 'methods')",
+            },
+            "after": {
+                "type": "string",
+                "description": "Continue after this chunk id (next_after from the previous call)",
+            },
+        },
+        "required": ["paper_id"],
+    },
+)
+
+
+def _create_error_response(message: str) -> List[TextContent]:
+    """Create a standardized error response."""
+    return [TextContent(text=json.dumps({"status": "error", "message": message}))]
+
+
+def _pack_chunks(paper_id: str, paper_path: Path, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Select the chunks that fit the budget and read their text."""
+    header, chunks = get_or_build_chunk_store(
+        paper_id,
+        get_paper_path(paper_id, CHUNK_STORE_EXTENSION),
+        paper_path,
+        get_paper_path(paper_id, SECTION_INDEX_EXTENSION),
+        settings.CHUNK_MAX_TOKENS,
+    )
+    token_budget = int(arguments.get("token_budget") or DEFAULT_TOKEN_BUDGET)
+    selected, remaining = select_chunks(
+        chunks, token_budget, section=arguments.get("section"), after=arguments.get("after")
+    )
+    return {
+        "paper_id": paper_id,
+        "tokenizer": header["tokenizer"],
+        "paper_tokens": header["total_tokens"],
+        "tokens": sum(chunk["tokens"] for chunk in selected),
+        "chunks": [
+            {
+                "id": chunk["id"],
+                "section": chunk["section"],
+                "tokens": chunk["tokens"],
+                "text": read_span(paper_path, chunk["start"], chunk["end"]),
+            }
+            for chunk in selected
+        ],
+        "remaining_chunks": remaining,
+        "next_after": selected[-1]["id"] if selected and remaining else None,
+    }
+
+
+async def handle_get_paper_chunks(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Return the chunks of a paper that fit in the requested token budget."""
+    paper_id = arguments["paper_id"]
+
+    try:
+        paper_path = get_paper_path(paper_id, MARKDOWN_EXTENSION)
+        if not paper_path.exists():
+            return _create_error_response(f"Paper {paper_id} not found in storage")
+
+        result = await asyncio.to_thread(_pack_chunks, paper_id, paper_path, arguments)
+        if not result["chunks"] and result["remaining_chunks"]:
+            return _create_error_response(
+                "Token budget is smaller than the next chunk; increase token_budget"
+            )
+        return [TextContent(text=json.dumps(result, separators=JSON_SEPARATORS))]
+
+    except ValueError as e:
+        return _create_error_response(str(e))
+    except Exception as e:
+        return _create_error_response(f"Error reading paper chunks: {str(e)}")
@@ -1,20 +1,23 @@
 """Download functionality for the arXiv MCP server."""
 
-import arxiv
 import json
 import asyncio
-import aiofiles
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 from .. import types
-from ..config import Settings
-import pymupdf4llm
+from ..config import get_settings
+from ..services.catalog import get_paper_catalog, metadata_from_result
+from ..services.conversion import convert_pdf, record_paper_metadata, store_converted_paper
+from ..services.library import get_library_index
+from ..services.metrics import CONVERSIONS_IN_PROGRESS, track_upstream
+from ..services.shared_state import get_shared_state
+from ..storage import get_paper_path
 import logging
 
 logger = logging.getLogger("arxiv-mcp-server")
-settings = Settings()
+settings = get_settings()
 
 # Constants
 PDF_EXTENSION = ".pdf"
@@ -24,9 +27,7 @@ STATUS_DOWNLOADING = "downloading"
 STATUS_CONVERTING = "converting"
 STATUS_SUCCESS = "success"
 STATUS_ERROR = "error"
-
-# Global dictionary to track conversion status
-conversion_statuses: Dict[str, Any] = {}
+FINAL_STATUSES = (STATUS_SUCCESS, STATUS_ERROR)
 
 
 @dataclass
@@ -38,6 +39,18 @@ class ConversionStatus:
     completed_at: Optional[datetime] = None
     error: Optional[str] = None
 
+    @classmethod
+    def from_record(cls, paper_id: str, record: Dict[str, Any]) -> "ConversionStatus":
+        """Build a status from a shared state conversion record."""
+        completed_at = record["completed_at"]
+        return cls(
+            paper_id=paper_id,
+            status=record["status"],
+            started_at=datetime.fromtimestamp(record["started_at"]),
+            completed_at=datetime.fromtimestamp(completed_at) if completed_at is not None else None,
+            error=record["error"],
+        )
+
 
 download_tool = types.Tool(
     name="download_paper",
@@ -60,19 +73,6 @@ download_tool = types.Tool(
 )
 
 
-def _ensure_storage_path() -> Path:
-    """Ensure storage directory exists and return the path."""
-    storage_path = Path(settings.STORAGE_PATH)
-    storage_path.mkdir(parents=True, exist_ok=True)
-    return storage_path
-
-
-def get_paper_path(paper_id: str, suffix: str = MARKDOWN_EXTENSION) -> Path:
-    """Get the absolute file path for a paper with given suffix."""
-    storage_path = _ensure_storage_path()
-    return storage_path / f"{paper_id}{suffix}"
-
-
 def _validate_pdf_file(pdf_path: Path) -> None:
     """Validate that PDF file exists and is readable."""
     if not pdf_path.exists():
@@ -85,40 +85,27 @@ def _validate_conversion_result(markdown: str) -> None:
         raise ValueError("PDF conversion resulted in empty content")
 
 
-def _update_conversion_status(paper_id: str, status: str, error: str = None) -> None:
-    """Update the conversion status for a paper."""
-    conversion_status = conversion_statuses.get(paper_id)
-    if conversion_status:
-        conversion_status.status = status
-        conversion_status.completed_at = datetime.now()
-        if error:
-            conversion_status.error = error
+def _get_conversion_status(paper_id: str) -> Optional[ConversionStatus]:
+    """Get the latest conversion status of a paper, whichever worker ran it."""
+    record = get_shared_state().get_conversion(paper_id)
+    return ConversionStatus.from_record(paper_id, record) if record else None
 
 
-async def _write_markdown_file(content: str, file_path: Path) -> None:
-    """Write markdown content to file."""
-    async with aiofiles.open(file_path, "w", encoding=ENCODING) as f:
-        await f.write(content)
+def _update_conversion_status(paper_id: str, status: str, error: str = None) -> None:
+    """Update the conversion status for a paper."""
+    get_shared_state().update_conversion(paper_id, status, completed=status in FINAL_STATUSES, error=error)
 
 
 async def convert_pdf_to_markdown(paper_id: str, pdf_path: Path) -> None:
-    """Convert PDF to Markdown in a separate thread."""
+    """Convert PDF to Markdown in a separate thread and store the paper."""
     try:
         logger.info(f"Starting conversion for {paper_id}")
         
         _validate_pdf_file(pdf_path)
             
-        # Execute the conversion in a separate thread to avoid blocking
-        markdown = await asyncio.to_thread(
-            pymupdf4llm.to_markdown,
-            str(pdf_path),
-            show_progress=False
-        )
-        
-        _validate_conversion_result(markdown)
-
-        md_path = get_paper_path(paper_id, MARKDOWN_EXTENSION)
-        await _write_markdown_file(markdown, md_path)
+        page_texts = await convert_pdf(pdf_path)
+        _validate_conversion_result("".join(page_texts))
+        await store_converted_paper(paper_id, page_texts, settings.CHUNK_MAX_TOKENS)
 
         _update_conversion_status(paper_id, STATUS_SUCCESS)
         logger.info(f"Conversion completed for {paper_id}")
@@ -135,16 +122,11 @@ async def handle_download(arguments: Dict[str, Any]) -> List[types.TextContent]:
     check_status = arguments.get("check_status", False)
 
     try:
-        # Ensure storage directory exists
-        storage_path = Path(settings.STORAGE_PATH)
-        storage_path.mkdir(parents=True, exist_ok=True)
-        
-        pdf_path = storage_path / f"{paper_id}.pdf"
-        md_path = storage_path / f"{paper_id}.md"
+        library = get_library_index()
 
         # Check status if requested
         if check_status:
-            if md_path.exists():
+            if paper_id in library:
                 return [types.TextContent(
                     text=json.dumps({
                         "status": "success",
@@ -153,7 +135,7 @@ async def handle_download(arguments: Dict[str, Any]) -> List[types.TextContent]:
                     })
                 )]
             
-            current_status = conversion_statuses.get(paper_id)
+            current_status = _get_conversion_status(paper_id)
             if current_status:
                 return [types.TextContent(
                     text=json.dumps({
@@ -172,57 +154,63 @@ async def handle_download(arguments: Dict[str, Any]) -> List[types.TextContent]:
                 })
             )]
 
-        # Check if paper is already being processed
-        if paper_id in conversion_statuses:
-            current_status = conversion_statuses[paper_id]
-            if current_status.status == "success" and md_path.exists():
-                return [types.TextContent(
-                    text=json.dumps({
-                        "status": "success",
-                        "message": "Paper already downloaded and converted",
-                        "resource_uri": f"file://{get_paper_path(paper_id, '.md')}",
-                    })
-                )]
-            elif current_status.status in ["downloading", "converting"]:
-                return [types.TextContent(
-                    text=json.dumps({
-                        "status": "in_progress",
-                        "message": f"Conversion for {paper_id} already in progress ({current_status.status})",
-                        "started_at": current_status.started_at.isoformat(),
-                    })
-                )]
+        # Another worker's library index may lag behind storage, so check the file too
+        current_status = _get_conversion_status(paper_id)
+        md_path = get_paper_path(paper_id, MARKDOWN_EXTENSION)
+        if current_status and current_status.status == STATUS_SUCCESS and (
+            paper_id in library or md_path.exists()
+        ):
+            return [types.TextContent(
+                text=json.dumps({
+                    "status": "success",
+                    "message": "Paper already downloaded and converted",
+                    "resource_uri": f"file://{md_path}",
+                })
+            )]
 
-        # Create new conversion status
-        status = ConversionStatus(
-            paper_id=paper_id,
-            status="downloading",
-            started_at=datetime.now()
-        )
-        conversion_statuses[paper_id] = status
+        # Claim the conversion, unless a worker is already processing the paper
+        running = get_shared_state().start_conversion(paper_id, STATUS_DOWNLOADING)
+        if running:
+            current_status = ConversionStatus.from_record(paper_id, running)
+            return [types.TextContent(
+                text=json.dumps({
+                    "status": "in_progress",
+                    "message": f"Conversion for {paper_id} already in progress ({current_status.status})",
+                    "started_at": current_status.started_at.isoformat(),
+                })
+            )]
 
+        CONVERSIONS_IN_PROGRESS.inc()
         try:
             # Search for paper
+            import arxiv
+
             search = arxiv.Search(id_list=[paper_id])
-            paper = next(search.results())
+            with track_upstream("lookup"):
+                paper = next(search.results())
             
-            # Create parent directory if it doesn't exist
-            pdf_path.parent.mkdir(parents=True, exist_ok=True)
+            # Resolve the PDF location, creating its directory if needed
+            pdf_path = get_paper_path(paper_id, PDF_EXTENSION, create=True)
             
             # Download PDF with error handling
             try:
-                paper.download_pdf(filename=str(pdf_path))
+                with track_upstream("download_pdf"):
+                    paper.download_pdf(filename=str(pdf_path))
                 logger.info(f"PDF downloaded for {paper_id} to {pdf_path}")
             except Exception as download_error:
                 raise Exception(f"Failed to download PDF: {str(download_error)}")
+            await asyncio.to_thread(get_paper_catalog().add_pdf, paper_id, pdf_path)
 
             # Update status to converting
-            status.status = "converting"
+            _update_conversion_status(paper_id, STATUS_CONVERTING)
 
             # Convert to markdown with proper error handling
             try:
                 await convert_pdf_to_markdown(paper_id, pdf_path)
-                status.status = "success"
-                status.completed_at = datetime.now()
+                metadata = metadata_from_result(paper)
+                await record_paper_metadata(paper_id, metadata)
+                _update_conversion_status(paper_id, STATUS_SUCCESS)
+                status = _get_conversion_status(paper_id)
 
                 return [types.TextContent(
                     text=json.dumps({
@@ -234,15 +222,11 @@ async def handle_download(arguments: Dict[str, Any]) -> List[types.TextContent]:
                     })
                 )]
             except Exception as conv_error:
-                status.status = "error"
-                status.completed_at = datetime.now()
-                status.error = f"Conversion error: {str(conv_error)}"
+                _update_conversion_status(paper_id, STATUS_ERROR, f"Conversion error: {str(conv_error)}")
                 raise Exception(f"Failed to convert PDF to markdown: {str(conv_error)}")
 
         except StopIteration:
-            status.status = "error"
-            status.completed_at = datetime.now()
-            status.error = f"Paper {paper_id} not found on arXiv"
+            _update_conversion_status(paper_id, STATUS_ERROR, f"Paper {paper_id} not found on arXiv")
             return [types.TextContent(
                 text=json.dumps({
                     "status": "error",
@@ -251,11 +235,12 @@ async def handle_download(arguments: Dict[str, Any]) -> List[types.TextContent]:
             )]
         
         except Exception as e:
-            status.status = "error"
-            status.completed_at = datetime.now()
-            status.error = str(e)
+            _update_conversion_status(paper_id, STATUS_ERROR, str(e))
             raise
 
+        finally:
+            CONVERSIONS_IN_PROGRESS.dec()
+
     except Exception as e:
         error_msg = f"Error during download or conversion: {str(e)}"
         logger.error(error_msg)
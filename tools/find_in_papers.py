@@ -0,0 +1,66 @@
+"""Tool for finding where downloaded papers mention a keyword or phrase."""
+
+import asyncio
+import json
+import time
+from typing import Dict, Any, List
+from ..types import Tool, TextContent
+from ..services.fulltext import FullTextQueryError, get_fulltext_index
+
+# Constants
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+DEFAULT_PER_PAPER = 3
+JSON_SEPARATORS = (",", ":")
+
+find_in_papers_tool = Tool(
+    name="find_in_papers",
+    description="Find which downloaded papers mention keywords and where, with ranked snippets",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": 'Words to find (all must match); wrap phrases in double quotes',
+            },
+            "limit": {
+                "type": "integer",
+                "description": f"Maximum number of snippets (max {MAX_LIMIT})",
+                "default": DEFAULT_LIMIT,
+            },
+            "per_paper": {
+                "type": "integer",
+                "description": "Maximum number of snippets from a single paper",
+                "default": DEFAULT_PER_PAPER,
+            },
+        },
+        "required": ["query"],
+    },
+)
+
+
+def _create_error_response(message: str) -> List[TextContent]:
+    """Create a standardized error response."""
+    return [TextContent(text=json.dumps({"status": "error", "message": message}))]
+
+
+async def handle_find_in_papers(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Search the full-text index and return ranked keyword-in-context snippets."""
+    query = arguments.get("query", "")
+    limit = max(1, min(int(arguments.get("limit") or DEFAULT_LIMIT), MAX_LIMIT))
+    per_paper = max(1, int(arguments.get("per_paper") or DEFAULT_PER_PAPER))
+
+    try:
+        started = time.perf_counter()
+        results = await asyncio.to_thread(get_fulltext_index().search, query, limit, per_paper)
+        return [TextContent(text=json.dumps({
+            "query": query,
+            "count": len(results),
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        }, separators=JSON_SEPARATORS))]
+
+    except FullTextQueryError as e:
+        return _create_error_response(str(e))
+    except Exception as e:
+        return _create_error_response(f"Error searching papers: {str(e)}")
@@ -1,72 +1,104 @@
 """List functionality for the arXiv MCP server."""
 
+import asyncio
 import json
-from pathlib import Path
-import arxiv
 from typing import Dict, Any, List, Optional
-import mcp.types as types
-from ..config import Settings
+from ..types import Tool, TextContent
+from ..config import get_settings
+from ..services.catalog import (
+    CatalogQueryError,
+    DEFAULT_LIST_FIELDS,
+    LIST_FIELDS,
+    SORT_KEYS,
+    SORT_ORDERS,
+    TIERS,
+    get_paper_catalog,
+)
+from ..services.library import get_library_index
 
-settings = Settings()
+settings = get_settings()
 
 # Constants
-MARKDOWN_EXTENSION = "*.md"
-JSON_INDENT = 2
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+JSON_SEPARATORS = (",", ":")
 
-list_tool = types.Tool(
+list_tool = Tool(
     name="list_papers",
-    description="List all existing papers available as resources",
+    description="List stored papers, one page at a time, with optional filters and sorting",
     inputSchema={
         "type": "object",
-        "properties": {},
+        "properties": {
+            "category": {
+                "type": "string",
+                "description": "Only papers in this arXiv category (e.g. cs.LG)",
+            },
+            "author": {
+                "type": "string",
+                "description": "Only papers by this author (case-insensitive full name)",
+            },
+            "added_after": {
+                "type": "string",
+                "description": "Only papers added on or after this ISO date",
+            },
+            "added_before": {
+                "type": "string",
+                "description": "Only papers added before this ISO date",
+            },
+            "tier": {
+                "type": "string",
+                "enum": list(TIERS),
+                "description": "Only papers at this conversion tier",
+            },
+            "sort": {
+                "type": "string",
+                "enum": list(SORT_KEYS),
+                "default": "added_at",
+            },
+            "order": {
+                "type": "string",
+                "enum": list(SORT_ORDERS),
+                "default": "desc",
+            },
+            "cursor": {
+                "type": "string",
+                "description": "next_cursor from the previous page",
+            },
+            "limit": {
+                "type": "integer",
+                "description": f"Page size (max {MAX_PAGE_SIZE})",
+                "default": DEFAULT_PAGE_SIZE,
+            },
+            "fields": {
+                "type": "array",
+                "items": {"type": "string", "enum": list(LIST_FIELDS)},
+                "description": f"Fields to return (default: {', '.join(DEFAULT_LIST_FIELDS)})",
+            },
+        },
         "required": [],
     },
 )
 
 
-def _get_storage_path() -> Path:
-    """Get the storage path."""
-    return Path(settings.STORAGE_PATH)
-
-
 def _extract_paper_ids() -> List[str]:
-    """Extract paper IDs from markdown files in storage."""
-    storage_path = _get_storage_path()
-    return [p.stem for p in storage_path.glob(MARKDOWN_EXTENSION)]
-
+    """Get paper IDs from the in-memory library index."""
+    return get_library_index().list_ids()
 
-def _create_paper_info(result: arxiv.Result) -> Dict[str, Any]:
-    """Create paper information dictionary from arXiv result."""
-    return {
-        "title": result.title,
-        "summary": result.summary,
-        "authors": [author.name for author in result.authors],
-        "links": [link.href for link in result.links],
-        "pdf_url": result.pdf_url,
-    }
 
+def _get_page_size(arguments: Dict[str, Any]) -> int:
+    """Get the requested page size, clamped to the allowed range."""
+    limit = int(arguments.get("limit") or DEFAULT_PAGE_SIZE)
+    return max(1, min(limit, MAX_PAGE_SIZE))
 
-def _create_response_data(papers: List[str], results: List[arxiv.Result]) -> Dict[str, Any]:
-    """Create response data structure."""
-    return {
-        "total_papers": len(papers),
-        "papers": [_create_paper_info(result) for result in results],
-    }
 
-
-def _create_error_response(error_message: str) -> List[types.TextContent]:
+def _create_error_response(error_message: str) -> List[TextContent]:
     """Create standardized error response."""
-    return [types.TextContent(type="text", text=f"Error: {error_message}")]
+    return [TextContent(text=json.dumps({"status": "error", "message": error_message}))]
 
 
-def _create_success_response(response_data: Dict[str, Any]) -> List[types.TextContent]:
+def _create_success_response(response_data: Dict[str, Any]) -> List[TextContent]:
     """Create standardized success response."""
-    return [
-        types.TextContent(
-            type="text", 
-            text=json.dumps(response_data, indent=JSON_INDENT)
-        )
-    ]
+    return [TextContent(text=json.dumps(response_data, separators=JSON_SEPARATORS))]
 
 
 def list_papers() -> List[str]:
@@ -74,16 +106,39 @@ def list_papers() -> List[str]:
     return _extract_paper_ids()
 
 
+def _query_page(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Query the catalog for one page of papers and the library size."""
+    catalog = get_paper_catalog()
+    papers, next_cursor = catalog.query(
+        category=arguments.get("category"),
+        author=arguments.get("author"),
+        added_after=arguments.get("added_after"),
+        added_before=arguments.get("added_before"),
+        tier=arguments.get("tier"),
+        sort=arguments.get("sort", "added_at"),
+        order=arguments.get("order", "desc"),
+        cursor=arguments.get("cursor"),
+        limit=_get_page_size(arguments),
+        fields=arguments.get("fields"),
+    )
+    return {
+        "total_papers": len(catalog),
+        "count": len(papers),
+        "papers": papers,
+        "next_cursor": next_cursor,
+    }
+
+
 async def handle_list_papers(
     arguments: Optional[Dict[str, Any]] = None,
-) -> List[types.TextContent]:
-    """Handle requests to list all stored papers."""
+) -> List[TextContent]:
+    """Handle requests to list a page of stored papers."""
+    arguments = arguments or {}
     try:
-        papers = list_papers()
-        client = arxiv.Client()
-        results = client.results(arxiv.Search(id_list=papers))
-        response_data = _create_response_data(papers, list(results))
-        return _create_success_response(response_data)
+        # Off the event loop: the first call also opens and syncs the catalog.
+        return _create_success_response(await asyncio.to_thread(_query_page, arguments))
 
-    except Exception as e:
+    except (CatalogQueryError, ValueError) as e:
         return _create_error_response(str(e))
+    except Exception as e:
+        return _create_error_response(f"Error listing papers: {str(e)}")
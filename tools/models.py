@@ -0,0 +1,91 @@
+"""Request models of the HTTP tool endpoints.
+
+Each model mirrors its tool's ``inputSchema`` and is validated straight from
+the request body. Optional arguments default to None rather than to the
+tool's default: handlers receive only the arguments the caller set, so
+their own defaults and range checks keep applying unchanged.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ToolRequest(BaseModel):
+    """Base of the tool request models; unknown arguments are ignored."""
+
+    model_config = ConfigDict(extra="ignore", coerce_numbers_to_str=True)
+
+    def arguments(self) -> Dict[str, Any]:
+        """The arguments the caller set, as the tool handlers take them."""
+        return self.model_dump(exclude_unset=True)
+
+
+class SearchRequest(ToolRequest):
+    query: str
+    max_results: Optional[int] = None
+    category: Optional[str] = None
+    rank: Optional[bool] = None
+    top_k: Optional[int] = None
+    deadline_ms: Optional[float] = None
+
+
+class DownloadRequest(ToolRequest):
+    paper_id: str
+    check_status: Optional[bool] = None
+
+
+class ListPapersRequest(ToolRequest):
+    category: Optional[str] = None
+    author: Optional[str] = None
+    added_after: Optional[str] = None
+    added_before: Optional[str] = None
+    tier: Optional[str] = None
+    sort: Optional[str] = None
+    order: Optional[str] = None
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    fields: Optional[List[str]] = None
+
+
+class ReadPaperRequest(ToolRequest):
+    paper_id: str
+    section: Optional[str] = None
+    pages: Optional[str] = None
+    offset: Optional[int] = None
+    length: Optional[int] = None
+    outline: Optional[bool] = None
+    stream: Optional[bool] = None
+
+
+class PaperChunksRequest(ToolRequest):
+    paper_id: str
+    token_budget: Optional[int] = None
+    section: Optional[str] = None
+    after: Optional[str] = None
+
+
+class FindInPapersRequest(ToolRequest):
+    query: str
+    limit: Optional[int] = None
+    per_paper: Optional[int] = None
+
+
+class SemanticSearchRequest(ToolRequest):
+    query: str
+    k: Optional[int] = None
+    downloaded_only: Optional[bool] = None
+    nprobe: Optional[int] = None
+
+
+class RelevanceRequest(ToolRequest):
+    query: str = ""
+    paper_data: Dict[str, Any] = {}
+    deadline_ms: Optional[float] = None
+
+
+class RelevanceBatchRequest(ToolRequest):
+    query: str = ""
+    papers: List[Dict[str, Any]] = []
+    rerank: bool = True
+    deadline_ms: Optional[float] = None
@@ -1,20 +1,34 @@
 """Tool for reading downloaded papers."""
 
+import asyncio
 import json
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Tuple
 from ..types import Tool, TextContent
-from ..config import Settings
+from ..config import get_settings
+from ..services.paper_cache import get_paper_cache
+from ..services.sections import (
+    SECTION_INDEX_EXTENSION,
+    SectionNotFoundError,
+    find_section,
+    get_or_build_section_index,
+    outline,
+    page_span,
+    read_span,
+)
+from ..storage import get_paper_path
 from ..utils import (
     MARKDOWN_EXTENSION, 
     DEFAULT_ENCODING, 
     create_error_response, 
     create_success_response,
-    get_paper_file_path,
     safe_read_file
 )
 
-settings = Settings()
+settings = get_settings()
+
+# Constants
+STREAM_CHUNK_SIZE = 64 * 1024
 
 read_paper_tool = Tool(
     name="read_paper",
@@ -25,7 +39,33 @@ read_paper_tool = Tool(
             "paper_id": {
                 "type": "string",
                 "description": "The arXiv ID of the paper to read",
-            }
+            },
+            "section": {
+                "type": "string",
+                "description": "Only read this section (e.g. 'abstract', 'methods')",
+            },
+            "pages": {
+                "type": "string",
+                "description": "Only read these 1-based pages (e.g. '3' or '3-5')",
+            },
+            "offset": {
+                "type": "integer",
+                "description": "Start of a byte range to read",
+            },
+            "length": {
+                "type": "integer",
+                "description": "Length in bytes of the range to read",
+            },
+            "outline": {
+                "type": "boolean",
+                "description": "If true, only list the paper's sections and their sizes",
+                "default": False,
+            },
+            "stream": {
+                "type": "boolean",
+                "description": "Over HTTP, stream the markdown as plain text instead of a JSON response",
+                "default": False,
+            },
         },
         "required": ["paper_id"],
     },
@@ -47,7 +87,7 @@ def _create_error_response(message: str) -> List[TextContent]:
 
 
 def _create_success_response(
-    content: str, paper_id: str, paper_path: Path
+    content: str, paper_id: str, paper_path: Path, **extra_metadata: Any
 ) -> List[TextContent]:
     """Create a standardized success response."""
     return [
@@ -57,6 +97,7 @@ def _create_success_response(
                 "paper_id": paper_id,
                 "path": str(paper_path),
                 "format": "markdown",
+                **extra_metadata,
             },
         )
     ]
@@ -64,26 +105,111 @@ def _create_success_response(
 
 def _get_paper_path(paper_id: str) -> Path:
     """Get the file path for a paper."""
-    return get_paper_file_path(Path(settings.STORAGE_PATH), paper_id, MARKDOWN_EXTENSION)
+    return get_paper_path(paper_id, MARKDOWN_EXTENSION)
 
 
 def _read_paper_file(paper_path: Path) -> str:
-    """Read paper content from file."""
-    with open(paper_path, "r", encoding=ENCODING) as f:
-        return f.read()
+    """Read paper content, from the shared hot-paper cache when possible."""
+    return get_paper_cache().read(paper_path)
+
+
+def _is_partial_read(arguments: Dict[str, Any]) -> bool:
+    """Check whether the request asks for less than the whole paper."""
+    return any(arguments.get(key) is not None for key in ("section", "pages", "offset", "length"))
+
+
+def _resolve_span(arguments: Dict[str, Any], index: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn section/pages/byte-range arguments into a byte span with metadata."""
+    total = index["total_bytes"]
+    if arguments.get("section") is not None:
+        section = find_section(index, arguments["section"])
+        return {"start": section["start"], "end": section["end"], "section": section["title"]}
+    if arguments.get("pages") is not None:
+        start, end = page_span(index, arguments["pages"])
+        return {"start": start, "end": end, "pages": str(arguments["pages"])}
+    start = min(max(int(arguments.get("offset") or 0), 0), total)
+    length = arguments.get("length")
+    end = total if length is None else min(start + max(int(length), 0), total)
+    return {"start": start, "end": end}
+
+
+def _read_partial(paper_id: str, paper_path: Path, arguments: Dict[str, Any]) -> List[TextContent]:
+    """Serve an outline or a section/page/byte-range read from the offset index."""
+    index_path = get_paper_path(paper_id, SECTION_INDEX_EXTENSION)
+    index = get_or_build_section_index(index_path, paper_path)
+
+    if arguments.get("outline"):
+        return _create_success_response(
+            json.dumps({"sections": outline(index), "pages": len(index["pages"])}),
+            paper_id,
+            paper_path,
+            total_bytes=index["total_bytes"],
+        )
+
+    span = _resolve_span(arguments, index)
+    content = read_span(paper_path, span["start"], span["end"])
+    return _create_success_response(
+        content,
+        paper_id,
+        paper_path,
+        total_bytes=index["total_bytes"],
+        range=[span.pop("start"), span.pop("end")],
+        **span,
+    )
+
+
+def iter_paper_bytes(
+    paper_path: Path, start: int, end: int, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yield a byte span of a paper in fixed-size chunks."""
+    with open(paper_path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = f.read(min(chunk_size, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+
+
+def open_paper_stream(arguments: Dict[str, Any]) -> Tuple[Iterator[bytes], Dict[str, Any]]:
+    """Resolve a read request to a chunk iterator over its bytes and its metadata.
+
+    Accepts the same section/pages/offset/length selection as
+    ``handle_read_paper``. Raises FileNotFoundError if the paper is not
+    stored, SectionNotFoundError for an unknown section or page and
+    InvalidPaperIdError for an ID that is not an arXiv ID.
+    """
+    paper_id = arguments["paper_id"]
+    paper_path = _get_paper_path(paper_id)
+    total = paper_path.stat().st_size
+    span = {"start": 0, "end": total}
+    if _is_partial_read(arguments):
+        index_path = get_paper_path(paper_id, SECTION_INDEX_EXTENSION)
+        span = _resolve_span(arguments, get_or_build_section_index(index_path, paper_path))
+    start, end = span.pop("start"), span.pop("end")
+    metadata = {"paper_id": paper_id, "total_bytes": total, "range": [start, end], **span}
+    return iter_paper_bytes(paper_path, start, end), metadata
 
 
 async def handle_read_paper(arguments: Dict[str, Any]) -> List[TextContent]:
-    """Read a paper's content from storage."""
+    """Read a paper's content from storage, optionally only part of it."""
     paper_id = arguments["paper_id"]
-    paper_path = _get_paper_path(paper_id)
 
     try:
+        paper_path = _get_paper_path(paper_id)
         if not paper_path.exists():
             return _create_error_response(f"Paper {paper_id} not found in storage")
 
-        content = _read_paper_file(paper_path)
+        # File I/O runs in a worker thread so large papers don't block the event loop
+        if arguments.get("outline") or _is_partial_read(arguments):
+            return await asyncio.to_thread(_read_partial, paper_id, paper_path, arguments)
+
+        content = await asyncio.to_thread(_read_paper_file, paper_path)
         return _create_success_response(content, paper_id, paper_path)
 
+    except SectionNotFoundError as e:
+        return _create_error_response(str(e))
     except Exception as e:
         return _create_error_response(f"Error reading paper: {str(e)}")
@@ -1,15 +1,33 @@
 """Search functionality for the arXiv MCP server."""
 
+import asyncio
+import heapq
+import itertools
 import logging
-from typing import Dict, Any, List
-import arxiv
+import time
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional
+from ..config import get_settings
 from ..types import Tool, TextContent
+from ..services.embeddings import get_embedding_store, paper_text
+from ..services.metrics import track_upstream
+from ..services.relevance import get_cascade_ranker, get_relevance_scorer
+from ..utils import strip_version
+
+if TYPE_CHECKING:
+    import arxiv
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Embedding tasks started by searches, kept referenced until they finish
+_embedding_tasks = set()
 
 # Constants
 DEFAULT_MAX_RESULTS = 10
 DEFAULT_CATEGORY = "cs.AI"
+# Top-k searches fetch pages of TOP_K_PAGE_FACTOR * k results, at least TOP_K_MIN_PAGE_SIZE.
+TOP_K_MIN_PAGE_SIZE = 10
+TOP_K_PAGE_FACTOR = 2
 
 search_tool = Tool(
     name="search",
@@ -30,6 +48,19 @@ search_tool = Tool(
                 "type": "string",
                 "description": "arXiv category to search in",
                 "default": DEFAULT_CATEGORY
+            },
+            "rank": {
+                "type": "boolean",
+                "description": "Sort results by relevance to the query and include relevance_score",
+                "default": False
+            },
+            "top_k": {
+                "type": "integer",
+                "description": "Return only the k most relevant papers, fetching more pages only while they can improve the answer"
+            },
+            "deadline_ms": {
+                "type": "integer",
+                "description": "Time budget for the whole search; slow relevance scoring falls back to lexical scores"
             }
         },
         "required": ["query"]
@@ -42,7 +73,7 @@ def _extract_paper_id(entry_id: str) -> str:
     return entry_id.split("/")[-1]
 
 
-def _create_paper_data(result: arxiv.Result, category: str) -> Dict[str, Any]:
+def _create_paper_data(result: "arxiv.Result", category: str) -> Dict[str, Any]:
     """Create standardized paper data dictionary."""
     return {
         "id": _extract_paper_id(result.entry_id),
@@ -54,8 +85,10 @@ def _create_paper_data(result: arxiv.Result, category: str) -> Dict[str, Any]:
     }
 
 
-def _create_search_query(query: str, max_results: int) -> arxiv.Search:
+def _create_search_query(query: str, max_results: int) -> "arxiv.Search":
     """Create arXiv search query with standardized parameters."""
+    import arxiv  # loaded on first search, it is slow to import
+
     return arxiv.Search(
         query=query,
         max_results=max_results,
@@ -63,25 +96,135 @@ def _create_search_query(query: str, max_results: int) -> arxiv.Search:
     )
 
 
-def _process_search_results(search_results, category: str) -> List[TextContent]:
+def _fetch_papers(query: str, max_results: int, category: str) -> List[Dict[str, Any]]:
+    """Run the arXiv query and collect paper data; blocks on the network."""
+    search = _create_search_query(query, max_results)
+    with track_upstream("search"):
+        return [_create_paper_data(result, category) for result in search.results()]
+
+
+def _next_page(results: Iterator["arxiv.Result"], count: int, category: str) -> List[Dict[str, Any]]:
+    """Pull the next ``count`` results; blocks while the client fetches a page."""
+    with track_upstream("search_page"):
+        return [_create_paper_data(result, category) for result in itertools.islice(results, count)]
+
+
+async def _search_top_k(query: str, k: int, max_results: int, category: str,
+                        deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Page through arXiv results keeping the ``k`` most relevant, best first.
+
+    Each page is scored as it arrives, on the scale set by the first page,
+    into a running min-heap of the best ``k``. Paging stops as soon as a page
+    holds nothing better than the current k-th best: arXiv returns results
+    in its own relevance order, so later pages are not expected to do better.
+    It also stops once ``deadline`` (a ``time.monotonic()`` value) has passed,
+    returning the best of the pages fetched so far.
+    """
+    import arxiv
+
+    page_size = min(max(TOP_K_MIN_PAGE_SIZE, TOP_K_PAGE_FACTOR * k), max_results)
+    client = arxiv.Client(page_size=page_size)
+    results = client.results(_create_search_query(query, max_results))
+    scorer = get_relevance_scorer()
+
+    heap, reference, fetched, pages, stopped = [], None, 0, 0, ""
+    while fetched < max_results:
+        wanted = min(page_size, max_results - fetched)
+        page = await asyncio.to_thread(_next_page, results, wanted, category)
+        if not page:
+            break
+        scores, reference = scorer.score_page(query, page, reference)
+        for position, (paper, score) in enumerate(zip(page, scores), fetched):
+            paper["relevance_score"] = score
+            # Earlier arXiv positions win ties; positions are unique, so papers are never compared.
+            entry = (score, -position, paper)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        fetched += len(page)
+        pages += 1
+        if len(page) < wanted:
+            break
+        if len(heap) == k and max(scores) < heap[0][0]:
+            stopped = " and stopped early" if fetched < max_results else ""
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            stopped = " and stopped at the deadline" if fetched < max_results else ""
+            break
+
+    logger.info(f"Top-{k} search scored {fetched} of up to {max_results} results in {pages} pages{stopped}")
+    return [paper for _, _, paper in sorted(heap, reverse=True)]
+
+
+async def _rank_papers(query: str, papers: List[Dict[str, Any]],
+                       deadline: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Score papers with the relevance cascade and return them best first.
+
+    Scores are added to each paper as ``relevance_score``; papers whose
+    reranking missed the deadline keep their lexical score and are marked
+    ``relevance_degraded``. Ranking is a refinement, so on failure the papers
+    come back in arXiv's order.
+    """
+    try:
+        ranking = await get_cascade_ranker().rank(query, papers, deadline=deadline)
+    except Exception as e:
+        logger.warning(f"Could not rank search results: {e}")
+        return papers
+    for paper, score in zip(papers, ranking["scores"]):
+        paper["relevance_score"] = score
+    for index in ranking["degraded"]:
+        papers[index]["relevance_degraded"] = True
+    return [papers[index] for index in ranking["order"]]
+
+
+def _process_search_results(papers: List[Dict[str, Any]]) -> List[TextContent]:
     """Process search results into standardized format."""
-    results = []
-    for result in search_results:
-        paper_data = _create_paper_data(result, category)
-        results.append(TextContent(
-            text=str(paper_data),
-            metadata=paper_data
-        ))
-    return results
+    return [TextContent(text=str(paper_data), metadata=paper_data) for paper_data in papers]
+
+
+def _embed_papers(papers: List[Dict[str, Any]]) -> None:
+    """Store embeddings of search results not embedded yet."""
+    try:
+        get_embedding_store().ensure(
+            {strip_version(paper["id"]): paper_text(paper) for paper in papers}
+        )
+    except Exception as e:
+        logger.warning(f"Could not store embeddings of search results: {e}")
+
+
+def _schedule_embedding(results: List[TextContent]) -> None:
+    """Embed search results in the background so the search is not slowed down."""
+    papers = [result.metadata for result in results if result.metadata]
+    if papers:
+        task = asyncio.create_task(asyncio.to_thread(_embed_papers, papers))
+        _embedding_tasks.add(task)
+        task.add_done_callback(_embedding_tasks.discard)
 
 
 async def handle_search(arguments: Dict[str, Any]) -> List[TextContent]:
     """Handle search requests."""
     query = arguments["query"]
-    max_results = arguments.get("max_results", DEFAULT_MAX_RESULTS)
+    max_results = arguments.get("max_results")
     category = arguments.get("category", DEFAULT_CATEGORY)
+    rank = bool(arguments.get("rank", False))
+    top_k = arguments.get("top_k")
+    deadline_ms = arguments.get("deadline_ms")
+    deadline = time.monotonic() + float(deadline_ms) / 1000 if deadline_ms else None
 
-    search = _create_search_query(query, max_results)
-    search_results = search.results()
-    
-    return _process_search_results(search_results, category)
+    if top_k:
+        # A top-k search may page through up to the configured maximum
+        if max_results is None:
+            max_results = settings.MAX_RESULTS
+        papers = await _search_top_k(query, max(1, int(top_k)), max_results, category, deadline)
+    else:
+        if max_results is None:
+            max_results = DEFAULT_MAX_RESULTS
+        # Fetch off the event loop, then rank in-process so clients need no second round trip
+        papers = await asyncio.to_thread(_fetch_papers, query, max_results, category)
+    if rank:
+        papers = await _rank_papers(query, papers, deadline)
+
+    results = _process_search_results(papers)
+    _schedule_embedding(results)
+    return results
@@ -0,0 +1,83 @@
+"""Tool for finding papers semantically similar to a query."""
+
+import asyncio
+import json
+import time
+from typing import Dict, Any, List
+from ..types import Tool, TextContent
+from ..services.ann import DEFAULT_NPROBE, get_ann_index
+from ..services.library import get_library_index
+
+# Constants
+DEFAULT_K = 10
+MAX_K = 100
+JSON_SEPARATORS = (",", ":")
+
+semantic_search_tool = Tool(
+    name="semantic_search",
+    description="Find papers similar in meaning to a query among every paper downloaded or seen in search results",
+    inputSchema={
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string",
+                "description": "Natural-language description of what to find",
+            },
+            "k": {
+                "type": "integer",
+                "description": f"Number of papers to return (max {MAX_K})",
+                "default": DEFAULT_K,
+            },
+            "downloaded_only": {
+                "type": "boolean",
+                "description": "Only return papers available for reading",
+                "default": False,
+            },
+            "nprobe": {
+                "type": "integer",
+                "description": "Index cells to scan; higher is slower but more accurate",
+                "default": DEFAULT_NPROBE,
+            },
+        },
+        "required": ["query"],
+    },
+)
+
+
+def _create_error_response(message: str) -> List[TextContent]:
+    """Create a standardized error response."""
+    return [TextContent(text=json.dumps({"status": "error", "message": message}))]
+
+
+def _semantic_search(query: str, k: int, nprobe: int, downloaded_only: bool) -> List[Dict[str, Any]]:
+    """Query the ANN index and flag which results are downloaded."""
+    # Embeddings are keyed by version-less IDs, the library by the downloaded version.
+    library = get_library_index()
+    accept = library.has_any_version if downloaded_only else None
+    return [
+        {"paper_id": paper_id, "score": score, "downloaded": library.has_any_version(paper_id)}
+        for paper_id, score in get_ann_index().search(query, k, nprobe, accept)
+    ]
+
+
+async def handle_semantic_search(arguments: Dict[str, Any]) -> List[TextContent]:
+    """Return the papers whose embeddings are closest to the query's."""
+    query = arguments.get("query", "").strip()
+    if not query:
+        return _create_error_response("Missing query")
+    k = max(1, min(int(arguments.get("k") or DEFAULT_K), MAX_K))
+    nprobe = max(1, int(arguments.get("nprobe") or DEFAULT_NPROBE))
+    downloaded_only = bool(arguments.get("downloaded_only", False))
+
+    try:
+        started = time.perf_counter()
+        results = await asyncio.to_thread(_semantic_search, query, k, nprobe, downloaded_only)
+        return [TextContent(text=json.dumps({
+            "query": query,
+            "count": len(results),
+            "results": results,
+            "took_ms": round((time.perf_counter() - started) * 1000, 2),
+        }, separators=JSON_SEPARATORS))]
+
+    except Exception as e:
+        return _create_error_response(f"Error searching papers: {str(e)}")
@@ -88,17 +88,24 @@ def save_search_history(search_item: dict):
     except Exception as e:
         st.error(f"Error saving search history: {e}")
 
-def _calculate_relevance_score(api: ArxivAPIService, query: str, metadata: dict) -> float:
-    """Calculate relevance score for a paper."""
-    relevance = metadata.get('relevance_score', None)
-    if relevance is None:
-        paper_data = {
-            'title': metadata.get('title', ''),
-            'abstract': metadata.get('abstract', '')
-        }
-        score_result = asyncio.run(api.calculate_relevance(query, paper_data))
-        relevance = score_result.get('score', DEFAULT_RELEVANCE_SCORE)
-    return relevance
+def _calculate_relevance_scores(api: ArxivAPIService, query: str, metadata_list: list) -> list:
+    """Calculate relevance scores for all papers with a single batch request."""
+    scores = [metadata.get('relevance_score') for metadata in metadata_list]
+    missing = [i for i, score in enumerate(scores) if score is None]
+    if missing:
+        papers_data = [
+            {
+                'id': metadata_list[i].get('id', ''),
+                'title': metadata_list[i].get('title', ''),
+                'abstract': metadata_list[i].get('abstract', '')
+            }
+            for i in missing
+        ]
+        result = asyncio.run(api.calculate_relevance_batch(query, papers_data))
+        batch_scores = result.get('scores') or []
+        for position, i in enumerate(missing):
+            scores[i] = batch_scores[position] if position < len(batch_scores) else DEFAULT_RELEVANCE_SCORE
+    return scores
 
 def _process_papers(api: ArxivAPIService, query: str, papers_data: list) -> tuple:
     """Process papers and extract relevance scores and IDs."""
@@ -106,10 +113,10 @@ def _process_papers(api: ArxivAPIService, query: str, papers_data: list) -> tupl
     relevance_scores = []
     paper_ids = []
     
-    for paper in papers_data:
-        metadata = paper.get('metadata', {})
-        relevance = _calculate_relevance_score(api, query, metadata)
-        
+    metadata_list = [paper.get('metadata', {}) for paper in papers_data]
+    scores = _calculate_relevance_scores(api, query, metadata_list)
+
+    for metadata, relevance in zip(metadata_list, scores):
         papers.append({**metadata, 'relevance_score': relevance})
         relevance_scores.append(relevance)
         paper_ids.append(metadata.get('id', ''))
@@ -6,6 +6,12 @@ class UISettings(BaseSettings):
     MAX_RESULTS: int = 50
     DEFAULT_CATEGORY: str = "cs.AI"
     PAPER_CACHE_DIR: str = "./cache"
+    # Time budget for ranked searches and relevance scoring; slow rerankers degrade to lexical scores
+    RELEVANCE_DEADLINE_MS: int = 3000
+    # Requests answered 429 (server at capacity) are retried after its Retry-After, this many times,
+    # unless it asks for a longer wait than BUSY_MAX_WAIT_SECONDS
+    BUSY_RETRIES: int = 3
+    BUSY_MAX_WAIT_SECONDS: float = 30.0
     
     model_config = SettingsConfigDict(
         env_file=".env",
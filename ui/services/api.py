@@ -1,17 +1,52 @@
 import httpx
+import importlib.util
 from typing import Dict, Any, List, Optional
 from ..config import UISettings
 import asyncio
 import json
+import time
+from email.utils import parsedate_to_datetime
 
 # Constants
 HEALTH_ENDPOINT = "/health"
 SEARCH_ENDPOINT = "/tools/search"
 DOWNLOAD_ENDPOINT = "/tools/download"
 RELEVANCE_ENDPOINT = "/tools/calculate_relevance"
+RELEVANCE_BATCH_ENDPOINT = "/tools/calculate_relevance_batch"
 HEALTH_CHECK_TIMEOUT = 5.0
 REQUEST_TIMEOUT = 30.0
 HTTP_OK = 200
+HTTP_TOO_MANY_REQUESTS = 429
+
+
+def _accepted_encodings() -> str:
+    """Content codings httpx can decode here: brotli and zstd need their optional packages."""
+    encodings = []
+    if importlib.util.find_spec("zstandard"):
+        encodings.append("zstd")
+    if importlib.util.find_spec("brotli") or importlib.util.find_spec("brotlicffi"):
+        encodings.append("br")
+    return ", ".join(encodings + ["gzip"])
+
+
+# Sent with every request so the server compresses responses
+REQUEST_HEADERS = {"Accept-Encoding": _accepted_encodings()}
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
 
 class ArxivAPIService:
     """Service for interacting with the arXiv API through the backend server."""
@@ -37,15 +72,27 @@ class ArxivAPIService:
         return response
 
     async def _make_request(self, method: str, endpoint: str, data: Dict = None, timeout: float = REQUEST_TIMEOUT) -> httpx.Response:
-        """Make HTTP request with error handling."""
-        async with httpx.AsyncClient() as client:
-            if method.upper() == "GET":
-                response = await client.get(f"{self.base_url}{endpoint}", timeout=timeout)
-            elif method.upper() == "POST":
-                response = await client.post(f"{self.base_url}{endpoint}", json=data, timeout=timeout)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-            
+        """Make HTTP request with error handling.
+
+        When the server is at capacity (429), the request is retried after the
+        wait its Retry-After header asks for, up to the configured limits.
+        """
+        async with httpx.AsyncClient(headers=REQUEST_HEADERS) as client:
+            for attempt in range(self.settings.BUSY_RETRIES + 1):
+                if method.upper() == "GET":
+                    response = await client.get(f"{self.base_url}{endpoint}", timeout=timeout)
+                elif method.upper() == "POST":
+                    response = await client.post(f"{self.base_url}{endpoint}", json=data, timeout=timeout)
+                else:
+                    raise ValueError(f"Unsupported HTTP method: {method}")
+
+                if response.status_code != HTTP_TOO_MANY_REQUESTS or attempt == self.settings.BUSY_RETRIES:
+                    break
+                delay = _retry_after_seconds(response)
+                if delay is None or delay > self.settings.BUSY_MAX_WAIT_SECONDS:
+                    break
+                await asyncio.sleep(delay)
+
             response.raise_for_status()
             return response
 
@@ -66,8 +113,8 @@ class ArxivAPIService:
         return True
 
     def _prepare_search_data(self, query: str, category: str = None) -> Dict[str, Any]:
-        """Prepare search request data."""
-        data = {"query": query}
+        """Prepare search request data; results come back ranked with relevance scores."""
+        data = {"query": query, "rank": True, "deadline_ms": self.settings.RELEVANCE_DEADLINE_MS}
         if category:
             data["category"] = category
         return data
@@ -146,4 +193,17 @@ class ArxivAPIService:
             return response.json()
             
         except Exception as e:
-            return {"status": "error", "score": 0.5, "message": str(e)}
\ No newline at end of file
+            return {"status": "error", "score": 0.5, "message": str(e)}
+
+    async def calculate_relevance_batch(self, query: str, papers_data: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Calculate relevance scores for a whole result set in one request."""
+        if not await self.ensure_server_running():
+            return {"status": "error", "scores": [], "message": "Backend server is not running"}
+
+        try:
+            data = {"query": query, "papers": papers_data, "deadline_ms": self.settings.RELEVANCE_DEADLINE_MS}
+            response = await self._make_request("POST", RELEVANCE_BATCH_ENDPOINT, data)
+            return response.json()
+
+        except Exception as e:
+            return {"status": "error", "scores": [], "message": str(e)}
@@ -1,32 +1,64 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Callable, Optional
 from arxiv_mcp_server.ui.config import UISettings
 
+# Constants
+READ_PAPER_ENDPOINT = "/tools/read_paper"
+READ_TIMEOUT = 60.0
+
 class LLMService:
     """Service for LLM-based paper analysis through the backend server."""
-    
+
     def __init__(self):
         self.settings = UISettings()
         self.base_url = self.settings.API_URL
 
-    async def analyze_paper(self, paper_id: str, prompt: str = None) -> Dict[str, Any]:
-        """Analyze a paper using the backend API."""
+    async def stream_paper(self, paper_id: str, prompt: str = None) -> AsyncIterator[str]:
+        """Yield a paper's markdown as the backend streams it."""
+        data = {"paper_id": paper_id, "stream": True}
+        if prompt:
+            data["prompt"] = prompt
+
         async with httpx.AsyncClient() as client:
-            try:
-                data = {"paper_id": paper_id}
-                if prompt:
-                    data["prompt"] = prompt
-
-                response = await client.post(
-                    f"{self.base_url}/tools/read_paper",
-                    json=data,
-                    timeout=60.0
-                )
+            async with client.stream(
+                "POST",
+                f"{self.base_url}{READ_PAPER_ENDPOINT}",
+                json=data,
+                timeout=READ_TIMEOUT
+            ) as response:
                 response.raise_for_status()
-                return response.json()
-            except httpx.HTTPError as e:
-                print(f"HTTP error occurred while analyzing paper: {e}")
-                return {"status": "error", "message": str(e)}
-            except Exception as e:
-                print(f"Error occurred while analyzing paper: {e}")
-                return {"status": "error", "message": str(e)}
\ No newline at end of file
+                # aiter_text decodes incrementally, so characters split across chunks are safe
+                async for text in response.aiter_text():
+                    yield text
+
+    async def analyze_paper(
+        self,
+        paper_id: str,
+        prompt: str = None,
+        on_chunk: Optional[Callable[[str], Any]] = None
+    ) -> Dict[str, Any]:
+        """Analyze a paper using the backend API.
+
+        With ``on_chunk``, each piece of the paper is handed over as it arrives
+        and the content is not kept; otherwise the full content is returned.
+        """
+        try:
+            parts = []
+            received = 0
+            async for text in self.stream_paper(paper_id, prompt):
+                received += len(text)
+                if on_chunk is not None:
+                    on_chunk(text)
+                else:
+                    parts.append(text)
+
+            result = {"status": "success", "paper_id": paper_id, "characters": received}
+            if on_chunk is None:
+                result["content"] = "".join(parts)
+            return result
+        except httpx.HTTPError as e:
+            print(f"HTTP error occurred while analyzing paper: {e}")
+            return {"status": "error", "message": str(e)}
+        except Exception as e:
+            print(f"Error occurred while analyzing paper: {e}")
+            return {"status": "error", "message": str(e)}
@@ -1,9 +1,17 @@
 """Utility functions for the arXiv MCP server."""
 
 import json
-from typing import Dict, Any, List
+import re
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 # Constants
 MARKDOWN_EXTENSION = ".md"
 PDF_EXTENSION = ".pdf"
@@ -69,6 +77,27 @@ def safe_write_file(file_path: Path, content: str, encoding: str = DEFAULT_ENCOD
         return False
 
 
+def connect_sqlite(db_path: Path) -> sqlite3.Connection:
+    """Open a SQLite database shared by threads, in WAL mode for concurrent readers."""
+    ensure_directory_exists(db_path.parent)
+    conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on ``lock_path`` shared by all processes (a no-op without fcntl)."""
+    ensure_directory_exists(lock_path.parent)
+    with open(lock_path, "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        # Closing the file releases the lock.
+        yield
+
+
 # JSON Utilities
 def safe_json_loads(text: str, default: Any = None) -> Any:
     """Safely parse JSON, returning default value on error."""
@@ -149,6 +178,11 @@ def extract_paper_id(entry_id: str) -> str:
     return entry_id.split("/")[-1]
 
 
+def strip_version(paper_id: str) -> str:
+    """Drop the version suffix of an arXiv ID (2301.00001v2 -> 2301.00001)."""
+    return re.sub(r"v\d+$", "", paper_id)
+
+
 # Validation Utilities
 def is_valid_paper_id(paper_id: str) -> bool:
     """Check if a paper ID appears to be valid."""